@@ -0,0 +1,95 @@
+# filename: ai_profile.py
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import debug
+from config import (
+    SCORE_WIN_LANE_WITH_KING, SCORE_WIN_LANE, SCORE_BREAK_OPPONENT_WINNING_LANE,
+    SCORE_SETUP_WIN, SCORE_MAJOR_DISRUPTION, SCORE_FLEXIBILITY_BONUS,
+    SCORE_KING_PROGRESS, SCORE_BASIC_PROGRESS, SCORE_LANE_ODDS, SCORE_QUEEN_SYNERGY_PER_CARD,
+    SCORE_QUEEN_DENIAL_PER_CARD, SCORE_DISCARD_BUSTED_CARAVAN, SCORE_DISCARD_CARD,
+    SCORE_DISCARD_CARD_NO_OTHER_MOVE,
+    UTILITY_VALUE_QUEEN, UTILITY_VALUE_JACK, UTILITY_VALUE_KING, UTILITY_SUIT_MATCH_BONUS,
+)
+
+DEFAULT_AI_WEIGHTS: Dict[str, float] = {
+    "score_win_lane_with_king": SCORE_WIN_LANE_WITH_KING,
+    "score_win_lane": SCORE_WIN_LANE,
+    "score_break_opponent_winning_lane": SCORE_BREAK_OPPONENT_WINNING_LANE,
+    "score_setup_win": SCORE_SETUP_WIN,
+    "score_major_disruption": SCORE_MAJOR_DISRUPTION,
+    "score_flexibility_bonus": SCORE_FLEXIBILITY_BONUS,
+    "score_king_progress": SCORE_KING_PROGRESS,
+    "score_basic_progress": SCORE_BASIC_PROGRESS,
+    "score_lane_odds": SCORE_LANE_ODDS,
+    "score_queen_synergy_per_card": SCORE_QUEEN_SYNERGY_PER_CARD,
+    "score_queen_denial_per_card": SCORE_QUEEN_DENIAL_PER_CARD,
+    "score_discard_busted_caravan": SCORE_DISCARD_BUSTED_CARAVAN,
+    "score_discard_card": SCORE_DISCARD_CARD,
+    "score_discard_card_no_other_move": SCORE_DISCARD_CARD_NO_OTHER_MOVE,
+    "utility_value_queen": UTILITY_VALUE_QUEEN,
+    "utility_value_jack": UTILITY_VALUE_JACK,
+    "utility_value_king": UTILITY_VALUE_KING,
+    "utility_suit_match_bonus": UTILITY_SUIT_MATCH_BONUS,
+}
+AI_WEIGHT_NAMES = tuple(DEFAULT_AI_WEIGHTS)
+
+class AIProfile:
+    """Named set of the heuristic AI's scoring weights.
+
+    Every weight is an attribute named after its config constant in lower
+    case; missing weights fall back to the config defaults.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, name: str = "default"):
+        self.name = name
+        values = dict(DEFAULT_AI_WEIGHTS)
+        if weights:
+            unknown = set(weights) - set(values)
+            if unknown:
+                raise ValueError(f"Unknown AI weights: {', '.join(sorted(unknown))}")
+            values.update(weights)
+        for weight_name, value in values.items():
+            setattr(self, weight_name, float(value))
+
+    def to_dict(self) -> Dict[str, float]:
+        return {weight_name: getattr(self, weight_name) for weight_name in AI_WEIGHT_NAMES}
+
+    def vector(self) -> List[float]:
+        return [getattr(self, weight_name) for weight_name in AI_WEIGHT_NAMES]
+
+    @classmethod
+    def from_vector(cls, values: Sequence[float], name: str = "tuned") -> 'AIProfile':
+        if len(values) != len(AI_WEIGHT_NAMES):
+            raise ValueError(f"Expected {len(AI_WEIGHT_NAMES)} weights, got {len(values)}")
+        return cls(dict(zip(AI_WEIGHT_NAMES, values)), name)
+
+    def save(self, path: str, metadata: Optional[Dict] = None):
+        payload = {"name": self.name, "weights": self.to_dict()}
+        if metadata:
+            payload["metadata"] = metadata
+        with open(path, "w", encoding="utf-8") as profile_file:
+            json.dump(payload, profile_file, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'AIProfile':
+        with open(path, "r", encoding="utf-8") as profile_file:
+            payload = json.load(profile_file)
+        return cls(payload.get("weights", {}), payload.get("name", os.path.splitext(os.path.basename(path))[0]))
+
+    def __repr__(self) -> str:
+        return f"AIProfile(name='{self.name}')"
+
+DEFAULT_AI_PROFILE = AIProfile()
+
+def load_ai_profile_if_present(path: str) -> Optional[AIProfile]:
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        profile = AIProfile.load(path)
+    except (OSError, ValueError, TypeError) as e:
+        debug.log_error("Ignoring AI profile {}: {}", path, e)
+        return None
+    debug.log_startup("Loaded AI profile '{}' from {}", profile.name, path)
+    return profile
@@ -0,0 +1,72 @@
+# filename: ai_strategies.py
+import random
+from typing import Any, Callable, Dict, List, Optional, Protocol, TYPE_CHECKING
+
+from game_actions import GameActions
+
+if TYPE_CHECKING:
+    from game_state import GameState
+    from player import Player
+
+class AIStrategy(Protocol):
+    """Decides moves for one seat. ``time_budget_ms`` is advisory; strategies
+    that cannot use extra time may ignore it."""
+
+    name: str
+
+    def choose_setup_action(self, player: 'Player', game_state: 'GameState',
+                            time_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        ...
+
+    def choose_action(self, player: 'Player', game_state: 'GameState',
+                      time_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        ...
+
+class HeuristicStrategy:
+    """The scoring heuristic in Player, weighted by the player's AIProfile and
+    picking the k-th best move according to its difficulty."""
+
+    name = "heuristic"
+
+    def choose_setup_action(self, player: 'Player', game_state: 'GameState',
+                            time_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        return player.get_ai_setup_action()
+
+    def choose_action(self, player: 'Player', game_state: 'GameState',
+                      time_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        return player.get_ai_action(game_state) or {"type": "pass"}
+
+class RandomStrategy:
+    """Uniformly random legal move; passes only when nothing else is legal."""
+
+    name = "random"
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+
+    def _choose(self, player: 'Player', game_state: 'GameState') -> Dict[str, Any]:
+        legal: List[Dict[str, Any]] = GameActions(game_state).get_legal_actions(player)
+        moves = [action for action in legal if action["type"] != "pass"]
+        return self.rng.choice(moves) if moves else {"type": "pass"}
+
+    def choose_setup_action(self, player: 'Player', game_state: 'GameState',
+                            time_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        return self._choose(player, game_state)
+
+    def choose_action(self, player: 'Player', game_state: 'GameState',
+                      time_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        return self._choose(player, game_state)
+
+STRATEGY_FACTORIES: Dict[str, Callable[..., AIStrategy]] = {
+    HeuristicStrategy.name: HeuristicStrategy,
+    RandomStrategy.name: RandomStrategy,
+}
+
+def register_strategy(name: str, factory: Callable[..., AIStrategy]):
+    STRATEGY_FACTORIES[name] = factory
+
+def create_strategy(name: str, **kwargs) -> AIStrategy:
+    factory = STRATEGY_FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown AI strategy '{name}'. Known: {', '.join(sorted(STRATEGY_FACTORIES))}")
+    return factory(**kwargs)
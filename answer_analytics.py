@@ -0,0 +1,242 @@
+# filename: answer_analytics.py
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import debug
+from config import ANSWER_ANALYTICS_FILE, ANSWER_LATENCY_BUCKET_MS, ANSWER_LATENCY_MAX_BUCKET
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    answered_at REAL NOT NULL,
+    player TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    topic TEXT NOT NULL,
+    chosen_option INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    attempt INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_topic_time ON answers (topic, answered_at);
+CREATE INDEX IF NOT EXISTS answers_question ON answers (question_id);
+CREATE TABLE IF NOT EXISTS question_rollup (
+    question_id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    first_attempts INTEGER NOT NULL DEFAULT 0,
+    first_correct INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS question_rollup_topic ON question_rollup (topic);
+CREATE TABLE IF NOT EXISTS topic_latency_rollup (
+    topic TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    answers INTEGER NOT NULL,
+    PRIMARY KEY (topic, bucket)
+) WITHOUT ROWID;
+"""
+
+_INSERT_ANSWER = """
+INSERT INTO answers (answered_at, player, question_id, topic, chosen_option, correct, latency_ms, round, attempt)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_UPSERT_QUESTION = """
+INSERT INTO question_rollup (question_id, topic, first_attempts, first_correct, attempts) VALUES (?, ?, ?, ?, 1)
+ON CONFLICT (question_id) DO UPDATE SET
+    first_attempts = first_attempts + excluded.first_attempts,
+    first_correct = first_correct + excluded.first_correct,
+    attempts = attempts + 1
+"""
+_UPSERT_LATENCY = """
+INSERT INTO topic_latency_rollup (topic, bucket, answers) VALUES (?, ?, 1)
+ON CONFLICT (topic, bucket) DO UPDATE SET answers = answers + 1
+"""
+
+class TopicStats(NamedTuple):
+    topic: str
+    answered: int  # first attempts
+    correct: int
+    median_latency_ms: Optional[float]
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.answered if self.answered else 0.0
+
+def latency_bucket(latency_ms: int) -> int:
+    return min(max(0, latency_ms) // ANSWER_LATENCY_BUCKET_MS, ANSWER_LATENCY_MAX_BUCKET)
+
+def _histogram_median(buckets: Sequence[Tuple[int, int]]) -> Optional[float]:
+    """Median of a latency histogram given as sorted (bucket, count) pairs,
+    interpolated inside the bucket that holds it."""
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+    half = total / 2.0
+    seen = 0
+    for bucket, count in buckets:
+        if seen + count >= half:
+            return (bucket + (half - seen) / count) * ANSWER_LATENCY_BUCKET_MS
+        seen += count
+    return float(buckets[-1][0] * ANSWER_LATENCY_BUCKET_MS)
+
+class AnswerAnalytics:
+    """Append-only log of every question answer in SQLite.
+
+    Each answer also updates two rollups in the same transaction: per-question
+    first-attempt counts and a per-topic histogram of first-attempt latency.
+    Accuracy and median latency queries read only the rollups, so their cost
+    depends on the number of questions and latency buckets, not on the number
+    of answers logged. Medians are accurate to ANSWER_LATENCY_BUCKET_MS.
+    """
+
+    def __init__(self, path: str = ANSWER_ANALYTICS_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def record_answer(self, player: str, question: Dict[str, Any], chosen_option: int, correct: bool,
+                      latency_ms: int, round_number: int, attempt: int = 1, answered_at: Optional[float] = None):
+        self.record_answers([(answered_at if answered_at is not None else time.time(), player, question["id"],
+                              question.get("source_blurb_topic", ""), chosen_option, correct,
+                              latency_ms, round_number, attempt)])
+
+    def record_answers(self, rows: Iterable[Tuple[float, str, int, str, int, bool, int, int, int]]):
+        """Appends (answered_at, player, question_id, topic, chosen_option, correct,
+        latency_ms, round, attempt) rows in a single transaction."""
+        rows = [(answered_at, player, question_id, topic, chosen_option, int(correct), max(0, int(latency_ms)),
+                 round_number, attempt)
+                for answered_at, player, question_id, topic, chosen_option, correct, latency_ms, round_number, attempt
+                in rows]
+        first_attempts = [row for row in rows if row[8] == 1]
+        with self.connection:
+            self.connection.executemany(_INSERT_ANSWER, rows)
+            self.connection.executemany(_UPSERT_QUESTION, [
+                (row[2], row[3], int(row[8] == 1), row[5] if row[8] == 1 else 0) for row in rows])
+            self.connection.executemany(_UPSERT_LATENCY, [
+                (row[3], latency_bucket(row[6])) for row in first_attempts])
+
+    def question_accuracy(self, topic: Optional[str] = None) -> List[Tuple[int, str, int, int]]:
+        """(question_id, topic, first attempts, first-attempt correct), worst accuracy first."""
+        query = "SELECT question_id, topic, first_attempts, first_correct FROM question_rollup"
+        params: Tuple[Any, ...] = ()
+        if topic is not None:
+            query += " WHERE topic = ?"
+            params = (topic,)
+        query += " ORDER BY CAST(first_correct AS REAL) / MAX(first_attempts, 1), question_id"
+        return self.connection.execute(query, params).fetchall()
+
+    def median_latency_ms(self, topic: Optional[str] = None) -> Optional[float]:
+        if topic is None:
+            rows = self.connection.execute(
+                "SELECT bucket, SUM(answers) FROM topic_latency_rollup GROUP BY bucket ORDER BY bucket").fetchall()
+        else:
+            rows = self.connection.execute(
+                "SELECT bucket, answers FROM topic_latency_rollup WHERE topic = ? ORDER BY bucket", (topic,)).fetchall()
+        return _histogram_median(rows)
+
+    def topic_stats(self) -> List[TopicStats]:
+        """Per-topic first-attempt accuracy and median latency, worst accuracy first."""
+        histograms: Dict[str, List[Tuple[int, int]]] = {}
+        for topic, bucket, answers in self.connection.execute(
+                "SELECT topic, bucket, answers FROM topic_latency_rollup ORDER BY topic, bucket"):
+            histograms.setdefault(topic, []).append((bucket, answers))
+        stats = [TopicStats(topic, answered, correct, _histogram_median(histograms.get(topic, ())))
+                 for topic, answered, correct in self.connection.execute(
+                     "SELECT topic, SUM(first_attempts), SUM(first_correct) FROM question_rollup GROUP BY topic")
+                 if answered]
+        stats.sort(key=lambda s: (s.accuracy, s.topic))
+        return stats
+
+    def rebuild_rollups(self):
+        """Recomputes both rollups from the raw answer log."""
+        with self.connection:
+            self.connection.execute("DELETE FROM question_rollup")
+            self.connection.execute("DELETE FROM topic_latency_rollup")
+            self.connection.execute("""
+                INSERT INTO question_rollup (question_id, topic, first_attempts, first_correct, attempts)
+                SELECT question_id, MAX(topic), SUM(attempt = 1), SUM(attempt = 1 AND correct), COUNT(*)
+                FROM answers GROUP BY question_id""")
+            self.connection.execute("""
+                INSERT INTO topic_latency_rollup (topic, bucket, answers)
+                SELECT topic, MIN(latency_ms / ?, ?), COUNT(*) FROM answers WHERE attempt = 1
+                GROUP BY 1, 2""", (ANSWER_LATENCY_BUCKET_MS, ANSWER_LATENCY_MAX_BUCKET))
+
+    def answer_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+def _fill_synthetic(analytics: AnswerAnalytics, num_rows: int, num_questions: int = 5000, num_topics: int = 50,
+                    batch_size: int = 50_000, seed: int = 0):
+    rng = random.Random(seed)
+    difficulty = [rng.random() for _ in range(num_questions)]
+    written = 0
+    while written < num_rows:
+        batch = []
+        for _ in range(min(batch_size, num_rows - written)):
+            question_id = rng.randrange(num_questions)
+            attempt = 1 if rng.random() < 0.8 else 2
+            batch.append((time.time(), "bench", question_id, f"topic_{question_id % num_topics}", rng.randrange(3),
+                          rng.random() > difficulty[question_id], int(rng.lognormvariate(8.5, 0.6)),
+                          rng.randrange(1, 40), attempt))
+        analytics.record_answers(batch)
+        written += len(batch)
+
+def _print_report(analytics: AnswerAnalytics, limit: int):
+    stats = analytics.topic_stats()
+    if not stats:
+        print("No answers recorded yet.")
+        return
+    print(f"{'topic':<28} {'answered':>9} {'accuracy':>9} {'median s':>9}")
+    for topic_stats in stats[:limit]:
+        median = topic_stats.median_latency_ms
+        median_text = f"{median / 1000.0:>9.1f}" if median is not None else f"{'-':>9}"
+        print(f"{topic_stats.topic:<28} {topic_stats.answered:>9} {topic_stats.accuracy:>9.1%} {median_text}")
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Per-topic accuracy and answer latency from the answer log.")
+    parser.add_argument("--db", default=ANSWER_ANALYTICS_FILE)
+    parser.add_argument("--limit", type=int, default=20, help="Topics to list, weakest first.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the rollups from the raw log first.")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="ROWS",
+                        help="Time inserts and queries against ROWS synthetic answers in a temporary database.")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            analytics = AnswerAnalytics(os.path.join(tmp_dir, "bench.sqlite"))
+            start = time.perf_counter()
+            _fill_synthetic(analytics, args.benchmark)
+            insert_s = time.perf_counter() - start
+            start = time.perf_counter()
+            analytics.topic_stats()
+            topic_ms = (time.perf_counter() - start) * 1000.0
+            start = time.perf_counter()
+            analytics.median_latency_ms("topic_7")
+            median_ms = (time.perf_counter() - start) * 1000.0
+            print(f"{args.benchmark} answers: insert {args.benchmark / insert_s:,.0f} rows/s, "
+                  f"topic_stats {topic_ms:.1f} ms, single-topic median {median_ms:.2f} ms")
+            analytics.close()
+        return
+
+    if not os.path.exists(args.db):
+        print(f"No answer log at {args.db}.")
+        return
+    debug.configure(default_level=debug.WARNING)
+    analytics = AnswerAnalytics(args.db)
+    if args.rebuild:
+        analytics.rebuild_rollups()
+    print(f"{analytics.answer_count()} answers in {args.db}")
+    _print_report(analytics, args.limit)
+    analytics.close()
+
+if __name__ == "__main__":
+    main()
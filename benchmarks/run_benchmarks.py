@@ -0,0 +1,224 @@
+# filename: benchmarks/run_benchmarks.py
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import debug
+from card import Card
+from caravan import Caravan
+from flight_recorder import RECORDER
+from game_actions import GameActions
+from headless import HeadlessGame
+from vector_env import VectorEnv
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 1.30  # fail when a benchmark is more than 30% slower than its baseline
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    number: int
+
+def _position(seed: int, actions: int) -> HeadlessGame:
+    """A mid-game position reached by letting the built-in AI play a fixed number of actions."""
+    game = HeadlessGame(seed=seed, ai_difficulty=1, questions=False)
+    for _ in range(actions):
+        if game.game_over or not game.play_ai_turn():
+            break
+    return game
+
+def _caravan(*specs: Tuple[str, str]) -> Caravan:
+    caravan = Caravan()
+    for rank, suit in specs:
+        card = Card(rank, suit)
+        if card.is_numeric():
+            caravan.add_card(card)
+        else:
+            caravan._add_special_card_raw(card)
+    return caravan
+
+def bench_card_construction():
+    return lambda: Card('7', 'hearts')
+
+def bench_card_hash():
+    card = Card('queen', 'spades')
+    return lambda: hash(card)
+
+def bench_caravan_total_uncached():
+    caravan = _caravan(('4', 'hearts'), ('6', 'hearts'), ('king', 'clubs'), ('9', 'hearts'))
+    def run():
+        caravan._needs_recalc = True
+        return caravan.total()
+    return run
+
+def bench_caravan_total_cached():
+    caravan = _caravan(('4', 'hearts'), ('6', 'hearts'), ('9', 'hearts'))
+    caravan.total()
+    return caravan.total
+
+def bench_can_add_numeric():
+    caravan = _caravan(('4', 'hearts'), ('6', 'hearts'))
+    card = Card('9', 'spades')
+    return lambda: caravan.can_add_numeric(card)
+
+def bench_add_card():
+    caravan = Caravan()
+    cards = [Card('3', 'hearts'), Card('5', 'hearts'), Card('8', 'hearts')]
+    def run():
+        caravan.reset()
+        for card in cards:
+            caravan.add_card(card)
+    return run
+
+def _handler_bench(rank: str):
+    game = _position(seed=7, actions=12)
+    actions = GameActions(game.game_state)
+    player, opponent = game.game_state.players
+    target = next((c for c in opponent.caravans + player.caravans if c.get_last_numeric_card_info()[0]), None)
+    saved_cards = list(target.cards)
+    card = Card(rank, 'clubs')
+    handler = actions._special_handlers[rank]
+    def run():
+        target.cards = list(saved_cards)
+        target._update_state_after_removal()
+        handler(actions, player, 0, card, opponent, target)
+    return run
+
+def bench_jack_handler():
+    return _handler_bench('jack')
+
+def bench_king_handler():
+    return _handler_bench('king')
+
+def bench_is_caravan_sold_by_player():
+    game = _position(seed=3, actions=20)
+    game_state = game.game_state
+    player = game_state.players[0]
+    return lambda: game_state.is_caravan_sold_by_player(player, 1)
+
+def bench_check_game_over():
+    game_state = _position(seed=3, actions=20).game_state
+    return game_state.check_game_over
+
+def bench_get_ai_action_early():
+    game = _position(seed=11, actions=10)
+    player = game.game_state.get_current_player()
+    return lambda: player.get_ai_action(game.game_state)
+
+def bench_get_ai_action_midgame():
+    game = _position(seed=11, actions=24)
+    player = game.game_state.get_current_player()
+    return lambda: player.get_ai_action(game.game_state)
+
+def bench_get_legal_actions():
+    game = _position(seed=11, actions=24)
+    player = game.game_state.get_current_player()
+    return lambda: game.game_actions.get_legal_actions(player)
+
+def bench_vector_env_step_4096():
+    env = VectorEnv()
+    env.reset(4096, seed=0)
+    return lambda: env.step(env.legal_masks.argmax(axis=1))
+
+def bench_headless_game():
+    seeds = iter(range(10**9))
+    return lambda: HeadlessGame(seed=next(seeds), ai_difficulty=1, questions=False).play_to_end()
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("card_construction", bench_card_construction, 100_000),
+    Benchmark("card_hash", bench_card_hash, 200_000),
+    Benchmark("caravan_total_uncached", bench_caravan_total_uncached, 100_000),
+    Benchmark("caravan_total_cached", bench_caravan_total_cached, 200_000),
+    Benchmark("caravan_can_add_numeric", bench_can_add_numeric, 100_000),
+    Benchmark("caravan_add_card_x3", bench_add_card, 20_000),
+    Benchmark("jack_handler", bench_jack_handler, 20_000),
+    Benchmark("king_handler", bench_king_handler, 20_000),
+    Benchmark("is_caravan_sold_by_player", bench_is_caravan_sold_by_player, 100_000),
+    Benchmark("check_game_over", bench_check_game_over, 50_000),
+    Benchmark("get_ai_action_early", bench_get_ai_action_early, 500),
+    Benchmark("get_ai_action_midgame", bench_get_ai_action_midgame, 500),
+    Benchmark("get_legal_actions", bench_get_legal_actions, 20_000),
+    Benchmark("vector_env_step_4096", bench_vector_env_step_4096, 20),
+    Benchmark("headless_game", bench_headless_game, 20),
+]
+
+def run_benchmarks(selected: Optional[Sequence[str]] = None, repeat: int = 5,
+                   scale: float = 1.0) -> Dict[str, float]:
+    """Returns the best-of-repeat time per call in microseconds for each benchmark."""
+    results: Dict[str, float] = {}
+    for bench in BENCHMARKS:
+        if selected and bench.name not in selected:
+            continue
+        number = max(1, int(bench.number * scale))
+        try:
+            stmt = bench.setup()
+        except ImportError as e:
+            print(f"Skipping {bench.name}: {e}")
+            continue
+        timer = timeit.Timer(stmt)
+        best = min(timer.repeat(repeat=repeat, number=number))
+        results[bench.name] = best / number * 1e6
+    return results
+
+def load_baseline(path: str = BASELINE_FILE) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as baseline_file:
+        return json.load(baseline_file).get("results_us", {})
+
+def save_baseline(results: Dict[str, float], path: str = BASELINE_FILE):
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results_us": {name: round(value, 4) for name, value in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(payload, baseline_file, indent=2)
+        baseline_file.write("\n")
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the rules engine and AI hot paths.")
+    parser.add_argument("names", nargs="*", help="Benchmarks to run (all by default).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Run a tenth of the iterations.")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Overwrite {os.path.basename(BASELINE_FILE)}.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown ratio against the baseline before failing.")
+    args = parser.parse_args(argv)
+
+    debug.configure(default_level=debug.ERROR)
+    RECORDER.enabled = False
+    results = run_benchmarks(args.names, args.repeat, 0.1 if args.quick else 1.0)
+    baseline = load_baseline()
+    regressions = []
+    print(f"{'benchmark':<28} {'us/call':>12} {'baseline':>12} {'ratio':>7}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        ratio = value / base if base else None
+        flag = ""
+        if ratio is not None and ratio > args.tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        base_text = f"{base:>12.3f}" if base else f"{'-':>12}"
+        ratio_text = f"{ratio:>7.2f}" if ratio is not None else f"{'-':>7}"
+        print(f"{name:<28} {value:>12.3f} {base_text} {ratio_text}{flag}")
+
+    if args.update_baseline:
+        merged = dict(baseline)
+        merged.update(results)
+        save_baseline(merged)
+        print(f"Baseline written to {BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than {args.tolerance:.2f}x baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# filename: canonical.py
+import hashlib
+import struct
+from itertools import permutations
+from typing import List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from card_set import SUIT_MASKS
+from config import SUITS
+from game_snapshot import snapshot_header_fields, FLAG_RNG, DIRECTIONS
+
+if TYPE_CHECKING:
+    from caravan import Caravan
+    from game_state import GameState
+
+# The rules never compare suits except for equality, so relabelling every
+# suit by the same permutation maps a position to an equivalent one. A
+# suit map is a tuple whose entry s is the new index of SUITS[s].
+#
+# Card.index is rank * len(SUITS) + suit for every suited card, so moving a
+# suit within a mask is a single shift; indices past the suited cards (the
+# bonus point card) are left as they are.
+NUM_SUITS = len(SUITS)
+IDENTITY_SUIT_MAP = tuple(range(NUM_SUITS))
+SUIT_PERMUTATIONS: List[Tuple[int, ...]] = list(permutations(range(NUM_SUITS)))
+_SUIT_MASK_LIST = [SUIT_MASKS[suit] for suit in SUITS]
+_SUITED_MASK = sum(_SUIT_MASK_LIST)
+_NUM_SUITED_INDICES = _SUITED_MASK.bit_length()
+_SUIT_INDEX = {suit: s for s, suit in enumerate(SUITS)}
+_STATE_HEADER = struct.Struct("<HBHBBQ")
+_LANE_HEADER = struct.Struct("<BBB")
+_SEAT_MASKS = struct.Struct("<QQ")
+
+def permute_mask(mask: int, suit_map: Sequence[int]) -> int:
+    """A CardSet mask with every card's suit s replaced by suit_map[s]."""
+    out = mask & ~_SUITED_MASK
+    for s, target in enumerate(suit_map):
+        bits = mask & _SUIT_MASK_LIST[s]
+        out |= bits << (target - s) if target >= s else bits >> (s - target)
+    return out
+
+def permute_card_index(index: int, suit_map: Sequence[int]) -> int:
+    if index >= _NUM_SUITED_INDICES:
+        return index
+    s = index % NUM_SUITS
+    return index - s + suit_map[s]
+
+# bytes.translate() tables, one per suit map, for relabelling card index bytes.
+_INDEX_TABLES = {suit_map: bytes(permute_card_index(index, suit_map) for index in range(256))
+                 for suit_map in SUIT_PERMUTATIONS}
+
+def permute_suit(suit: str, suit_map: Sequence[int]) -> str:
+    s = _SUIT_INDEX.get(suit)
+    return suit if s is None else SUITS[suit_map[s]]
+
+def _suit_map_from_signatures(signatures: Sequence[tuple]) -> Tuple[int, ...]:
+    """Suits sorted by signature, largest first, get indices 0, 1, ... Suits
+    with equal signatures are interchangeable, so their order is immaterial."""
+    order = sorted(range(NUM_SUITS), key=lambda s: signatures[s], reverse=True)
+    suit_map = [0] * NUM_SUITS
+    for new_index, s in enumerate(order):
+        suit_map[s] = new_index
+    return tuple(suit_map)
+
+def _set_pattern(mask: int, s: int) -> int:
+    # The suit's cards, shifted so patterns of different suits line up.
+    return (mask & _SUIT_MASK_LIST[s]) >> s
+
+_OWN_SUIT_BIT = 1 << 64  # above any caravan position
+
+def _lane_indices(caravan: 'Caravan') -> bytes:
+    return bytes([card.index for card in caravan.cards])
+
+def _lane_signature(caravan: 'Caravan', indices: bytes) -> List[int]:
+    """Per suit: a bit per lane position holding that suit, plus _OWN_SUIT_BIT
+    for the lane's suit."""
+    positions = [0] * NUM_SUITS
+    for position, index in enumerate(indices):
+        if index < _NUM_SUITED_INDICES:
+            positions[index % NUM_SUITS] |= 1 << position
+    own = _SUIT_INDEX.get(caravan.suit)
+    if own is not None:
+        positions[own] |= _OWN_SUIT_BIT
+    return positions
+
+def lane_suit_map(caravan: 'Caravan', pool_mask: int = 0) -> Tuple[int, ...]:
+    """Suit map that puts the lane's own suit first, then the other suits
+    played on the lane by position, then the rest by their cards in
+    pool_mask (the cards that may still be played on the lane, if that
+    matters)."""
+    return _lane_suit_map(caravan, _lane_indices(caravan), pool_mask)
+
+def _lane_suit_map(caravan: 'Caravan', indices: bytes, pool_mask: int) -> Tuple[int, ...]:
+    positions = _lane_signature(caravan, indices)
+    return _suit_map_from_signatures([(positions[s], _set_pattern(pool_mask, s)) for s in range(NUM_SUITS)])
+
+def pool_suit_map(pool_mask: int, first_suit: Optional[str] = None) -> Tuple[int, ...]:
+    """Suit map that puts first_suit first and orders the rest by their cards
+    in pool_mask; enough when only one suit of a lane matters."""
+    first = _SUIT_INDEX.get(first_suit, -1)
+    return _suit_map_from_signatures([(s == first, _set_pattern(pool_mask, s)) for s in range(NUM_SUITS)])
+
+def _lane_bytes(caravan: 'Caravan', indices: bytes, suit_map: Sequence[int]) -> bytes:
+    suit = _SUIT_INDEX.get(caravan.suit)
+    return _LANE_HEADER.pack(DIRECTIONS.index(caravan.direction), 0 if suit is None else suit_map[suit] + 1,
+                             len(indices)) + indices.translate(_INDEX_TABLES[suit_map])
+
+def canonical_lane_key(caravan: 'Caravan', pool_mask: int = 0) -> bytes:
+    """Suit-canonical encoding of a lane (and of an optional card pool):
+    equal for any two lanes that differ only by a suit permutation."""
+    indices = _lane_indices(caravan)
+    suit_map = _lane_suit_map(caravan, indices, pool_mask)
+    key = _lane_bytes(caravan, indices, suit_map)
+    return key + permute_mask(pool_mask, suit_map).to_bytes(8, "little") if pool_mask else key
+
+def _state_suit_map(game_state: 'GameState', lanes: Sequence[bytes]) -> Tuple[int, ...]:
+    signatures: List[List[int]] = [[] for _ in range(NUM_SUITS)]
+    caravans = [caravan for player in game_state.players for caravan in player.caravans]
+    for caravan, indices in zip(caravans, lanes):
+        for signature, positions in zip(signatures, _lane_signature(caravan, indices)):
+            signature.append(positions)
+    masks = [mask for player in game_state.players for mask in (player.hand.card_set.mask, player.deck.card_set.mask)]
+    masks.append(game_state.unseen.mask)
+    for s, suit_mask in enumerate(_SUIT_MASK_LIST):
+        signatures[s] += [(mask & suit_mask) >> s for mask in masks]
+    return _suit_map_from_signatures(signatures)
+
+def state_suit_map(game_state: 'GameState') -> Tuple[int, ...]:
+    """Suit map derived from everything a suit touches: caravan suits and
+    card positions, hands, decks and the unseen set, seat by seat."""
+    return _state_suit_map(game_state, [_lane_indices(caravan) for player in game_state.players
+                                        for caravan in player.caravans])
+
+def canonical_state_key(game_state: 'GameState') -> bytes:
+    """Suit-canonical encoding of the rules state. Hands and decks are taken
+    as sets (their order does not change which moves exist, and deck order
+    is hidden), and the deal seed, RNG, player names and question in play
+    are left out, so equivalent positions from different games match."""
+    lanes = [_lane_indices(caravan) for player in game_state.players for caravan in player.caravans]
+    suit_map = _state_suit_map(game_state, lanes)
+    flags, _, current, turn_count, winner, bonus, _, _, unseen_mask = snapshot_header_fields(game_state, include_rng=False)
+    parts = [_STATE_HEADER.pack(flags & ~FLAG_RNG, current, turn_count, winner, bonus, permute_mask(unseen_mask, suit_map))]
+    lane_iter = iter(lanes)
+    for player in game_state.players:
+        parts.append(_SEAT_MASKS.pack(permute_mask(player.hand.card_set.mask, suit_map),
+                                      permute_mask(player.deck.card_set.mask, suit_map)))
+        parts.extend(_lane_bytes(caravan, next(lane_iter), suit_map) for caravan in player.caravans)
+    return b"".join(parts)
+
+def canonical_hash(key: bytes) -> int:
+    """Stable 64-bit hash of a canonical key, the same in every process."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+def canonical_state_hash(game_state: 'GameState') -> int:
+    return canonical_hash(canonical_state_key(game_state))
+
+def canonical_lane_hash(caravan: 'Caravan', pool_mask: int = 0) -> int:
+    return canonical_hash(canonical_lane_key(caravan, pool_mask))
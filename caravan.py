@@ -1,21 +1,28 @@
 # filename: caravan.py
 from card import Card
-from config import CARAVAN_WIN_MIN, CARAVAN_WIN_MAX
+from rules import RulesVariant, STANDARD_RULES
 from typing import Union, Tuple, List, Optional
 import copy
 
 class Caravan:
-    def __init__(self):
+    def __init__(self, rules: Optional[RulesVariant] = None):
+        self.rules: RulesVariant = rules or STANDARD_RULES
         self.cards: List[Card] = []
         self.direction: Optional[str] = None
         self.suit: Optional[str] = None
         self._cached_total: int = 0
         self._needs_recalc: bool = True
+        self._version: int = 0
 
     def _invalidate_cache(self):
+        self._version += 1
         if not self._needs_recalc:
             self._needs_recalc = True
 
+    @property
+    def version(self) -> int:
+        return self._version
+
     def total(self) -> int:
         if not self._needs_recalc:
             return self._cached_total
@@ -24,13 +31,13 @@ class Caravan:
         while i < len(self.cards):
             card = self.cards[i]
             if card.is_numeric():
-                base_value = card.value
-                multiplier = 1
                 j = i + 1
                 while j < len(self.cards) and self.cards[j].rank == "king":
-                    multiplier *= 2
                     j += 1
-                total_value += base_value * multiplier
+                if j == i + 1:
+                    total_value += card.value
+                else:
+                    total_value += card.value * self.rules.king_factors[j - i - 1]
                 i = j
             elif card.rank == 'king':
                 i += 1
@@ -43,7 +50,7 @@ class Caravan:
 
     def is_winning(self) -> bool:
         t = self.total()
-        return CARAVAN_WIN_MIN <= t <= CARAVAN_WIN_MAX
+        return self.rules.win_min <= t <= self.rules.win_max
 
     def get_last_numeric_card_info(self) -> Tuple[Optional[Card], int]:
         for i in range(len(self.cards) - 1, -1, -1):
@@ -150,6 +157,7 @@ class Caravan:
         self.suit = None
         self._cached_total = 0
         self._needs_recalc = False
+        self._version += 1
         return discarded_cards
 
     def deep_copy(self):
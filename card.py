@@ -1,17 +1,22 @@
 # filename: card.py
-from config import CARD_VALUES, SUITS, FACE_RANKS, NUMERIC_RANKS, SPECIAL_RANKS
+from config import CARD_VALUES, SUITS, FACE_RANKS, NUMERIC_RANKS, SPECIAL_RANKS, JOKER_RANK, STANDARD_DECK_COMPOSITION
+
+CARD_INDEX_KEYS = [(spec['rank'], spec['suit']) for spec in STANDARD_DECK_COMPOSITION] + [('bonus_point', ''), (JOKER_RANK, '')]
+CARD_INDEX_BY_KEY = {key: i for i, key in enumerate(CARD_INDEX_KEYS)}
+NUM_CARD_INDICES = len(CARD_INDEX_KEYS)
+UNKNOWN_CARD_INDEX = 255
 
 class Card:
     def __init__(self, rank: str, suit: str):
         clean_rank = rank.lower().strip() if isinstance(rank, str) else "unknown"
         clean_suit = suit.lower().strip() if isinstance(suit, str) else ""
 
-        if clean_rank not in (NUMERIC_RANKS + FACE_RANKS + SPECIAL_RANKS):
+        if clean_rank not in (NUMERIC_RANKS + FACE_RANKS + SPECIAL_RANKS) and clean_rank != JOKER_RANK:
             self.rank: str = "unknown"
         else:
             self.rank: str = clean_rank
 
-        if self.rank == 'bonus_point':
+        if self.rank in ('bonus_point', JOKER_RANK):
              self.suit: str = ""
         elif self.rank != "unknown" and clean_suit not in SUITS :
             self.suit: str = ""
@@ -20,14 +25,19 @@ class Card:
 
         self._value: int = CARD_VALUES.get(self.rank, 0)
         self._is_numeric: bool = self.rank in NUMERIC_RANKS
-        self._is_face: bool = self.rank in FACE_RANKS
+        self._is_face: bool = self.rank in FACE_RANKS or self.rank == JOKER_RANK  # jokers play like face cards
         self._is_bonus_point: bool = self.rank == 'bonus_point'
         self._is_special: bool = self._is_face or self._is_bonus_point
+        self._index: int = CARD_INDEX_BY_KEY.get((self.rank, self.suit), UNKNOWN_CARD_INDEX)
 
     @property
     def value(self) -> int:
         return self._value
 
+    @property
+    def index(self) -> int:
+        return self._index
+
     def is_numeric(self) -> bool:
         return self._is_numeric
 
@@ -60,4 +70,14 @@ class Card:
         return self.rank == other.rank and self.suit == other.suit
 
     def __hash__(self) -> int:
-        return hash((self.rank, self.suit))
\ No newline at end of file
+        return hash((self.rank, self.suit))
+
+_CARD_PROTOTYPES = [Card(rank, suit) for rank, suit in CARD_INDEX_KEYS]
+
+def card_from_index(index: int) -> Card:
+    """A new Card for index, copied from a prototype rather than re-validated."""
+    if not 0 <= index < NUM_CARD_INDICES:
+        return Card('unknown', '')
+    card = Card.__new__(Card)
+    card.__dict__.update(_CARD_PROTOTYPES[index].__dict__)
+    return card
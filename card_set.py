@@ -0,0 +1,146 @@
+# filename: card_set.py
+from typing import Iterable, List, Optional
+
+from card import Card, CARD_INDEX_KEYS, NUM_CARD_INDICES, UNKNOWN_CARD_INDEX
+from config import CARD_VALUES, FACE_RANKS, NUMERIC_RANKS, SUITS
+
+# Bit i of a mask stands for the card with Card.index i.
+ALL_CARDS_MASK = (1 << NUM_CARD_INDICES) - 1
+SUIT_MASKS = {suit: sum(1 << i for i, (_, s) in enumerate(CARD_INDEX_KEYS) if s == suit) for suit in SUITS}
+RANK_MASKS = {rank: sum(1 << i for i, (r, _) in enumerate(CARD_INDEX_KEYS) if r == rank)
+              for rank in NUMERIC_RANKS + FACE_RANKS}
+NUMERIC_MASK = sum(RANK_MASKS[rank] for rank in NUMERIC_RANKS)
+FACE_MASK = sum(RANK_MASKS[rank] for rank in FACE_RANKS)
+VALUE_MASKS = [sum(RANK_MASKS[rank] for rank in NUMERIC_RANKS if CARD_VALUES[rank] == value) for value in range(11)]
+
+def value_range_mask(low: int, high: int) -> int:
+    """Numeric cards with low <= value <= high."""
+    return sum(VALUE_MASKS[value] for value in range(max(low, 0), min(high, 10) + 1))
+
+class CardSet:
+    """Bitset of the distinct cards in a collection, plus a count per card
+    index so removing one of two copies keeps the bit set. Queries are
+    popcounts of mask & query_mask, i.e. they count distinct cards; hands,
+    decks and the unseen set never hold the same card twice."""
+
+    __slots__ = ("mask", "_counts")
+
+    def __init__(self, cards: Iterable[Card] = ()):
+        self.mask = 0
+        self._counts = bytearray(NUM_CARD_INDICES)
+        for card in cards:
+            self.add(card)
+
+    def add(self, card: Card):
+        index = card.index
+        if index != UNKNOWN_CARD_INDEX:
+            self._counts[index] += 1
+            self.mask |= 1 << index
+
+    def remove(self, card: Card):
+        index = card.index
+        if index != UNKNOWN_CARD_INDEX and self._counts[index]:
+            self._counts[index] -= 1
+            if not self._counts[index]:
+                self.mask &= ~(1 << index)
+
+    def clear(self):
+        self.mask = 0
+        self._counts = bytearray(NUM_CARD_INDICES)
+
+    def count(self, query_mask: int = ALL_CARDS_MASK) -> int:
+        return (self.mask & query_mask).bit_count()
+
+    def count_suit(self, suit: str, query_mask: int = ALL_CARDS_MASK) -> int:
+        return (self.mask & query_mask & SUIT_MASKS.get(suit, 0)).bit_count()
+
+    def numeric_value_sum(self) -> int:
+        return sum(value * (self.mask & VALUE_MASKS[value]).bit_count() for value in range(2, 11))
+
+    def suits(self, query_mask: int = ALL_CARDS_MASK) -> List[str]:
+        return [suit for suit in SUITS if self.mask & query_mask & SUIT_MASKS[suit]]
+
+    def __contains__(self, card: Card) -> bool:
+        index = card.index
+        return index != UNKNOWN_CARD_INDEX and bool(self.mask >> index & 1)
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+class CardList(list):
+    """List of Cards that keeps a CardSet of its contents in .card_set.
+
+    Every mutating list method is overridden; slices and copies come back as
+    plain lists, so simulations that copy a hand do not pay for tracking.
+    """
+
+    def __init__(self, cards: Iterable[Card] = ()):
+        super().__init__(cards)
+        self.card_set = CardSet(self)
+
+    def __reduce__(self):
+        return CardList, (list(self),)
+
+    def append(self, card: Card):
+        super().append(card)
+        self.card_set.add(card)
+
+    def extend(self, cards: Iterable[Card]):
+        cards = list(cards)
+        super().extend(cards)
+        for card in cards:
+            self.card_set.add(card)
+
+    def __iadd__(self, cards: Iterable[Card]) -> 'CardList':
+        self.extend(cards)
+        return self
+
+    def insert(self, index: int, card: Card):
+        super().insert(index, card)
+        self.card_set.add(card)
+
+    def pop(self, index: int = -1) -> Card:
+        card = super().pop(index)
+        self.card_set.remove(card)
+        return card
+
+    def remove(self, card: Card):
+        position = self.index(card)
+        self.card_set.remove(super().pop(position))
+
+    def clear(self):
+        super().clear()
+        self.card_set.clear()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            removed = self[index]
+            value = list(value)
+            super().__setitem__(index, value)
+            for card in removed:
+                self.card_set.remove(card)
+            for card in value:
+                self.card_set.add(card)
+        else:
+            self.card_set.remove(self[index])
+            super().__setitem__(index, value)
+            self.card_set.add(value)
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for card in removed:
+            self.card_set.remove(card)
+
+    def __imul__(self, times: int) -> 'CardList':
+        cards = list(self)
+        for _ in range(max(times, 1) - 1):
+            self.extend(cards)
+        if times <= 0:
+            self.clear()
+        return self
+
+def as_card_list(cards: Optional[Iterable[Card]]) -> CardList:
+    if isinstance(cards, CardList):
+        return cards
+    return CardList(cards or ())
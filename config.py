@@ -5,11 +5,12 @@ SUITS = ['spades', 'hearts', 'diamonds', 'clubs']
 NUMERIC_RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10']
 FACE_RANKS = ['jack', 'queen', 'king']
 SPECIAL_RANKS = ['bonus_point']
+JOKER_RANK = 'joker'  # only in decks of rules variants with jokers (rules.py)
 ALL_RANKS = NUMERIC_RANKS + FACE_RANKS + SPECIAL_RANKS
 
 CARD_VALUES = {
     '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
-    'jack': 0, 'queen': 0, 'king': 0, 'bonus_point': 1
+    'jack': 0, 'queen': 0, 'king': 0, 'bonus_point': 1, JOKER_RANK: 0
 }
 
 NUM_CARAVANS = 4
@@ -24,6 +25,7 @@ STANDARD_DECK_COMPOSITION = [{'rank': r, 'suit': s} for r in NUMERIC_RANKS for s
 
 AI_PAUSE_DURATION_MS = 750
 AI_DIFFICULTY_LEVEL = 1
+AI_STRATEGY = "heuristic"
 
 SCORE_WIN_LANE_WITH_KING = 350
 SCORE_WIN_LANE = 305
@@ -33,12 +35,31 @@ SCORE_MAJOR_DISRUPTION = 80
 SCORE_FLEXIBILITY_BONUS = 50
 SCORE_KING_PROGRESS = 35
 SCORE_BASIC_PROGRESS = 25
+SCORE_LANE_ODDS = 100  # times the chance that a short lane reaches the win range in LANE_ODDS_MAX_PLAYS plays
 SCORE_QUEEN_SYNERGY_PER_CARD = 20
+SCORE_QUEEN_DENIAL_PER_CARD = 10
+SCORE_DISCARD_BUSTED_CARAVAN = 15
+SCORE_DISCARD_CARD = 25
+SCORE_DISCARD_CARD_NO_OTHER_MOVE = 5
 
 UTILITY_VALUE_QUEEN = 55
 UTILITY_VALUE_JACK = 60
 UTILITY_VALUE_KING = 65
 UTILITY_VALUE_BONUS_POINT = 70
+UTILITY_SUIT_MATCH_BONUS = 20
+
+AI_PROFILE_FILE = "ai_profile.json"
+
+QUESTION_PACK_DIR = "questions"  # *.json / *.sqlite packs, relative to the game directory
+QUESTION_PACK_MIN_OPTIONS = 2
+QUESTION_PACK_MAX_OPTIONS = 5
+QUESTION_PROGRESS_FILE = "question_progress.json"
+QUESTION_REVIEW_INTERVALS = (1, 3, 7, 15, 31)  # steps until the next review, per Leitner box
+QUESTION_TOPIC_MISS_WEIGHT = 2  # steps earlier each recorded topic miss brings that topic's questions
+QUESTION_TOPIC_MISS_CAP = 3  # outstanding misses counted per topic, so one weak topic cannot starve the rest
+ANSWER_ANALYTICS_FILE = "answer_analytics.sqlite"
+ANSWER_LATENCY_BUCKET_MS = 100  # resolution of the median latency rollup
+ANSWER_LATENCY_MAX_BUCKET = 600  # answers slower than a minute share the last bucket
 
 CHEAT_PROPHECY_SCORE_BONUS = 5000 #shhh dont look too closely into this
 
@@ -106,6 +127,9 @@ MESSAGE_BOX_RECT = pygame.Rect(0, 0, 650, 70)
 MESSAGE_BOX_RECT.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 40)
 WINNER_POS = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60)
 TURN_INFO_POS = (SCREEN_WIDTH // 2, 30)
+MESSAGE_TEXT_MAX_WIDTH = SCREEN_WIDTH - 2 * CARAVAN_START_X
+MESSAGE_TEXT_MAX_LINES = 2
+GAME_OVER_TEXT_MAX_WIDTH = int(SCREEN_WIDTH * 0.7)
 INFO_MARGIN = 25
 SOLD_COUNT_POS_P1 = (INFO_MARGIN, PLAYER_HAND_Y + SCALED_CARD_HEIGHT // 2 )
 SOLD_COUNT_POS_P2 = (SCREEN_WIDTH - INFO_MARGIN, OPPONENT_CARAVAN_Y + SCALED_CARD_HEIGHT + 20)
@@ -128,4 +152,40 @@ TUTORIAL_BTN_MARGIN = 20
 TUTORIAL_NAV_Y = SCREEN_HEIGHT - (TUTORIAL_BTN_HEIGHT // 2) - 20
 TUTORIAL_PREV_BTN_CENTER_X = SCREEN_WIDTH // 2 - TUTORIAL_BTN_WIDTH - TUTORIAL_BTN_MARGIN
 TUTORIAL_CLOSE_BTN_CENTER_X = SCREEN_WIDTH // 2
-TUTORIAL_NEXT_BTN_CENTER_X = SCREEN_WIDTH // 2 + TUTORIAL_BTN_WIDTH + TUTORIAL_BTN_MARGIN
\ No newline at end of file
+TUTORIAL_NEXT_BTN_CENTER_X = SCREEN_WIDTH // 2 + TUTORIAL_BTN_WIDTH + TUTORIAL_BTN_MARGIN
+
+PROFILER_TOGGLE_KEY = pygame.K_F3
+PROFILER_EXPORT_KEY = pygame.K_F4
+PROFILER_HISTORY_FRAMES = 600
+PROFILER_CSV_FILE_PREFIX = "frame_profile"
+PROFILER_OVERLAY_POS = (10, 70)
+PROFILER_OVERLAY_WIDTH = 260  # fixed, so the cached dim box is not rebuilt whenever the stats change width
+FLIGHT_RECORDER_CAPACITY = 8192
+FLIGHT_RECORDER_DUMP_DIR = "flight_dumps"
+FLIGHT_RECORDER_DUMP_KEY = pygame.K_F5
+FLIGHT_RECORDER_ERROR_DUMP_INTERVAL_S = 30.0
+
+GAME_RECORD_ARCHIVE_FILE = "game_records.bin"
+SAVE_GAME_FILE = "savegame.bin"
+QUICK_SAVE_KEY = pygame.K_F6
+QUICK_LOAD_KEY = pygame.K_F9
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_MAX_GAMES = 10000
+SERVER_MAX_ACTIONS_PER_GAME = 600  # games that stall past this are ended as aborted
+SERVER_AI_WORKERS = None  # process pool size for AI turns; None = one per CPU
+SHARED_STATE_HAND_CAPACITY = 16
+SHARED_STATE_DECK_CAPACITY = len(STANDARD_DECK_COMPOSITION)
+SHARED_STATE_CARAVAN_CAPACITY = 32
+LANE_ODDS_MAX_PLAYS = 3  # plays ahead covered by the lane odds tables
+LANE_ODDS_CACHE_SIZE = 64  # tables kept, one per hand+deck card pool
+LANE_ODDS_HINT_KEY = pygame.K_F7
+LANE_ODDS_HINT_Y = PLAYER_CARAVAN_Y - 70
+OPENING_BOOK_FILE = "opening_book.bin"
+OPENING_BOOK_MIN_GAMES = 100  # games per policy before a book entry may override the default
+OPENING_BOOK_MIN_EDGE = 0.0  # lower confidence bound a policy's gain over highest-first must exceed
+OPENING_BOOK_CONFIDENCE_Z = 2.4  # about 2 sigma, widened for the three challengers tested per profile
+EVAL_CACHE_SLOTS = 1 << 20  # 32 bytes each; new files are sparse where the filesystem allows
+EVAL_CACHE_MAX_PROBES = 16
+VECTOR_ENV_MAX_STEPS = 200  # learner decisions per game before vector_env.py cuts it off as a draw
@@ -1,71 +1,209 @@
 # filename: debug.py
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
 import traceback
+from typing import Dict, List, Optional, TextIO
 
-DEBUG_MODE = True
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
 
-ENABLE_STARTUP_DEBUG = False
-ENABLE_GAME_EVENT_DEBUG = False
-ENABLE_AI_DEBUG = True
-ENABLE_ACTION_DEBUG = False
-ENABLE_UI_DEBUG = False
-ENABLE_WARNING_DEBUG = True
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+_LEVELS_BY_NAME = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
 
-def log_startup(message: str, *args):
-    if DEBUG_MODE and ENABLE_STARTUP_DEBUG:
-        if args:
-            print(f"[STARTUP] {message.format(*args)}")
+CHANNEL_STARTUP = "startup"
+CHANNEL_EVENT = "event"
+CHANNEL_AI = "ai"
+CHANNEL_ACTION = "action"
+CHANNEL_UI = "ui"
+CHANNEL_GENERAL = "general"
+
+DEFAULT_CHANNEL_LEVELS: Dict[str, int] = {
+    CHANNEL_STARTUP: WARNING,
+    CHANNEL_EVENT: WARNING,
+    CHANNEL_AI: DEBUG,
+    CHANNEL_ACTION: WARNING,
+    CHANNEL_UI: WARNING,
+    CHANNEL_GENERAL: WARNING,
+}
+
+# Per-channel thresholds; a record is emitted when its level is >= the channel's threshold.
+CHANNEL_LEVELS: Dict[str, int] = dict(DEFAULT_CHANNEL_LEVELS)
+
+_BATCH_SIZE = 256
+_STOP = object()
+
+class BufferedHandler:
+    """Writes formatted log lines to a stream from a background thread."""
+
+    def __init__(self, stream: TextIO, json_lines: bool = False):
+        self.stream = stream
+        self.json_lines = json_lines
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="debug-log-writer", daemon=True)
+        self._thread.start()
+
+    def format(self, created: float, level: int, channel: str, message: str, exc_text: Optional[str]) -> str:
+        if self.json_lines:
+            record = {"ts": round(created, 6), "level": LEVEL_NAMES.get(level, str(level)),
+                      "channel": channel, "msg": message}
+            if exc_text:
+                record["exc"] = exc_text
+            return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        tag = LEVEL_NAMES[level] if level >= WARNING else channel.upper()
+        line = f"[{tag}] {message}\n"
+        if exc_text:
+            line += exc_text if exc_text.endswith("\n") else exc_text + "\n"
+        return line
+
+    def emit(self, line: str):
+        self._queue.put(line)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch: List[str] = []
+            stop = item is _STOP
+            if not stop:
+                batch.append(item)
+            while not stop and len(batch) < _BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                try:
+                    self.stream.write("".join(batch))
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    pass
+            if stop:
+                return
+
+    def close(self, timeout: float = 2.0):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+_handler: Optional[BufferedHandler] = None
+_handler_lock = threading.Lock()
+_owned_stream: Optional[TextIO] = None
+
+def configure(levels: Optional[Dict[str, int]] = None, default_level: Optional[int] = None,
+              json_lines: bool = False, path: Optional[str] = None, stream: Optional[TextIO] = None):
+    """Sets channel thresholds and (re)creates the background handler.
+
+    ``path`` appends to a file; otherwise records go to ``stream`` (stdout by default).
+    """
+    global _handler, _owned_stream
+    if default_level is not None:
+        for channel in CHANNEL_LEVELS:
+            CHANNEL_LEVELS[channel] = default_level
+    if levels:
+        CHANNEL_LEVELS.update(levels)
+    with _handler_lock:
+        if _handler is not None:
+            _handler.close()
+        if _owned_stream is not None:
+            _owned_stream.close()
+            _owned_stream = None
+        if path:
+            _owned_stream = open(path, "a", encoding="utf-8")
+            stream = _owned_stream
+        _handler = BufferedHandler(stream or sys.stdout, json_lines=json_lines)
+
+def _default_handler() -> BufferedHandler:
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            _handler = BufferedHandler(sys.stdout)
+        return _handler
+
+def configure_from_env():
+    """Reads DECRYPT_LOG_LEVELS ("ai=warning,event=info" or "*=debug"),
+    DECRYPT_LOG_JSON and DECRYPT_LOG_FILE."""
+    levels: Dict[str, int] = {}
+    default_level: Optional[int] = None
+    for item in os.environ.get("DECRYPT_LOG_LEVELS", "").split(","):
+        channel, _, level_name = item.partition("=")
+        level = _LEVELS_BY_NAME.get(level_name.strip().lower())
+        if level is None:
+            continue
+        if channel.strip() == "*":
+            default_level = level
         else:
-            print(f"[STARTUP] {message}")
+            levels[channel.strip().lower()] = level
+    json_lines = os.environ.get("DECRYPT_LOG_JSON", "").lower() in ("1", "true", "yes")
+    configure(levels, default_level, json_lines=json_lines, path=os.environ.get("DECRYPT_LOG_FILE") or None)
+
+def shutdown():
+    global _handler
+    with _handler_lock:
+        if _handler is not None:
+            _handler.close()
+            _handler = None
+        if _owned_stream is not None:
+            _owned_stream.flush()
+
+def is_enabled(channel: str, level: int = DEBUG) -> bool:
+    return level >= CHANNEL_LEVELS.get(channel, WARNING)
+
+def log(channel: str, level: int, message: str, *args, include_traceback: bool = False):
+    if level < CHANNEL_LEVELS.get(channel, WARNING):
+        return
+    if args:
+        try:
+            message = message.format(*args)
+        except (IndexError, KeyError, ValueError) as e:
+            message = f"{message} {args!r} (format error: {e})"
+    exc_text = traceback.format_exc() if include_traceback else None
+    handler = _handler or _default_handler()
+    handler.emit(handler.format(time.time(), level, channel, message, exc_text))
+
+def log_startup(message: str, *args):
+    if INFO >= CHANNEL_LEVELS[CHANNEL_STARTUP]:
+        log(CHANNEL_STARTUP, INFO, message, *args)
 
 def log_event(message: str, *args):
-    if DEBUG_MODE and ENABLE_GAME_EVENT_DEBUG:
-        if args:
-            print(f"[EVENT] {message.format(*args)}")
-        else:
-            print(f"[EVENT] {message}")
+    if INFO >= CHANNEL_LEVELS[CHANNEL_EVENT]:
+        log(CHANNEL_EVENT, INFO, message, *args)
 
 def log_ai(message: str, *args):
-    if DEBUG_MODE and ENABLE_AI_DEBUG:
-        if args:
-            print(f"[AI] {message.format(*args)}")
-        else:
-            print(f"[AI] {message}")
+    if DEBUG >= CHANNEL_LEVELS[CHANNEL_AI]:
+        log(CHANNEL_AI, DEBUG, message, *args)
 
 def log_action(message: str, *args):
-    if DEBUG_MODE and ENABLE_ACTION_DEBUG:
-        if args:
-            print(f"[ACTION] {message.format(*args)}")
-        else:
-            print(f"[ACTION] {message}")
+    if DEBUG >= CHANNEL_LEVELS[CHANNEL_ACTION]:
+        log(CHANNEL_ACTION, DEBUG, message, *args)
 
 def log_ui(message: str, *args):
-    if DEBUG_MODE and ENABLE_UI_DEBUG:
-        if args:
-            print(f"[UI] {message.format(*args)}")
-        else:
-            print(f"[UI] {message}")
+    if DEBUG >= CHANNEL_LEVELS[CHANNEL_UI]:
+        log(CHANNEL_UI, DEBUG, message, *args)
 
 def log_warning(message: str, *args):
-    if DEBUG_MODE and ENABLE_WARNING_DEBUG:
-        if args:
-            print(f"[WARNING] {message.format(*args)}")
-        else:
-            print(f"[WARNING] {message}")
+    if WARNING >= CHANNEL_LEVELS[CHANNEL_GENERAL]:
+        log(CHANNEL_GENERAL, WARNING, message, *args)
 
 def log_error(message: str, *args, include_traceback: bool = False):
-    if args:
-        print(f"[ERROR] {message.format(*args)}")
-    else:
-        print(f"[ERROR] {message}")
-    if include_traceback:
-        traceback.print_exc()
+    log(CHANNEL_GENERAL, ERROR, message, *args, include_traceback=include_traceback)
 
 def print_deck_composition_check():
-    if DEBUG_MODE and ENABLE_STARTUP_DEBUG:
+    if is_enabled(CHANNEL_STARTUP, INFO):
         from config import STANDARD_DECK_COMPOSITION, NUMERIC_RANKS, FACE_RANKS, SPECIAL_RANKS, SUITS
         expected_deck_size = (len(NUMERIC_RANKS) * len(SUITS)) + \
                              (len(FACE_RANKS) * len(SUITS)) + \
-                             len(SPECIAL_RANKS) 
+                             len(SPECIAL_RANKS)
 
         actual_size = len(STANDARD_DECK_COMPOSITION)
         if actual_size != expected_deck_size:
@@ -78,4 +216,6 @@ def print_deck_composition_check():
             log_startup(
                 "Deck composition check passed: {} cards.",
                 actual_size
-            )
\ No newline at end of file
+            )
+
+atexit.register(shutdown)
@@ -0,0 +1,150 @@
+# filename: eval_cache.py
+import mmap
+import os
+import struct
+from typing import Optional
+
+import debug
+from config import EVAL_CACHE_SLOTS, EVAL_CACHE_MAX_PROBES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CACHE_MAGIC = b"CVEC"
+CACHE_VERSION = 1
+_HEADER = struct.Struct("<4sBxxxQ")
+# A slot is key_lo, key_hi, value and a check word. An all-zero key marks an
+# empty slot, so callers keep a nonzero kind tag in the top byte of key_hi.
+_SLOT = struct.Struct("<QQdQ")
+_SLOT_BITS = struct.Struct("<QQQQ")
+_CHECK_SALT = 0x5BD1E9955BD1E995
+_MASK64 = (1 << 64) - 1
+
+KIND_LANE_ODDS = 1
+
+class EvalCache:
+    """Persistent open-addressing hash table of evaluation results in a
+    memory-mapped file, shared by every process that opens the same path.
+
+    Reads take no lock: a slot is written value first and key last, and a
+    check word over key and value rejects a slot caught mid-write, which then
+    just reads as a miss. Writers serialize on a file lock, and a filled slot
+    is never overwritten, so entries only accumulate; once the probe window
+    for a key is full, new results for it are simply not stored.
+    """
+
+    def __init__(self, path: str, slots: int = EVAL_CACHE_SLOTS):
+        self.path = path
+        self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666), "r+b")
+        try:
+            with self._locked():
+                size = os.fstat(self._file.fileno()).st_size
+                if size == 0:
+                    self._file.seek(0)
+                    self._file.write(_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, slots))
+                    self._file.truncate(_HEADER.size + slots * _SLOT.size)  # sparse where supported
+                    self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE)
+        except Exception:
+            self._file.close()
+            raise
+        magic, version, self.slots = _HEADER.unpack_from(self._map, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or len(self._map) != _HEADER.size + self.slots * _SLOT.size:
+            self.close()
+            raise ValueError(f"{path} is not a compatible evaluation cache.")
+        self.hits = self.misses = self.stores = 0
+
+    def _locked(self) -> '_FileLock':
+        return _FileLock(self._file)
+
+    def _start_slot(self, key_lo: int, key_hi: int) -> int:
+        mixed = ((key_lo * 0x9E3779B97F4A7C15) ^ (key_hi * 0xC2B2AE3D27D4EB4F)) & _MASK64
+        return (mixed ^ (mixed >> 29)) % self.slots
+
+    def get(self, key_lo: int, key_hi: int) -> Optional[float]:
+        buf = self._map
+        slot = self._start_slot(key_lo, key_hi)
+        for _ in range(EVAL_CACHE_MAX_PROBES):
+            offset = _HEADER.size + slot * _SLOT.size
+            lo, hi, value_bits, check = _SLOT_BITS.unpack_from(buf, offset)
+            if lo == key_lo and hi == key_hi:
+                if check != lo ^ hi ^ value_bits ^ _CHECK_SALT:
+                    break
+                self.hits += 1
+                return _SLOT.unpack_from(buf, offset)[2]
+            if not (lo or hi):
+                break
+            slot = slot + 1 if slot + 1 < self.slots else 0
+        self.misses += 1
+        return None
+
+    def put(self, key_lo: int, key_hi: int, value: float) -> bool:
+        """Stores value under the key unless the key is already present or
+        its probe window is full; returns whether it was written."""
+        buf = self._map
+        slot = self._start_slot(key_lo, key_hi)
+        with self._locked():
+            for _ in range(EVAL_CACHE_MAX_PROBES):
+                offset = _HEADER.size + slot * _SLOT.size
+                lo, hi = _SLOT_BITS.unpack_from(buf, offset)[:2]
+                if lo == key_lo and hi == key_hi:
+                    return False
+                if not (lo or hi):
+                    entry = _SLOT.pack(key_lo, key_hi, value, 0)
+                    value_bits = _SLOT_BITS.unpack(entry)[2]
+                    buf[offset + 16:offset + 32] = entry[16:24] + \
+                        ((key_lo ^ key_hi ^ value_bits ^ _CHECK_SALT).to_bytes(8, "little"))
+                    buf[offset:offset + 16] = entry[:16]
+                    self.stores += 1
+                    return True
+                slot = slot + 1 if slot + 1 < self.slots else 0
+        return False
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+class _FileLock:
+    """Exclusive lock on a whole file (fcntl) or on its first byte (msvcrt)."""
+
+    def __init__(self, file):
+        self._fd = file.fileno()
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+_ACTIVE: Optional[EvalCache] = None
+
+def open_eval_cache(path: Optional[str]) -> Optional[EvalCache]:
+    """Makes the cache at path the one the AI consults in this process; None
+    (or a file that cannot be used) turns caching off."""
+    global _ACTIVE
+    if _ACTIVE is not None:
+        _ACTIVE.close()
+        _ACTIVE = None
+    if path:
+        try:
+            _ACTIVE = EvalCache(path)
+        except (OSError, ValueError) as e:
+            debug.log_error("Evaluation cache {} disabled: {}", path, e)
+    return _ACTIVE
+
+def active_eval_cache() -> Optional[EvalCache]:
+    return _ACTIVE
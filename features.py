@@ -0,0 +1,71 @@
+# filename: features.py
+from typing import List, TYPE_CHECKING
+
+from card_set import NUMERIC_MASK, RANK_MASKS
+from config import NUM_CARAVANS, CARAVAN_WIN_MIN, CARAVAN_WIN_MAX, HAND_SIZE_LIMIT
+
+if TYPE_CHECKING:
+    from game_state import GameState
+    from player import Player
+
+_LANE_FEATURES = (
+    "own_total", "opp_total", "own_cards", "opp_cards", "own_in_range", "opp_in_range",
+    "own_sold", "opp_sold", "own_gap_to_min", "own_direction_up", "own_direction_down",
+)
+_GLOBAL_FEATURES = (
+    "hand_size", "hand_numeric", "hand_jack", "hand_queen", "hand_king", "hand_numeric_value_sum",
+    "own_deck", "opp_hand_size", "opp_deck", "own_sold_count", "opp_sold_count", "turn_count",
+    "setup_phase",
+)
+
+STATE_FEATURE_NAMES: List[str] = [f"lane{lane}_{name}" for lane in range(NUM_CARAVANS) for name in _LANE_FEATURES]
+STATE_FEATURE_NAMES.extend(_GLOBAL_FEATURES)
+NUM_STATE_FEATURES = len(STATE_FEATURE_NAMES)
+
+def state_features(game_state: 'GameState', player: 'Player') -> List[float]:
+    """Fixed-length feature vector of the position as seen by player.
+
+    Only information the player can see is used: both boards, its own hand
+    and the opponent's hand/deck sizes.
+    """
+    opponent = game_state.get_opponent(player)
+    features: List[float] = []
+    own_sold_count = opp_sold_count = 0
+    for lane in range(NUM_CARAVANS):
+        own = player.caravans[lane]
+        opp = opponent.caravans[lane]
+        own_total, opp_total = own.total(), opp.total()
+        own_sold = game_state.is_caravan_sold_by_player(player, lane)
+        opp_sold = game_state.is_caravan_sold_by_player(opponent, lane)
+        own_sold_count += own_sold
+        opp_sold_count += opp_sold
+        features.extend((
+            own_total / CARAVAN_WIN_MAX,
+            opp_total / CARAVAN_WIN_MAX,
+            float(len(own.cards)),
+            float(len(opp.cards)),
+            1.0 if CARAVAN_WIN_MIN <= own_total <= CARAVAN_WIN_MAX else 0.0,
+            1.0 if CARAVAN_WIN_MIN <= opp_total <= CARAVAN_WIN_MAX else 0.0,
+            1.0 if own_sold else 0.0,
+            1.0 if opp_sold else 0.0,
+            (CARAVAN_WIN_MIN - own_total) / CARAVAN_WIN_MAX,
+            1.0 if own.direction == "up" else 0.0,
+            1.0 if own.direction == "down" else 0.0,
+        ))
+
+    hand = player.hand.card_set
+    numeric, numeric_value = hand.count(NUMERIC_MASK), hand.numeric_value_sum()
+    jacks, queens, kings = hand.count(RANK_MASKS["jack"]), hand.count(RANK_MASKS["queen"]), hand.count(RANK_MASKS["king"])
+    features.extend((
+        len(player.hand) / HAND_SIZE_LIMIT,
+        float(numeric), float(jacks), float(queens), float(kings),
+        numeric_value / CARAVAN_WIN_MAX,
+        float(len(player.deck)),
+        len(opponent.hand) / HAND_SIZE_LIMIT,
+        float(len(opponent.deck)),
+        float(own_sold_count),
+        float(opp_sold_count),
+        float(game_state.turn_count),
+        1.0 if game_state.is_setup_phase() else 0.0,
+    ))
+    return features
@@ -0,0 +1,169 @@
+# filename: flight_recorder.py
+import os
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+import debug
+from card import card_from_index, UNKNOWN_CARD_INDEX
+from config import FLIGHT_RECORDER_CAPACITY, FLIGHT_RECORDER_DUMP_DIR, FLIGHT_RECORDER_ERROR_DUMP_INTERVAL_S
+
+EVENT_ACTION = 1
+EVENT_TURN = 2
+EVENT_AI_DECISION = 3
+EVENT_AI_SETUP = 4
+
+EVENT_NAMES = {
+    EVENT_ACTION: "ACTION",
+    EVENT_TURN: "TURN",
+    EVENT_AI_DECISION: "AI",
+    EVENT_AI_SETUP: "AI_SETUP",
+}
+
+ACTION_TYPES = (
+    "unknown", "place_initial_card", "play_card", "discard_card", "discard_caravan",
+    "pass", "apply_bonus_point_effect", "cheat_deck_swap_and_play",
+)
+ACTION_TYPE_CODES = {name: code for code, name in enumerate(ACTION_TYPES)}
+
+_SHORT_MIN, _SHORT_MAX = -(1 << 15), (1 << 15) - 1
+
+def _short(value: Any) -> int:
+    """value if it fits an int16 column; anything else is recorded as -1, so
+    a malformed action can never make recording it raise."""
+    return value if isinstance(value, int) and _SHORT_MIN <= value <= _SHORT_MAX else -1
+
+def _action_code(action: Dict[str, Any]) -> int:
+    action_type = action.get("type")
+    return ACTION_TYPE_CODES.get(action_type, 0) if isinstance(action_type, str) else 0
+
+def _target_field(target_seat: int, caravan_index: Any) -> int:
+    caravan_index = _short(caravan_index)
+    return _short(target_seat * 16 + caravan_index) if caravan_index >= 0 else -1
+
+class FlightRecorder:
+    """Fixed-size ring buffer of recent game events stored in preallocated columns.
+
+    Recording an event writes a handful of integers into arrays; nothing is
+    formatted or allocated until the buffer is dumped.
+    """
+
+    def __init__(self, capacity: int = FLIGHT_RECORDER_CAPACITY):
+        self.enabled: bool = True
+        self.capacity = capacity
+        self._ts = array('d', bytes(8 * capacity))
+        self._kind = array('B', bytes(capacity))
+        self._seat = array('b', bytes(capacity))
+        self._f1 = array('h', bytes(2 * capacity))
+        self._f2 = array('h', bytes(2 * capacity))
+        self._f3 = array('h', bytes(2 * capacity))
+        self._f4 = array('h', bytes(2 * capacity))
+        self._value = array('f', bytes(4 * capacity))
+        self._count: int = 0
+        self._last_error_dump: float = 0.0
+        self._dump_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def clear(self):
+        self._count = 0
+
+    def record(self, kind: int, seat: int = -1, f1: int = 0, f2: int = 0, f3: int = 0, f4: int = 0,
+               value: float = 0.0):
+        if not self.enabled:
+            return
+        i = self._count % self.capacity
+        self._ts[i] = time.time()
+        self._kind[i] = kind
+        self._seat[i] = seat
+        self._f1[i] = f1
+        self._f2[i] = f2
+        self._f3[i] = f3
+        self._f4[i] = f4
+        self._value[i] = value
+        self._count += 1
+
+    def record_action(self, seat: int, action: Dict[str, Any], card_index: int, target_seat: int, success: bool):
+        if not self.enabled:
+            return
+        caravan_index = action.get("target_caravan_index", action.get("caravan_index", -1))
+        hand_index = action.get("card_index", action.get("card_from_hand_index", -1))
+        self.record(EVENT_ACTION, seat, _action_code(action), _short(hand_index),
+                    _short(card_index), _target_field(target_seat, caravan_index), 1.0 if success else 0.0)
+
+    def record_turn(self, from_seat: int, to_seat: int, round_number: int, question_popup: bool):
+        if not self.enabled:
+            return
+        self.record(EVENT_TURN, from_seat, to_seat, round_number, 1 if question_popup else 0)
+
+    def record_ai_decision(self, seat: int, action: Dict[str, Any], target_seat: int, score: float,
+                           num_candidates: int):
+        if not self.enabled:
+            return
+        caravan_index = action.get("target_caravan_index", action.get("caravan_index", -1))
+        self.record(EVENT_AI_DECISION, seat, _action_code(action),
+                    _short(action.get("card_index", -1)), _short(num_candidates),
+                    _target_field(target_seat, caravan_index), score)
+
+    def record_ai_setup(self, seat: int, hand_index: int, card_index: int):
+        if not self.enabled:
+            return
+        self.record(EVENT_AI_SETUP, seat, hand_index, card_index)
+
+    def _format_event(self, i: int) -> str:
+        kind = self._kind[i]
+        seat = self._seat[i]
+        f1, f2, f3, f4 = self._f1[i], self._f2[i], self._f3[i], self._f4[i]
+        stamp = time.strftime("%H:%M:%S", time.localtime(self._ts[i])) + f".{int(self._ts[i] * 1000) % 1000:03d}"
+        head = f"{stamp} {EVENT_NAMES.get(kind, str(kind)):<8} seat={seat}"
+        if kind == EVENT_ACTION:
+            target = "-" if f4 < 0 else f"p{f4 // 16}/c{f4 % 16}"
+            card = str(card_from_index(f3)) if f3 != UNKNOWN_CARD_INDEX and f3 >= 0 else "-"
+            outcome = "ok" if self._value[i] else "FAILED"
+            return f"{head} {ACTION_TYPES[f1] if f1 < len(ACTION_TYPES) else f1} hand={f2} card={card} target={target} {outcome}"
+        if kind == EVENT_TURN:
+            return f"{head} -> seat={f1} round={f2} question_popup={bool(f3)}"
+        if kind == EVENT_AI_DECISION:
+            target = "-" if f4 < 0 else f"p{f4 // 16}/c{f4 % 16}"
+            action_name = ACTION_TYPES[f1] if f1 < len(ACTION_TYPES) else f1
+            return f"{head} chose {action_name} hand={f2} target={target} score={self._value[i]:.1f} candidates={f3}"
+        if kind == EVENT_AI_SETUP:
+            return f"{head} hand={f1} card={card_from_index(f2) if f2 >= 0 else '-'}"
+        return f"{head} {f1} {f2} {f3} {f4} {self._value[i]}"
+
+    def lines(self) -> List[str]:
+        first = max(0, self._count - self.capacity)
+        return [f"#{seq} {self._format_event(seq % self.capacity)}" for seq in range(first, self._count)]
+
+    def dump(self, reason: str = "manual", directory: str = FLIGHT_RECORDER_DUMP_DIR) -> Optional[str]:
+        """Writes the buffered events, oldest first, to a timestamped file and returns its path."""
+        with self._dump_lock:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"flight_{time.strftime('%Y%m%d_%H%M%S')}_{reason}.log")
+                with open(path, "w", encoding="utf-8") as dump_file:
+                    dump_file.write(f"# flight recorder dump ({reason}): {len(self)} of {self._count} events\n")
+                    dump_file.write("\n".join(self.lines()))
+                    dump_file.write("\n")
+            except OSError as e:
+                debug.log_error("Flight recorder dump failed: {}", e)
+                return None
+        debug.log_warning("Flight recorder dumped {} events to {}", len(self), path)
+        return path
+
+    def dump_on_error(self, reason: str = "error") -> Optional[str]:
+        now = time.monotonic()
+        if not self.enabled or now - self._last_error_dump < FLIGHT_RECORDER_ERROR_DUMP_INTERVAL_S:
+            return None
+        self._last_error_dump = now
+        return self.dump(reason)
+
+def seat_of(players: Sequence[Any], player: Any) -> int:
+    for seat, candidate in enumerate(players):
+        if candidate is player:
+            return seat
+    return -1
+
+RECORDER = FlightRecorder()
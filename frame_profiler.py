@@ -0,0 +1,133 @@
+# filename: frame_profiler.py
+import csv
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+MAIN_LOOP_PHASES = ("events", "update", "input", "ai", "draw", "overlay", "flip")
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+class FrameProfiler:
+    """Per-phase frame timings for the main loop, kept in a fixed-size history.
+
+    Every hook starts with an ``enabled`` check, so a disabled profiler costs a
+    method call per phase and allocates nothing.
+    """
+
+    def __init__(self, phases: Sequence[str] = MAIN_LOOP_PHASES, history_frames: int = 600):
+        self.enabled: bool = False
+        self.phases = tuple(phases)
+        self._phase_slots: Dict[str, int] = {name: i for i, name in enumerate(self.phases)}
+        self.history_frames = history_frames
+        self._frame_ms = array('d', bytes(8 * history_frames))
+        self._work_ms = array('d', bytes(8 * history_frames))
+        self._phase_ms = [array('d', bytes(8 * history_frames)) for _ in self.phases]
+        self._current = [0.0] * len(self.phases)
+        self._frames_recorded: int = 0
+        self._frame_start: float = 0.0
+        self._lap_start: float = 0.0
+        self._prev_frame_start: float = 0.0
+        self._partial_frame: bool = False
+        self._summary: Optional[Dict[str, float]] = None
+
+    def set_enabled(self, enabled: bool):
+        if enabled and not self.enabled:
+            # Enabling usually happens mid-frame, after begin_frame() has
+            # returned early, so that frame's timings are dropped.
+            self.reset()
+            self._frame_start = self._lap_start = time.perf_counter()
+            self._partial_frame = True
+        self.enabled = enabled
+
+    def toggle(self) -> bool:
+        self.set_enabled(not self.enabled)
+        return self.enabled
+
+    def reset(self):
+        self._frames_recorded = 0
+        self._prev_frame_start = 0.0
+        self._summary = None
+        for i in range(len(self._current)):
+            self._current[i] = 0.0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._frame_start = now
+        self._lap_start = now
+
+    def lap(self, phase: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        slot = self._phase_slots.get(phase)
+        if slot is not None:
+            self._current[slot] += (now - self._lap_start) * 1000.0
+        self._lap_start = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        if self._partial_frame:
+            self._partial_frame = False
+            for i in range(len(self._current)):
+                self._current[i] = 0.0
+            return
+        now = time.perf_counter()
+        pos = self._frames_recorded % self.history_frames
+        self._work_ms[pos] = (now - self._frame_start) * 1000.0
+        if self._prev_frame_start:
+            self._frame_ms[pos] = (self._frame_start - self._prev_frame_start) * 1000.0
+        else:
+            self._frame_ms[pos] = self._work_ms[pos]
+        self._prev_frame_start = self._frame_start
+        for i, value in enumerate(self._current):
+            self._phase_ms[i][pos] = value
+            self._current[i] = 0.0
+        self._frames_recorded += 1
+        if self._frames_recorded % 30 == 0:
+            self._summary = None
+
+    def _ordered(self, column: array) -> List[float]:
+        count = min(self._frames_recorded, self.history_frames)
+        if self._frames_recorded <= self.history_frames:
+            return list(column[:count])
+        start = self._frames_recorded % self.history_frames
+        return list(column[start:]) + list(column[:start])
+
+    def summary(self) -> Dict[str, float]:
+        """FPS, frame/work percentiles and per-phase mean/p99, refreshed every 30 frames."""
+        if self._summary is not None:
+            return self._summary
+        frames = sorted(self._ordered(self._frame_ms))
+        work = sorted(self._ordered(self._work_ms))
+        stats: Dict[str, float] = {"frames": float(len(frames))}
+        mean_frame = sum(frames) / len(frames) if frames else 0.0
+        stats["fps"] = 1000.0 / mean_frame if mean_frame > 0 else 0.0
+        for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            stats[f"frame_{label}"] = percentile(frames, fraction)
+            stats[f"work_{label}"] = percentile(work, fraction)
+        for i, phase in enumerate(self.phases):
+            values = sorted(self._ordered(self._phase_ms[i]))
+            stats[f"{phase}_mean"] = sum(values) / len(values) if values else 0.0
+            stats[f"{phase}_p99"] = percentile(values, 0.99)
+        self._summary = stats
+        return stats
+
+    def export_csv(self, path: str) -> int:
+        """Writes one row per recorded frame in the history window; returns the row count."""
+        columns = [self._ordered(self._frame_ms), self._ordered(self._work_ms)]
+        columns.extend(self._ordered(phase_column) for phase_column in self._phase_ms)
+        first_frame = max(0, self._frames_recorded - self.history_frames)
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["frame", "frame_ms", "work_ms"] + [f"{phase}_ms" for phase in self.phases])
+            for row_idx, row in enumerate(zip(*columns)):
+                writer.writerow([first_frame + row_idx] + [f"{value:.4f}" for value in row])
+        return len(columns[0])
@@ -1,27 +1,73 @@
 # filename: game_actions.py
-from card import Card
+from card import Card, CARD_INDEX_BY_KEY, UNKNOWN_CARD_INDEX
 from caravan import Caravan
 from player import Player
+from rules import RulesVariant
 import debug
-import random
-from typing import Dict, Any, TYPE_CHECKING
+from flight_recorder import RECORDER, seat_of
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from game_state import GameState
 
 class GameActions:
-    def __init__(self, game_state: 'GameState'):
+    def __init__(self, game_state: 'GameState', rules: Optional[RulesVariant] = None):
+        """rules defaults to the game's own; its face effects are compiled into
+        the special card handler table here, once per game."""
         self.game_state = game_state
+        self.rules: RulesVariant = rules or game_state.rules
+        self._special_handlers = {rank: self._EFFECT_HANDLERS[effect] for rank, effect in self.rules.face_effects.items()}
+        self.last_auto_passed: Optional[Player] = None
+        self.setup_just_completed: bool = False
+
+    def execute_turn(self, player: Player, action: Dict[str, Any]) -> bool:
+        """Executes an action and advances the game the way a completed move does.
+
+        Ends the setup phase once every caravan is started, moves to the next
+        player and auto-passes for a next player who has no legal moves
+        (recorded in last_auto_passed).
+        """
+        self.last_auto_passed = None
+        self.setup_just_completed = False
+        if not self.execute_action(player, action):
+            return False
+        game_state = self.game_state
+        if game_state.check_game_over():
+            return True
+        action_ends_turn = True
+        if game_state.is_setup_phase():
+            if all(all(c.cards for c in p_iter.caravans) for p_iter in game_state.players):
+                game_state.complete_setup_phase()
+                self.setup_just_completed = True
+                action_ends_turn = False
+        if action_ends_turn and not game_state.game_over:
+            game_state.next_turn()
+            next_player = game_state.get_current_player()
+            if next_player and game_state.is_player_stuck(next_player) and not game_state.game_over:
+                debug.log_event("{} has no moves! Turn automatically passed.", next_player.name)
+                if self.execute_action(next_player, {"type": "pass"}):
+                    self.last_auto_passed = next_player
+                    if game_state.check_game_over():
+                        return True
+                    game_state.next_turn()
+        return True
 
     def execute_action(self, player: Player, action: Dict[str, Any]) -> bool:
         action_type = action.get("type")
         success = False
         should_draw_card = True
 
+        if RECORDER.enabled:
+            recorded_card = self._recorded_card_index(player, action)
+
         if not player or player not in self.game_state.players:
+            if RECORDER.enabled:
+                self._record_action(player, action, recorded_card, False)
             return False
         if player != self.game_state.get_current_player() and action_type not in ["apply_bonus_point_effect", "cheat_deck_swap_and_play"]:
             if not (action_type == "apply_bonus_point_effect" and player == self.game_state.player_awarded_bonus):
+                if RECORDER.enabled:
+                    self._record_action(player, action, recorded_card, False)
                 return False
 
         try:
@@ -48,15 +94,84 @@ class GameActions:
                 debug.log_warning("Unknown action type received: {}", action_type)
 
         except Exception as e:
-            debug.log_error(f"Error executing action {action_type} for {player.name}: {e}", include_traceback=True)
+            debug.log_error("Error executing action {} for {}: {}", action_type, player.name, e, include_traceback=True)
             success = False
+            if RECORDER.enabled:
+                self._record_action(player, action, recorded_card, False)
+                RECORDER.dump_on_error("action_error")
+                return success
 
         if success:
             if should_draw_card:
-                if not player.draw_card():
+                if not player.draw_card() and player.hand:
                     self.game_state.track_played_card(player.hand[-1])
+        if RECORDER.enabled:
+            self._record_action(player, action, recorded_card, success)
         return success
 
+    def get_legal_actions(self, player: Player) -> List[Dict[str, Any]]:
+        """Every action execute_action would accept from player right now."""
+        game_state = self.game_state
+        opponent = game_state.get_opponent(player)
+        if game_state.awaiting_bonus_point_placement:
+            if player is not game_state.player_awarded_bonus:
+                return []
+            return [{"type": "apply_bonus_point_effect", "target_player": target, "target_caravan_index": i}
+                    for target in (player, opponent) for i in range(len(target.caravans))]
+        if player is not game_state.get_current_player():
+            return []
+
+        actions: List[Dict[str, Any]] = []
+        if game_state.is_setup_phase():
+            for card_index, card in enumerate(player.hand):
+                if card.is_numeric():
+                    actions.extend({"type": "place_initial_card", "card_index": card_index, "caravan_index": i}
+                                   for i, caravan in enumerate(player.caravans) if not caravan.cards)
+            actions.append({"type": "pass"})
+            return actions
+
+        # Sold flags and face card targets do not change while the hand is
+        # enumerated, so they are worked out once per caravan (face targets
+        # only if the hand holds a face card).
+        own_open = [(i, caravan) for i, caravan in enumerate(player.caravans)
+                    if not game_state.is_caravan_sold_by_player(player, i)]
+        face_targets: Optional[List[tuple]] = None
+        for card_index, card in enumerate(player.hand):
+            if card.is_numeric():
+                for i, caravan in own_open:
+                    if caravan.can_add_numeric(card):
+                        actions.append({"type": "play_card", "card_index": card_index, "target_player": player,
+                                        "target_caravan_index": i})
+            elif card.is_face_card() and card.rank in self._special_handlers:
+                needs_numeric = self.rules.face_needs_numeric[card.rank]
+                if face_targets is None:
+                    face_targets = [(target, i, caravan.get_last_numeric_card_info()[0] is not None)
+                                    for target in (player, opponent) for i, caravan in enumerate(target.caravans)
+                                    if caravan.cards and not game_state.is_caravan_sold_by_player(target, i)]
+                for target, i, has_numeric in face_targets:
+                    if has_numeric or not needs_numeric:
+                        actions.append({"type": "play_card", "card_index": card_index, "target_player": target,
+                                        "target_caravan_index": i})
+            actions.append({"type": "discard_card", "card_index": card_index})
+        for i, caravan in own_open:
+            if caravan.cards:
+                actions.append({"type": "discard_caravan", "caravan_index": i})
+        actions.append({"type": "pass"})
+        return actions
+
+    def _recorded_card_index(self, player: Player, action: Dict[str, Any]) -> int:
+        if action.get("type") == "apply_bonus_point_effect":
+            return CARD_INDEX_BY_KEY[('bonus_point', '')]
+        card_index = action.get("card_index", -1)
+        if player and isinstance(card_index, int) and 0 <= card_index < len(player.hand):
+            return player.hand[card_index].index
+        return UNKNOWN_CARD_INDEX
+
+    def _record_action(self, player: Player, action: Dict[str, Any], card_index: int, success: bool):
+        players = self.game_state.players
+        RECORDER.record_action(seat_of(players, player), action, card_index,
+                               seat_of(players, action.get("target_player", player)), success)
+
     def _execute_place_initial(self, player: Player, action: Dict[str, Any]) -> bool:
         card_index = action.get("card_index", -1)
         caravan_index = action.get("caravan_index", -1)
@@ -152,19 +267,19 @@ class GameActions:
 
         player.hand.append(card_from_deck)
         player.deck.append(card_from_hand) # Put it on top of the deck
-        random.shuffle(player.deck) # Then shuffle to be fair-ish
+        self.game_state.rng.shuffle(player.deck) # Then shuffle to be fair-ish
 
         play_action = action.get("play_action")
         if not play_action: return False
 
         play_action["card_index"] = len(player.hand) - 1 # The new card is always at the end
 
-        debug.log_ai(f"CHEAT: Swapped {card_from_hand} with {card_from_deck} from deck.")
+        debug.log_ai("CHEAT: Swapped {} with {} from deck.", card_from_hand, card_from_deck)
 
         return self.execute_action(player, play_action)
 
     def _handle_special_card(self, player: Player, card_index: int, card: Card, target_player: Player, target_caravan: Caravan) -> bool:
-        handler = self._SPECIAL_HANDLERS.get(card.rank)
+        handler = self._special_handlers.get(card.rank)
         if handler and handler(self, player, card_index, card, target_player, target_caravan):
             popped_card = player.hand.pop(card_index)
             self.game_state.track_played_card(popped_card)
@@ -191,6 +306,13 @@ class GameActions:
             return True
         return False
 
+    def _handle_queen_suit(self, player: Player, card_index: int, card_obj: Card, target_player: Player, target_caravan: Caravan) -> bool:
+        if target_caravan.cards and card_obj.suit:
+            target_caravan.suit = card_obj.suit
+            target_caravan._invalidate_cache()
+            return True
+        return False
+
     def _handle_king(self, player: Player, card_index: int, card_obj: Card, target_player: Player, target_caravan: Caravan) -> bool:
         _, last_num_idx = target_caravan.get_last_numeric_card_info()
         if last_num_idx != -1:
@@ -201,8 +323,38 @@ class GameActions:
             return True
         return False
 
-    _SPECIAL_HANDLERS = {
-        "jack": _handle_jack,
-        "queen": _handle_queen,
-        "king": _handle_king,
+    def _handle_joker(self, player: Player, card_index: int, card_obj: Card, target_player: Player, target_caravan: Caravan) -> bool:
+        last_num_card, last_num_idx = target_caravan.get_last_numeric_card_info()
+        if last_num_card is None:
+            return False
+        insert_pos = last_num_idx + 1
+        while insert_pos < len(target_caravan.cards) and target_caravan.cards[insert_pos].is_face_card():
+            insert_pos += 1
+        target_caravan._add_special_card_raw(card_obj, target_index=insert_pos)
+        value = last_num_card.value
+        for table_player in self.game_state.players:
+            for caravan in table_player.caravans:
+                kept: List[Card] = []
+                removing = False
+                for card in caravan.cards:
+                    if card.is_numeric():
+                        removing = card.value == value and card is not last_num_card
+                    if removing:
+                        self.game_state.track_played_card(card)
+                    else:
+                        kept.append(card)
+                if len(kept) != len(caravan.cards):
+                    caravan.cards = kept
+                    caravan._update_state_after_removal()
+        return True
+
+    # Effect names from rules.FACE_EFFECTS; both king effects attach the
+    # same way and differ only in RulesVariant.king_factors.
+    _EFFECT_HANDLERS = {
+        "remove_last": _handle_jack,
+        "reverse": _handle_queen,
+        "suit": _handle_queen_suit,
+        "double": _handle_king,
+        "add": _handle_king,
+        "remove_value": _handle_joker,
     }
\ No newline at end of file
@@ -0,0 +1,97 @@
+# filename: game_client.py
+import asyncio
+import itertools
+import json
+import random
+from typing import Any, Dict, Optional
+
+from config import SERVER_HOST, SERVER_PORT
+
+class GameClient:
+    """Minimal asyncio client for game_server. Requests are tagged with a
+    "req" id so several games can be played over one connection at once."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._req_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task = asyncio.create_task(self._read_replies())
+
+    @classmethod
+    async def connect(cls, host: str = SERVER_HOST, port: int = SERVER_PORT) -> 'GameClient':
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _read_replies(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self._pending.pop(reply.get("req"), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to game server closed."))
+            self._pending.clear()
+
+    async def request(self, op: str, **fields: Any) -> Dict[str, Any]:
+        req_id = next(self._req_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        self.writer.write(json.dumps({"op": op, "req": req_id, **fields}, separators=(",", ":")).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def new_game(self, ai_difficulty: int = 0, seed: Optional[int] = None, questions: bool = True) -> Dict[str, Any]:
+        return await self.request("new", ai_difficulty=ai_difficulty, seed=seed, questions=questions)
+
+    async def act(self, game_id: int, code: int) -> Dict[str, Any]:
+        return await self.request("act", game=game_id, code=code)
+
+    async def answer(self, game_id: int, option: int) -> Dict[str, Any]:
+        return await self.request("answer", game=game_id, option=option)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._reader_task.cancel()
+
+async def play_random_game(client: GameClient, rng: random.Random, ai_difficulty: int = 0,
+                           seed: Optional[int] = None, questions: bool = True, max_requests: int = 2000,
+                           on_reply=None) -> Dict[str, Any]:
+    """Plays one game with uniformly random legal moves, trying question
+    options in order until one is right. on_reply(op, seconds) is called
+    after every request. Returns the final state message."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    state = await client.new_game(ai_difficulty, seed, questions)
+    if on_reply:
+        on_reply("new", loop.time() - started)
+    next_option = 0
+    for _ in range(max_requests):
+        if state.get("op") == "error" or state.get("game_over"):
+            break
+        started = loop.time()
+        if "question" in state:
+            state = await client.answer(state["game"], next_option)
+            next_option = 0 if state.get("correct") else next_option + 1
+            op = "answer"
+        elif state.get("legal"):
+            state = await client.act(state["game"], rng.choice(state["legal"]))
+            op = "act"
+        else:
+            state = await client.request("state", game=state["game"])
+            op = "state"
+        if on_reply:
+            on_reply(op, loop.time() - started)
+    if "game" in state:
+        await client.request("close", game=state["game"])
+    return state
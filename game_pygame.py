@@ -1,13 +1,24 @@
 # filename: game_pygame.py
+import os
+import sqlite3
+import time
 import pygame
 import debug
+from flight_recorder import RECORDER, seat_of
 from game_state import GameState
+from game_snapshot import SnapshotError
 from game_actions import GameActions
+from game_record import GameRecord, append_to_archive
+from ai_profile import AIProfile, load_ai_profile_if_present
+from ai_strategies import AIStrategy
+from question_bank import QuestionProgressStore, QuestionScheduler, get_question_bank
+from answer_analytics import AnswerAnalytics
 from config import (
     AI_PAUSE_DURATION_MS, CARD_ANIMATION_DURATION_MS,
     DECK_POS_OPPONENT,
     CARAVAN_START_X, CARAVAN_SPACING, SCALED_CARD_WIDTH, SCALED_CARD_HEIGHT,
-    OPPONENT_CARAVAN_Y, PLAYER_CARAVAN_Y, CARAVAN_CARD_Y_OFFSET
+    OPPONENT_CARAVAN_Y, PLAYER_CARAVAN_Y, CARAVAN_CARD_Y_OFFSET,
+    GAME_RECORD_ARCHIVE_FILE, AI_PROFILE_FILE, QUESTION_PROGRESS_FILE, ANSWER_ANALYTICS_FILE, SAVE_GAME_FILE
 )
 from player import Player
 from card import Card
@@ -22,19 +33,58 @@ class GameController:
         self._message: Optional[str] = None
         self._message_timer: int = 0
         self.animation_details: Optional[Dict[str, Any]] = None
+        self.game_record: Optional[GameRecord] = None
+        self.ai_profile: Optional[AIProfile] = load_ai_profile_if_present(AI_PROFILE_FILE)
+        self.question_store = QuestionProgressStore(QUESTION_PROGRESS_FILE)
+        self.answer_analytics: Optional[AnswerAnalytics] = None
 
-    def start_new_game(self, ai_difficulty: int = 0):
+    def _question_scheduler_for_game(self) -> QuestionScheduler:
+        human_player = self.game_state.players[0]
+        return self.question_store.scheduler_for(get_question_bank(), human_player.name, seed=self.game_state.seed)
+
+    def answer_question(self, option_index: int) -> bool:
+        """Checks an answer to the open question and appends it to the answer analytics log."""
+        game_state = self.game_state
+        if not game_state or not game_state.question_popup_active or not game_state.current_question_data:
+            return False
+        question = game_state.current_question_data
+        correct = game_state.answer_current_question(option_index)
+        latency_ms = int((time.monotonic() - game_state.question_opened_at) * 1000)
         try:
-            self.game_state = GameState(ai_player_difficulty=ai_difficulty)
+            if self.answer_analytics is None:
+                self.answer_analytics = AnswerAnalytics(ANSWER_ANALYTICS_FILE)
+            self.answer_analytics.record_answer(game_state.get_current_player().name, question, option_index, correct,
+                                                latency_ms, game_state.turn_count, game_state.question_attempts)
+        except sqlite3.Error as e:
+            debug.log_error("Failed to log answer to {}: {}", ANSWER_ANALYTICS_FILE, e)
+        return correct
+
+    def shutdown(self):
+        """Closes the answer analytics connection, which checkpoints its WAL
+        so the -wal/-shm files are removed."""
+        if self.answer_analytics is not None:
+            try:
+                self.answer_analytics.close()
+            except sqlite3.Error as e:
+                debug.log_error("Failed to close {}: {}", ANSWER_ANALYTICS_FILE, e)
+            self.answer_analytics = None
+
+    def start_new_game(self, ai_difficulty: int = 0, strategies: Optional[List[Union[str, AIStrategy, None]]] = None):
+        try:
+            self.game_state = GameState(ai_player_difficulty=ai_difficulty, ai_profile=self.ai_profile,
+                                        strategies=strategies,
+                                        question_scheduler_factory=self._question_scheduler_for_game)
             self.game_actions = GameActions(self.game_state)
             self.game_state.start_game()
         except Exception as e:
-            debug.log_error(f"FATAL: Could not initialize GameState/GameActions: {e}", include_traceback=True)
+            debug.log_error("FATAL: Could not initialize GameState/GameActions: {}", e, include_traceback=True)
             self.game_state = None
             self.game_actions = None
+            self.game_record = None
             self.set_message("Error: Game failed to initialize!", 10000)
             return
 
+        self.game_record = GameRecord(self.game_state.seed, ai_difficulty=ai_difficulty)
         self.ai_thinking_start_time = 0
         self.pending_ai_action = None
         self.animation_details = None
@@ -46,6 +96,42 @@ class GameController:
         else:
             self.set_message("Game Ready. Error in getting first player.", 2000)
 
+    def save_game(self, path: str = SAVE_GAME_FILE) -> bool:
+        if not self.game_state or self.animation_details:
+            return False
+        tmp_path = path + ".tmp"
+        try:
+            data = self.game_state.to_bytes()
+            with open(tmp_path, "wb") as save_file:
+                save_file.write(data)
+            os.replace(tmp_path, path)
+        except (OSError, SnapshotError) as e:
+            debug.log_error("Failed to save game to {}: {}", path, e)
+            return False
+        debug.log_event("Game saved to {}.", path)
+        return True
+
+    def load_game(self, path: str = SAVE_GAME_FILE) -> bool:
+        """Replaces the current game with a saved snapshot. A loaded game is not
+        added to the record archive, since its record would lack the moves
+        played before the save."""
+        try:
+            with open(path, "rb") as save_file:
+                game_state = GameState.from_bytes(save_file.read(), ai_profile=self.ai_profile,
+                                                  question_scheduler_factory=self._question_scheduler_for_game)
+        except (OSError, SnapshotError) as e:
+            debug.log_error("Failed to load game from {}: {}", path, e)
+            return False
+        game_state.question_opened_at = time.monotonic()
+        self.game_state = game_state
+        self.game_actions = GameActions(game_state)
+        self.game_record = None
+        self.ai_thinking_start_time = 0
+        self.pending_ai_action = None
+        self.animation_details = None
+        debug.log_event("Game loaded from {}.", path)
+        return True
+
     def set_message(self, text: Optional[str], duration_ms: int = 2000):
         self._message = text
         self._message_timer = duration_ms if text else 0
@@ -156,33 +242,29 @@ class GameController:
 
     def execute_validated_action(self, player: Player, action: Dict[str, Any]) -> bool:
         if not self.game_state or not self.game_actions: return False
-        action_was_successful = self.game_actions.execute_action(player, action)
-        if action_was_successful:
-            if self.game_state.check_game_over():
-                return True
-            action_ends_turn = True
-            if self.game_state.is_setup_phase():
-                all_players_setup_done = all(all(c.cards for c in p_iter.caravans) for p_iter in self.game_state.players)
-                if all_players_setup_done:
-                    self.game_state.complete_setup_phase()
-                    next_player_after_setup = self.game_state.get_current_player()
-                    if next_player_after_setup:
-                         self.set_message(f"Setup Complete! {next_player_after_setup.name} starts.", 2500)
-                    action_ends_turn = False
-            if action_ends_turn and not self.game_state.game_over:
-                self.game_state.next_turn()
-                next_player = self.game_state.get_current_player()
-                if next_player and self.is_player_stuck(next_player) and not self.game_state.game_over:
-                    stuck_msg = f"{next_player.name} has no moves! Turn automatically passed."
-                    self.set_message(stuck_msg, 2500)
-                    debug.log_event(stuck_msg)
-                    pass_success = self.game_actions.execute_action(next_player, {"type": "pass"})
-                    if pass_success:
-                        if self.game_state.check_game_over(): return True
-                        self.game_state.next_turn()
-            return True
-        else:
+        if not self.game_actions.execute_turn(player, action):
             return False
+        if self.game_record is not None:
+            self.game_record.append(player, action)
+        if self.game_state.game_over:
+            self._archive_game_record()
+            return True
+        if self.game_actions.setup_just_completed:
+            next_player_after_setup = self.game_state.get_current_player()
+            if next_player_after_setup:
+                 self.set_message(f"Setup Complete! {next_player_after_setup.name} starts.", 2500)
+        if self.game_actions.last_auto_passed:
+            self.set_message(f"{self.game_actions.last_auto_passed.name} has no moves! Turn automatically passed.", 2500)
+        return True
+
+    def _archive_game_record(self):
+        if self.game_record is None:
+            return
+        record, self.game_record = self.game_record, None
+        try:
+            append_to_archive(GAME_RECORD_ARCHIVE_FILE, record)
+        except OSError as e:
+            debug.log_error("Failed to archive game record to {}: {}", GAME_RECORD_ARCHIVE_FILE, e)
 
     def run_ai_turn(self):
         if (not self.game_state or not self.game_actions or self.game_state.game_over or
@@ -214,18 +296,13 @@ class GameController:
             if current_time - self.ai_thinking_start_time >= AI_PAUSE_DURATION_MS:
                 chosen_action: Optional[Dict[str, Any]] = None
                 if self.game_state.is_setup_phase():
-                    card_idx = ai_player.get_ai_initial_card()
-                    if card_idx != -1:
-                        empty_caravan_idx = next((i for i, c in enumerate(ai_player.caravans) if not c.cards), -1)
-                        if empty_caravan_idx != -1:
-                            chosen_action = {
-                                "type": "place_initial_card", "card_index": card_idx,
-                                "caravan_index": empty_caravan_idx,
-                            }
-                        else: chosen_action = {"type": "pass"}
-                    else: chosen_action = {"type": "pass"}
+                    chosen_action = ai_player.strategy.choose_setup_action(ai_player, self.game_state, AI_PAUSE_DURATION_MS)
+                    if RECORDER.enabled:
+                        card_idx = chosen_action.get("card_index", -1)
+                        RECORDER.record_ai_setup(seat_of(self.game_state.players, ai_player), card_idx,
+                                                 ai_player.hand[card_idx].index if card_idx != -1 else -1)
                 else:
-                    chosen_action = ai_player.get_ai_action(self.game_state)
+                    chosen_action = ai_player.strategy.choose_action(ai_player, self.game_state, AI_PAUSE_DURATION_MS)
                     if chosen_action is None: chosen_action = {"type": "pass"}
                 self.pending_ai_action = chosen_action
                 self.ai_thinking_start_time = 0
@@ -264,16 +341,6 @@ class GameController:
                 self.execute_validated_action(ai_player, action_to_execute)
 
     def is_player_stuck(self, player: Player) -> bool:
-        if not self.game_state or not player:
+        if not self.game_state:
             return True
-        if player.hand:
-            return False
-        if player.deck:
-            return False
-        can_discard_any_caravan = any(
-            caravan.cards and not self.game_state.is_caravan_sold_by_anyone(player, i)
-            for i, caravan in enumerate(player.caravans)
-        )
-        if can_discard_any_caravan:
-            return False
-        return True
\ No newline at end of file
+        return self.game_state.is_player_stuck(player)
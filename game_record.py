@@ -0,0 +1,192 @@
+# filename: game_record.py
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import debug
+from config import HAND_SIZE_LIMIT, NUM_CARAVANS
+
+if TYPE_CHECKING:
+    from player import Player
+    from headless import HeadlessGame
+
+ARCHIVE_MAGIC = b"CVR"
+ARCHIVE_VERSION = 1
+RECORD_FLAG_QUESTIONS = 0x01
+
+# Record layout: flags (1 byte), AI difficulty (1 byte), deck/question seed
+# (uint32 LE), varint action count, then one byte per action code.
+_RECORD_HEADER = struct.Struct("<BBI")
+
+# Every action a player can take maps to a single byte. Target players are
+# stored relative to the acting player: 0 = own caravans, 1 = opponent's.
+ACTION_TABLE: List[Tuple] = []
+for _hand_idx in range(HAND_SIZE_LIMIT):
+    for _caravan_idx in range(NUM_CARAVANS):
+        ACTION_TABLE.append(("place_initial_card", _hand_idx, 0, _caravan_idx))
+for _hand_idx in range(HAND_SIZE_LIMIT):
+    for _target in (0, 1):
+        for _caravan_idx in range(NUM_CARAVANS):
+            ACTION_TABLE.append(("play_card", _hand_idx, _target, _caravan_idx))
+for _hand_idx in range(HAND_SIZE_LIMIT):
+    ACTION_TABLE.append(("discard_card", _hand_idx, 0, -1))
+for _caravan_idx in range(NUM_CARAVANS):
+    ACTION_TABLE.append(("discard_caravan", -1, 0, _caravan_idx))
+ACTION_TABLE.append(("pass", -1, 0, -1))
+for _target in (0, 1):
+    for _caravan_idx in range(NUM_CARAVANS):
+        ACTION_TABLE.append(("apply_bonus_point_effect", -1, _target, _caravan_idx))
+for _hand_idx in range(HAND_SIZE_LIMIT):
+    for _target in (0, 1):
+        for _caravan_idx in range(NUM_CARAVANS):
+            ACTION_TABLE.append(("cheat_deck_swap_and_play", _hand_idx, _target, _caravan_idx))
+ACTION_CODES: Dict[Tuple, int] = {entry: code for code, entry in enumerate(ACTION_TABLE)}
+assert len(ACTION_TABLE) <= 256, "Action table no longer fits in one byte per action."
+
+class ReplayError(ValueError):
+    pass
+
+def encode_action(player: 'Player', action: Dict[str, Any]) -> Optional[int]:
+    action_type = action.get("type")
+    target = 0 if action.get("target_player", player) is player else 1
+    if action_type == "place_initial_card":
+        key = (action_type, action.get("card_index", -1), 0, action.get("caravan_index", -1))
+    elif action_type == "play_card":
+        key = (action_type, action.get("card_index", -1), target, action.get("target_caravan_index", -1))
+    elif action_type == "discard_card":
+        key = (action_type, action.get("card_index", -1), 0, -1)
+    elif action_type == "discard_caravan":
+        key = (action_type, -1, 0, action.get("caravan_index", -1))
+    elif action_type == "pass":
+        key = (action_type, -1, 0, -1)
+    elif action_type == "apply_bonus_point_effect":
+        key = (action_type, -1, target, action.get("target_caravan_index", -1))
+    elif action_type == "cheat_deck_swap_and_play":
+        play_action = action.get("play_action") or {}
+        target = 0 if play_action.get("target_player", player) is player else 1
+        key = (action_type, action.get("card_from_hand_index", -1), target,
+               play_action.get("target_caravan_index", -1))
+    else:
+        return None
+    return ACTION_CODES.get(key)
+
+def decode_action(code: int, player: 'Player', opponent: 'Player') -> Dict[str, Any]:
+    if not 0 <= code < len(ACTION_TABLE):
+        raise ReplayError(f"Unknown action code {code}.")
+    action_type, hand_idx, target, caravan_idx = ACTION_TABLE[code]
+    target_player = player if target == 0 else opponent
+    if action_type == "place_initial_card":
+        return {"type": action_type, "card_index": hand_idx, "caravan_index": caravan_idx}
+    if action_type == "play_card":
+        return {"type": action_type, "card_index": hand_idx, "target_player": target_player,
+                "target_caravan_index": caravan_idx}
+    if action_type == "discard_card":
+        return {"type": action_type, "card_index": hand_idx}
+    if action_type == "discard_caravan":
+        return {"type": action_type, "caravan_index": caravan_idx}
+    if action_type == "apply_bonus_point_effect":
+        return {"type": action_type, "target_player": target_player, "target_caravan_index": caravan_idx}
+    if action_type == "cheat_deck_swap_and_play":
+        play_action = {"type": "play_card", "card_index": -1, "target_player": target_player,
+                       "target_caravan_index": caravan_idx}
+        return {"type": action_type, "card_from_hand_index": hand_idx, "play_action": play_action}
+    return {"type": action_type}
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value, shift = 0, 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("Truncated varint in game record.")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class GameRecord:
+    """A finished or in-progress game: the seed that dealt both decks and the
+    questions, plus one byte per successful action."""
+
+    def __init__(self, seed: int, ai_difficulty: int = 0, questions: bool = True, codes: bytes = b""):
+        self.seed = seed & 0xFFFFFFFF
+        self.ai_difficulty = ai_difficulty
+        self.questions = questions
+        self.codes = bytearray(codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return (self.seed, self.ai_difficulty, self.questions, self.codes) == \
+               (other.seed, other.ai_difficulty, other.questions, other.codes)
+
+    def append(self, player: 'Player', action: Dict[str, Any]) -> bool:
+        code = encode_action(player, action)
+        if code is None:
+            debug.log_warning("Game record cannot encode action {}; record will not replay.", action)
+            return False
+        self.codes.append(code)
+        return True
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(_RECORD_HEADER.pack(RECORD_FLAG_QUESTIONS if self.questions else 0,
+                                            self.ai_difficulty, self.seed))
+        _write_varint(out, len(self.codes))
+        out += self.codes
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, offset: int = 0) -> Tuple['GameRecord', int]:
+        """Parses one record starting at offset; returns it with the offset just past it."""
+        if offset + _RECORD_HEADER.size > len(data):
+            raise ReplayError("Truncated game record header.")
+        flags, ai_difficulty, seed = _RECORD_HEADER.unpack_from(data, offset)
+        count, offset = _read_varint(data, offset + _RECORD_HEADER.size)
+        if offset + count > len(data):
+            raise ReplayError("Truncated game record actions.")
+        record = cls(seed, ai_difficulty, bool(flags & RECORD_FLAG_QUESTIONS), data[offset:offset + count])
+        return record, offset + count
+
+def write_archive(path: str, records: Sequence[GameRecord]):
+    with open(path, "wb") as archive:
+        archive.write(ARCHIVE_MAGIC + bytes([ARCHIVE_VERSION]))
+        archive.write(b"".join(record.to_bytes() for record in records))
+
+def append_to_archive(path: str, record: GameRecord):
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "ab") as archive:
+        if is_new:
+            archive.write(ARCHIVE_MAGIC + bytes([ARCHIVE_VERSION]))
+        archive.write(record.to_bytes())
+
+def read_archive(path: str) -> Iterator[GameRecord]:
+    with open(path, "rb") as archive:
+        data = archive.read()
+    header_size = len(ARCHIVE_MAGIC) + 1
+    if data[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC or len(data) < header_size:
+        raise ReplayError(f"{path} is not a game record archive.")
+    if data[len(ARCHIVE_MAGIC)] != ARCHIVE_VERSION:
+        raise ReplayError(f"Unsupported game record archive version {data[len(ARCHIVE_MAGIC)]}.")
+    offset = header_size
+    while offset < len(data):
+        record, offset = GameRecord.from_bytes(data, offset)
+        yield record
+
+def replay(record: GameRecord, upto: Optional[int] = None) -> 'HeadlessGame':
+    """Rebuilds the position after the first ``upto`` actions (all by default)."""
+    from headless import HeadlessGame
+    game = HeadlessGame(seed=record.seed, ai_difficulty=record.ai_difficulty, questions=record.questions)
+    codes = record.codes if upto is None else record.codes[:upto]
+    for move_number, code in enumerate(codes):
+        if not game.step(game.decode(code)):
+            raise ReplayError(f"Action #{move_number} ({ACTION_TABLE[code][0]}) is not legal in the replayed position.")
+    return game
@@ -0,0 +1,352 @@
+# filename: game_server.py
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import debug
+from flight_recorder import RECORDER
+from game_record import ACTION_TABLE, ReplayError, encode_action
+from game_state import GameState
+from headless import HeadlessGame
+from shared_state import SharedStateBuffer, SharedStateError, attach
+from config import (
+    SERVER_HOST, SERVER_PORT, SERVER_MAX_GAMES, SERVER_MAX_ACTIONS_PER_GAME, SERVER_AI_WORKERS,
+)
+
+# Protocol: one JSON object per line in each direction. Requests may carry a
+# "req" value, which is echoed in the reply. Actions are the one-byte codes of
+# game_record.ACTION_TABLE, sent by "hello" as "actions".
+#   {"op": "hello"}                                     -> welcome
+#   {"op": "new", "ai_difficulty": 0, "seed": null, "questions": true} -> state
+#   {"op": "act", "game": id, "code": c}                -> state (after any AI turns)
+#   {"op": "answer", "game": id, "option": i}           -> state with "correct"
+#   {"op": "state", "game": id}                         -> state
+#   {"op": "close", "game": id}                         -> closed
+# Errors reply {"op": "error", "error": "..."}. The client always plays seat 0.
+
+HUMAN_SEAT = 0
+PASS_CODE = ACTION_TABLE.index(("pass", -1, 0, -1))
+
+def _init_worker():
+    debug.configure(default_level=debug.ERROR)
+    RECORDER.enabled = False
+
+def choose_ai_code(snapshot: bytes, ai_difficulty: int) -> int:
+    """Rebuilds a game from a GameState snapshot and returns the acting AI's
+    move as an action code. Runs in a worker process."""
+    game = HeadlessGame(ai_difficulty=ai_difficulty, game_state=GameState.from_bytes(snapshot))
+    return _ai_code(game)
+
+def choose_ai_code_shared(buffer_name: str, slot: int, ai_difficulty: int) -> int:
+    """Like choose_ai_code, reading the game from a SharedStateBuffer slot."""
+    game = HeadlessGame(ai_difficulty=ai_difficulty, game_state=attach(buffer_name).read(slot))
+    return _ai_code(game)
+
+def _ai_code(game: HeadlessGame) -> int:
+    player = game.acting_player()
+    code = encode_action(player, game.choose_ai_action())
+    return PASS_CODE if code is None else code
+
+class ServerGame:
+    def __init__(self, game_id: int, seed: Optional[int], ai_difficulty: int, questions: bool,
+                 slot: Optional[int] = None):
+        self.game_id = game_id
+        self.slot = slot  # SharedStateBuffer slot mirroring this game, if any
+        self.ai_difficulty = ai_difficulty
+        self.game = HeadlessGame(seed=seed, ai_difficulty=ai_difficulty, questions=questions)
+        self.lock = asyncio.Lock()
+        self.aborted = False
+        self.closed = False
+
+    @property
+    def game_state(self):
+        return self.game.game_state
+
+    def human_to_act(self) -> bool:
+        player = self.game.acting_player()
+        return player is not None and not player.is_ai
+
+    def legal_codes(self) -> List[int]:
+        game_state = self.game_state
+        human = game_state.players[HUMAN_SEAT]
+        if game_state.game_over or game_state.question_popup_active or not self.human_to_act():
+            return []
+        codes = {encode_action(human, action) for action in self.game.game_actions.get_legal_actions(human)}
+        codes.discard(None)
+        return sorted(codes)
+
+    def to_message(self) -> Dict[str, Any]:
+        game_state = self.game_state
+        human = game_state.players[HUMAN_SEAT]
+        opponent = game_state.get_opponent(human)
+        winner = None
+        if game_state.game_over and game_state.winner is not None:
+            winner = "you" if game_state.winner is human else "opponent"
+        message = {
+            "op": "state",
+            "game": self.game_id,
+            "round": game_state.turn_count,
+            "setup": game_state.is_setup_phase(),
+            "your_turn": self.human_to_act() and not game_state.game_over,
+            "hand": [card.index for card in human.hand],
+            "deck_size": len(human.deck),
+            "caravans": [[card.index for card in caravan.cards] for caravan in human.caravans],
+            "opponent_hand_size": len(opponent.hand),
+            "opponent_deck_size": len(opponent.deck),
+            "opponent_caravans": [[card.index for card in caravan.cards] for caravan in opponent.caravans],
+            "legal": self.legal_codes(),
+            "bonus": game_state.awaiting_bonus_point_placement and game_state.player_awarded_bonus is human,
+            "game_over": game_state.game_over or self.aborted,
+            "aborted": self.aborted,
+            "winner": winner,
+        }
+        question = game_state.current_question_data
+        if game_state.question_popup_active and question:
+            message["question"] = {"id": question["id"], "question": question["question"],
+                                   "options": question["options"]}
+        return message
+
+class GameServer:
+    """Hosts many concurrent games on one asyncio event loop.
+
+    Rules updates for the client's own moves are cheap and run on the loop.
+    AI moves run in a process pool. Each game is mirrored in a slot of a
+    SharedStateBuffer, updated before every AI move, and the worker is sent
+    just the slot number; it rebuilds the position from shared memory and
+    returns an action code, so no game objects cross process boundaries.
+    Games without a slot, or too large for one, send a GameState snapshot
+    instead. Neither carries the RNG state, which AI choices never draw from.
+    Each game has a lock, so requests for different games interleave freely
+    while each game stays sequential; a game's slot is only released under
+    its lock, once no AI move for it is in flight.
+    """
+
+    def __init__(self, ai_workers: Optional[int] = SERVER_AI_WORKERS, max_games: int = SERVER_MAX_GAMES):
+        self.max_games = max_games
+        self.games: Dict[int, ServerGame] = {}
+        self._game_ids = itertools.count(1)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.shared_state: Optional[SharedStateBuffer] = None
+        if ai_workers != 0:
+            self.shared_state = SharedStateBuffer(max_games)
+            self.pool = ProcessPoolExecutor(max_workers=ai_workers or os.cpu_count() or 1, initializer=_init_worker)
+        self.games_started = 0
+        self.games_finished = 0
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self, host: str = SERVER_HOST, port: int = SERVER_PORT) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        debug.log_event("Game server listening on {}", ", ".join(str(s.getsockname()) for s in server.sockets))
+        return server
+
+    async def shutdown(self):
+        """Closes every client connection, waits for their handlers and stops the AI pool."""
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*self._connections.values(), return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        if self.shared_state is not None:
+            self.shared_state.close()
+            self.shared_state = None
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections[writer] = asyncio.current_task()
+        owned: Dict[int, ServerGame] = {}
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request: Dict[str, Any]):
+            reply = await self.handle_request(request, owned)
+            if "req" in request:
+                reply["req"] = request["req"]
+            async with write_lock:
+                writer.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be an object")
+                except ValueError as e:
+                    request = {"op": "invalid", "error": str(e)}
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            for game in list(owned.values()):
+                await self._close_game(game)
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def handle_request(self, request: Dict[str, Any], owned: Dict[int, ServerGame]) -> Dict[str, Any]:
+        op = request.get("op")
+        try:
+            if op == "hello":
+                return {"op": "welcome", "actions": [list(entry) for entry in ACTION_TABLE],
+                        "games": len(self.games)}
+            if op == "new":
+                return await self._new_game(request, owned)
+            if op == "invalid":
+                return {"op": "error", "error": f"Bad request: {request.get('error')}"}
+            game = owned.get(request.get("game"))
+            if game is None:
+                return {"op": "error", "error": f"No game {request.get('game')!r} on this connection."}
+            if op == "close":
+                owned.pop(game.game_id, None)
+                await self._close_game(game)
+                return {"op": "closed", "game": game.game_id}
+            async with game.lock:
+                if game.closed:
+                    return {"op": "error", "error": f"No game {game.game_id!r} on this connection."}
+                if op == "state":
+                    return game.to_message()
+                if op == "act":
+                    return await self._act(game, request.get("code"))
+                if op == "answer":
+                    return self._answer(game, request.get("option"))
+            return {"op": "error", "error": f"Unknown op {op!r}."}
+        except Exception as e:
+            debug.log_error("Game server request {} failed: {}", op, e, include_traceback=True)
+            return {"op": "error", "error": f"Internal error handling {op!r}."}
+
+    async def _new_game(self, request: Dict[str, Any], owned: Dict[int, ServerGame]) -> Dict[str, Any]:
+        if len(self.games) >= self.max_games:
+            return {"op": "error", "error": "Server is full."}
+        seed = request.get("seed")
+        ai_difficulty = request.get("ai_difficulty", 0)
+        questions = request.get("questions", True)
+        if not isinstance(ai_difficulty, int) or isinstance(ai_difficulty, bool) or not 0 <= ai_difficulty <= 255:
+            return {"op": "error", "error": "Bad request: ai_difficulty must be an integer from 0 to 255."}
+        if not isinstance(questions, bool):
+            return {"op": "error", "error": "Bad request: questions must be true or false."}
+        slot = self.shared_state.acquire() if self.shared_state is not None else None
+        try:
+            game = ServerGame(next(self._game_ids), seed if isinstance(seed, int) else None, ai_difficulty,
+                              questions, slot)
+        except Exception:
+            if slot is not None:
+                self.shared_state.release(slot)
+            raise
+        self.games[game.game_id] = game
+        owned[game.game_id] = game
+        self.games_started += 1
+        async with game.lock:
+            await self._run_ai_turns(game)
+            return game.to_message()
+
+    async def _close_game(self, game: ServerGame):
+        """Stops the game's AI turns and waits for any in flight before its
+        shared state slot is released."""
+        game.closed = True
+        async with game.lock:
+            self._remove_game(game.game_id)
+
+    def _remove_game(self, game_id: int):
+        game = self.games.pop(game_id, None)
+        if game is not None and game.slot is not None and self.shared_state is not None:
+            self.shared_state.release(game.slot)
+
+    async def _act(self, game: ServerGame, code: Any) -> Dict[str, Any]:
+        game_state = game.game_state
+        if game_state.game_over or game.aborted:
+            return {"op": "error", "game": game.game_id, "error": "Game is over."}
+        if not game.human_to_act() or game_state.question_popup_active:
+            return {"op": "error", "game": game.game_id, "error": "Not your move."}
+        if not isinstance(code, int):
+            return {"op": "error", "game": game.game_id, "error": "Action code must be an integer."}
+        try:
+            action = game.game.decode(code)
+        except ReplayError as e:
+            return {"op": "error", "game": game.game_id, "error": str(e)}
+        if not game.game.step(action):
+            return {"op": "error", "game": game.game_id, "error": f"Illegal action {code}."}
+        await self._run_ai_turns(game)
+        return game.to_message()
+
+    def _answer(self, game: ServerGame, option: Any) -> Dict[str, Any]:
+        game_state = game.game_state
+        if not game_state.question_popup_active:
+            return {"op": "error", "game": game.game_id, "error": "No question is open."}
+        if not isinstance(option, int):
+            return {"op": "error", "game": game.game_id, "error": "Option must be an integer."}
+        correct = game_state.answer_current_question(option)
+        if correct:
+            game_state.question_answered_correctly_this_popup = True
+            game_state.next_turn()
+        message = game.to_message()
+        message["correct"] = correct
+        return message
+
+    async def _run_ai_turns(self, game: ServerGame):
+        loop = asyncio.get_running_loop()
+        game_state = game.game_state
+        while not game.closed and not game_state.game_over and not game.human_to_act():
+            if len(game.game.record) >= SERVER_MAX_ACTIONS_PER_GAME:
+                game.aborted = True
+                break
+            if self.pool is None:
+                action = game.game.choose_ai_action()
+            else:
+                code = await loop.run_in_executor(self.pool, *self._ai_job(game))
+                if game.closed:
+                    break
+                action = game.game.decode(code)
+            if not game.game.step(action) and not game.game.step({"type": "pass"}):
+                game.aborted = True
+                break
+        if (game_state.game_over or game.aborted) and not game.closed:
+            self.games_finished += 1
+
+    def _ai_job(self, game: ServerGame) -> tuple:
+        if game.slot is not None:
+            try:
+                self.shared_state.write(game.slot, game.game_state)
+                return choose_ai_code_shared, self.shared_state.name, game.slot, game.ai_difficulty
+            except SharedStateError as e:
+                debug.log_warning("Game {} does not fit its shared state slot ({}); sending a snapshot.", game.game_id, e)
+        return choose_ai_code, game.game_state.to_bytes(include_rng=False), game.ai_difficulty
+
+async def serve(host: str, port: int, ai_workers: Optional[int]):
+    # The flight recorder has one ring for the whole process, and seats of
+    # concurrent games cannot be told apart in it, so it is off here as in
+    # the AI workers.
+    RECORDER.enabled = False
+    game_server = GameServer(ai_workers)
+    server = await game_server.start(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await game_server.shutdown()
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Host many Caravan games over a JSON-lines TCP protocol.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--ai-workers", type=int, default=SERVER_AI_WORKERS,
+                        help="Processes for AI turns (0 runs them on the event loop, for debugging).")
+    args = parser.parse_args(argv)
+
+    debug.configure(default_level=debug.WARNING)
+    try:
+        asyncio.run(serve(args.host, args.port, args.ai_workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
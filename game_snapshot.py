@@ -0,0 +1,229 @@
+# filename: game_snapshot.py
+import struct
+from array import array
+from typing import Any, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from card import Card, NUM_CARD_INDICES, card_from_index
+from caravan import Caravan
+from config import SUITS
+
+if TYPE_CHECKING:
+    from game_state import GameState
+    from player import Player
+
+SNAPSHOT_MAGIC = b"CVS"
+SNAPSHOT_VERSION = 1
+
+# Flag bits of the snapshot header.
+FLAG_RNG = 1 << 0
+FLAG_QUESTIONS_ENABLED = 1 << 1
+FLAG_SETUP_PHASE = 1 << 2
+FLAG_GAME_OVER = 1 << 3
+FLAG_QUESTION_POPUP = 1 << 4
+FLAG_QUESTION_ANSWERED = 1 << 5
+FLAG_QUESTION_FIRST_ATTEMPT = 1 << 6
+FLAG_AWAITING_BONUS = 1 << 7
+FLAG_HUMAN_AWAITING_MOVE = 1 << 8
+
+NO_SEAT = 255
+NO_QUESTION = -1
+DIRECTIONS = (None, "up", "down")
+CARAVAN_SUITS = (None,) + tuple(SUITS)
+
+# Layout, little-endian: magic, version (B), flags (H), seed (I), current
+# player (B), round (H), winner seat (B), bonus seat (B), question id (i),
+# question attempts (B), unseen-card bitmask (Q); then per player: name
+# length (B) + UTF-8 name, is_ai (B), AI difficulty (B), hand, deck, caravan
+# count (B) and per caravan direction (B), suit (B), cards. Card lists are a
+# length byte followed by one Card.index byte per card. With FLAG_RNG the
+# Mersenne Twister state follows as 625 uint32 plus an optional gauss double.
+_HEADER = struct.Struct("<3sBHIBHBBiBQ")
+_RNG_WORDS = 625
+assert array('I').itemsize == 4, "Snapshot RNG layout needs 32-bit array('I')."
+
+class SnapshotError(ValueError):
+    pass
+
+def _new_card(index: int) -> Card:
+    if not 0 <= index < NUM_CARD_INDICES:
+        raise SnapshotError(f"Unknown card index {index}.")
+    return card_from_index(index)
+
+def _write_cards(out: bytearray, cards: List[Card]):
+    if len(cards) > 255:
+        raise SnapshotError("Too many cards in one pile for a snapshot.")
+    out.append(len(cards))
+    out += bytes(card.index for card in cards)
+
+def cards_from_indices(indices: Sequence[int]) -> List[Card]:
+    return [_new_card(index) for index in indices]
+
+def _read_cards(data: bytes, offset: int) -> Tuple[List[Card], int]:
+    count = data[offset]
+    end = offset + 1 + count
+    if end > len(data):
+        raise SnapshotError("Snapshot is truncated.")
+    return cards_from_indices(data[offset + 1:end]), end
+
+def _read_byte(data: bytes, offset: int) -> int:
+    if offset >= len(data):
+        raise SnapshotError("Snapshot is truncated.")
+    return data[offset]
+
+def _seat(game_state: 'GameState', player: Optional['Player']) -> int:
+    return game_state.players.index(player) if player in game_state.players else NO_SEAT
+
+def snapshot_header_fields(game_state: 'GameState', include_rng: bool = True) -> Tuple[int, ...]:
+    """(flags, seed, current player, round, winner seat, bonus seat, question id,
+    question attempts, unseen-card bitmask) as stored after magic and version."""
+    flags = 0
+    if include_rng:
+        flags |= FLAG_RNG
+    for flag, enabled in ((FLAG_QUESTIONS_ENABLED, game_state.questions_enabled),
+                          (FLAG_SETUP_PHASE, game_state.is_setup_phase()),
+                          (FLAG_GAME_OVER, game_state.game_over),
+                          (FLAG_QUESTION_POPUP, game_state.question_popup_active),
+                          (FLAG_QUESTION_ANSWERED, game_state.question_answered_correctly_this_popup),
+                          (FLAG_QUESTION_FIRST_ATTEMPT, game_state.question_first_attempt_pending),
+                          (FLAG_AWAITING_BONUS, game_state.awaiting_bonus_point_placement),
+                          (FLAG_HUMAN_AWAITING_MOVE, game_state.human_player_awaiting_move_after_question)):
+        if enabled:
+            flags |= flag
+    unseen_mask = game_state.unseen.mask
+    question = game_state.current_question_data
+    return (flags, game_state.seed & 0xFFFFFFFF, game_state.current_player_index,
+            min(game_state.turn_count, 0xFFFF), _seat(game_state, game_state.winner),
+            _seat(game_state, game_state.player_awarded_bonus),
+            question["id"] if question else NO_QUESTION, min(game_state.question_attempts, 255), unseen_mask)
+
+def encode_game_state(game_state: 'GameState', include_rng: bool = True) -> bytes:
+    """Raises SnapshotError for a game under non-standard rules, since the
+    layout does not record the rules variant."""
+    if not game_state.rules.is_standard:
+        raise SnapshotError(f"Snapshots hold standard rules only, not {game_state.rules!r}.")
+    out = bytearray(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, *snapshot_header_fields(game_state, include_rng)))
+    out.append(len(game_state.players))
+    for player in game_state.players:
+        name = player.name.encode("utf-8")[:255]
+        out.append(len(name))
+        out += name
+        out.append(1 if player.is_ai else 0)
+        out.append(player.ai_difficulty & 0xFF)
+        _write_cards(out, player.hand)
+        _write_cards(out, player.deck)
+        out.append(len(player.caravans))
+        for caravan in player.caravans:
+            out.append(DIRECTIONS.index(caravan.direction))
+            out.append(CARAVAN_SUITS.index(caravan.suit))
+            _write_cards(out, caravan.cards)
+    if include_rng:
+        version, internal_state, gauss_next = game_state.rng.getstate()
+        out += array('I', internal_state).tobytes()
+        out += struct.pack("<Bd", gauss_next is not None, gauss_next or 0.0)
+    return bytes(out)
+
+def decode_game_state(data: bytes, **game_state_kwargs: Any) -> 'GameState':
+    """Builds a GameState from encode_game_state output. Keyword arguments go
+    to the GameState constructor (ai_profile, strategies, question scheduler),
+    since snapshots carry only the rules state. Snapshots are always of the
+    standard rules, so a non-standard rules= raises SnapshotError."""
+    rules = game_state_kwargs.get("rules")
+    if rules is not None and not rules.is_standard:
+        raise SnapshotError(f"Snapshots hold standard rules only, not {rules!r}.")
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Snapshot is truncated.")
+    magic, version, *header_fields = _HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not a game snapshot.")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}.")
+    offset = _HEADER.size
+    num_players = _read_byte(data, offset)
+    offset += 1
+    players_data = []
+    for _ in range(num_players):
+        name_length = _read_byte(data, offset)
+        name = data[offset + 1:offset + 1 + name_length].decode("utf-8")
+        offset += 1 + name_length
+        is_ai, ai_difficulty = _read_byte(data, offset), _read_byte(data, offset + 1)
+        offset += 2
+        hand, offset = _read_cards(data, offset)
+        deck, offset = _read_cards(data, offset)
+        num_caravans = _read_byte(data, offset)
+        offset += 1
+        caravans = []
+        for _ in range(num_caravans):
+            direction, suit = _read_byte(data, offset), _read_byte(data, offset + 1)
+            cards, offset = _read_cards(data, offset + 2)
+            caravans.append((direction, suit, cards))
+        players_data.append((name, bool(is_ai), ai_difficulty, hand, deck, caravans))
+
+    rng_state = None
+    if header_fields[0] & FLAG_RNG:
+        end = offset + _RNG_WORDS * 4 + 9
+        if end > len(data):
+            raise SnapshotError("Snapshot is truncated.")
+        words = array('I')
+        words.frombytes(data[offset:offset + _RNG_WORDS * 4])
+        has_gauss, gauss_next = struct.unpack_from("<Bd", data, offset + _RNG_WORDS * 4)
+        rng_state = (3, tuple(words), gauss_next if has_gauss else None)
+        offset = end
+    if offset != len(data):
+        raise SnapshotError("Unexpected trailing bytes in snapshot.")
+
+    game_state = restore_game_state(header_fields, players_data, **game_state_kwargs)
+    if rng_state is not None:
+        game_state.rng.setstate(rng_state)
+    return game_state
+
+def restore_game_state(header_fields: Sequence[int], players_data: Sequence[tuple],
+                       **game_state_kwargs: Any) -> 'GameState':
+    """Builds a GameState from snapshot_header_fields() values and per-seat
+    (name, is_ai, ai_difficulty, hand, deck, [(direction, suit, cards)]) tuples,
+    where direction and suit are indices into DIRECTIONS and CARAVAN_SUITS."""
+    from game_state import GameState
+
+    (flags, seed, current_player_index, turn_count, winner_seat, bonus_seat,
+     question_id, question_attempts, unseen_mask) = header_fields
+    num_players = len(players_data)
+    if num_players != 2 or [p[1] for p in players_data] != [False, True]:
+        raise SnapshotError("Snapshots must hold one human seat followed by one AI seat.")
+
+    game_state_kwargs.setdefault("questions_enabled", bool(flags & FLAG_QUESTIONS_ENABLED))
+    game_state = GameState(player1_name=players_data[0][0], player2_name=players_data[1][0],
+                           ai_player_difficulty=players_data[1][2], seed=seed,
+                           decks=[p[4] for p in players_data], **game_state_kwargs)
+    for player, (_, _, ai_difficulty, hand, _, caravans_data) in zip(game_state.players, players_data):
+        player.ai_difficulty = ai_difficulty
+        player.hand = hand
+        caravans = []
+        for direction, suit, cards in caravans_data:
+            if direction >= len(DIRECTIONS) or suit >= len(CARAVAN_SUITS):
+                raise SnapshotError("Unknown caravan direction or suit.")
+            caravan = Caravan(game_state.rules)
+            caravan.cards = cards
+            caravan.direction = DIRECTIONS[direction]
+            caravan.suit = CARAVAN_SUITS[suit]
+            caravans.append(caravan)
+        player.caravans = caravans
+
+    game_state.current_player_index = current_player_index
+    game_state.turn_count = turn_count
+    game_state._setup_phase = bool(flags & FLAG_SETUP_PHASE)
+    game_state.game_over = bool(flags & FLAG_GAME_OVER)
+    game_state.winner = game_state.players[winner_seat] if winner_seat < num_players else None
+    game_state.player_awarded_bonus = game_state.players[bonus_seat] if bonus_seat < num_players else None
+    game_state.awaiting_bonus_point_placement = bool(flags & FLAG_AWAITING_BONUS)
+    game_state.human_player_awaiting_move_after_question = bool(flags & FLAG_HUMAN_AWAITING_MOVE)
+    game_state.question_answered_correctly_this_popup = bool(flags & FLAG_QUESTION_ANSWERED)
+    game_state.question_first_attempt_pending = bool(flags & FLAG_QUESTION_FIRST_ATTEMPT)
+    game_state.question_attempts = question_attempts
+    game_state.question_popup_active = bool(flags & FLAG_QUESTION_POPUP)
+    if question_id != NO_QUESTION:
+        from question_bank import get_question_bank
+        game_state.current_question_data = get_question_bank().get(question_id)
+        if game_state.current_question_data is None:
+            game_state.question_popup_active = False
+    game_state._master_card_list = [_new_card(index) for index in game_state.rules.deck_indices] * 2
+    game_state.unseen_cards = {_new_card(index) for index in range(NUM_CARD_INDICES) if unseen_mask >> index & 1}
+    return game_state
@@ -1,37 +1,57 @@
 # filename: game_state.py
 import random
+import time
 import debug
-from card import Card
+from flight_recorder import RECORDER
+from card import Card, card_from_index
+from card_set import CardSet
 from player import Player
+from ai_profile import AIProfile
+from ai_strategies import AIStrategy, HeuristicStrategy, create_strategy
 from caravan import Caravan
-from config import (
-    STARTING_HAND_SIZE,
-    NUM_CARAVANS,
-    WINNING_CARAVANS_NEEDED,
-    STANDARD_DECK_COMPOSITION,
-)
-from blurb import ALL_QUESTIONS_DATA
-from typing import List, Dict, Optional, Set
+from rules import RulesVariant, STANDARD_RULES
+from config import AI_STRATEGY
+from question_bank import QuestionScheduler, get_question_bank
+from game_snapshot import encode_game_state, decode_game_state
+from typing import Callable, List, Dict, Optional, Sequence, Set, Union
 
 class GameState:
-    def __init__(self, player1_name="Player 1", player2_name="AI Player", ai_player_difficulty: int = 0):
+    def __init__(self, player1_name="Player 1", player2_name="AI Player", ai_player_difficulty: int = 0,
+                 seed: Optional[int] = None, ai_profile: Optional[AIProfile] = None,
+                 strategies: Optional[Sequence[Union[str, AIStrategy, None]]] = None,
+                 questions_enabled: bool = True, question_scheduler: Optional[QuestionScheduler] = None,
+                 question_scheduler_factory: Optional[Callable[[], QuestionScheduler]] = None,
+                 decks: Optional[Sequence[List[Card]]] = None, rules: Optional[RulesVariant] = None):
+        self.rules: RulesVariant = rules or STANDARD_RULES
+        self._num_caravans: int = self.rules.num_caravans
+        self._winning_caravans_needed: int = self.rules.winning_caravans_needed
+        self.seed: int = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
         self.players: List[Player] = []
         try:
-            p1 = Player(player1_name, is_ai=False)
-            p2 = Player(player2_name, is_ai=True, ai_difficulty=ai_player_difficulty)
+            p1 = Player(player1_name, is_ai=False, deck=decks[0] if decks else None, rules=self.rules)
+            p2 = Player(player2_name, is_ai=True, ai_difficulty=ai_player_difficulty, ai_profile=ai_profile,
+                        deck=decks[1] if decks else None, rules=self.rules)
             self.players = [p1, p2]
-            if not p1.deck or not p2.deck:
+            for seat, player in enumerate(self.players):
+                strategy = strategies[seat] if strategies and seat < len(strategies) else None
+                self.set_strategy(player, strategy)
+            if not decks and (not p1.deck or not p2.deck):
                  raise ValueError("Player deck creation failed during GameState init.")
         except Exception as e:
-             debug.log_error(f"FATAL ERROR during Player/Deck initialization: {e}", include_traceback=True)
+             debug.log_error("FATAL ERROR during Player/Deck initialization: {}", e, include_traceback=True)
 
         self.current_player_index: int = 0
         self.turn_count: int = 0
         self.game_over: bool = False
         self.winner: Optional[Player] = None
         self._setup_phase: bool = True
-        self.all_questions: List[Dict] = []
-        self.current_question_index: int = -1
+        self.questions_enabled: bool = questions_enabled
+        self.question_scheduler: Optional[QuestionScheduler] = question_scheduler
+        self.question_scheduler_factory = question_scheduler_factory
+        self.question_first_attempt_pending: bool = False
+        self.question_attempts: int = 0
+        self.question_opened_at: float = 0.0  # time.monotonic() when the current popup opened
         self.question_popup_active: bool = False
         self.current_question_data: Optional[Dict] = None
         self.question_feedback: Optional[str] = None
@@ -43,7 +63,21 @@ class GameState:
         self.human_player_awaiting_move_after_question: bool = False
 
         self._master_card_list: List[Card] = []
-        self.unseen_cards: Set[Card] = set()
+        self.unseen_cards = set()
+
+    def to_bytes(self, include_rng: bool = True) -> bytes:
+        """Compact binary snapshot of the rules state (layout in game_snapshot.py).
+        Without the RNG state a restored game reshuffles from the seed on a cheat swap."""
+        return encode_game_state(self, include_rng)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **kwargs) -> 'GameState':
+        return decode_game_state(data, **kwargs)
+
+    def set_strategy(self, player: Player, strategy: Union[str, AIStrategy, None]):
+        if strategy is None:
+            strategy = AI_STRATEGY if player.is_ai else HeuristicStrategy.name
+        player.strategy = create_strategy(strategy) if isinstance(strategy, str) else strategy
 
     def set_message(self, text: Optional[str], duration_ms: int = 1500):
         self._current_ui_message = text
@@ -66,7 +100,7 @@ class GameState:
              self.game_over = True
              return
 
-        self._master_card_list = [Card(spec['rank'], spec['suit']) for spec in STANDARD_DECK_COMPOSITION] * 2
+        self._master_card_list = [card_from_index(index) for index in self.rules.deck_indices] * 2
         self.unseen_cards = set(self._master_card_list)
 
         self._setup_phase = True
@@ -79,29 +113,37 @@ class GameState:
         self.human_player_awaiting_move_after_question = False
 
         for player in self.players:
-            player.deck = player._create_own_deck()
+            player.deck = player._create_own_deck(self.rng)
             player.deal_starting_hand()
-            player.caravans = [Caravan() for _ in range(NUM_CARAVANS)]
+            player.caravans = [Caravan(self.rules) for _ in range(self.rules.num_caravans)]
 
             if player.is_ai:
                 for card in player.hand:
-                    if card in self.unseen_cards:
-                        self.unseen_cards.remove(card)
+                    self.track_played_card(card)
 
         if not all(p.hand for p in self.players):
              debug.log_error("Failed to deal starting hands properly.")
              self.game_over = True
              return
 
-        self.all_questions = list(ALL_QUESTIONS_DATA)
-        random.shuffle(self.all_questions)
-        self.current_question_index = -1
         self.question_popup_active = False
         debug.log_event("Game Started. Setup phase active. Player: {}", self.get_current_player().name)
 
+    @property
+    def unseen_cards(self) -> Set[Card]:
+        """Cards the AI has not seen yet. Mutate it only through
+        track_played_card, which also keeps the unseen bitset in step."""
+        return self._unseen_cards
+
+    @unseen_cards.setter
+    def unseen_cards(self, cards: Set[Card]):
+        self._unseen_cards = cards
+        self.unseen = CardSet(cards)
+
     def track_played_card(self, card: Card):
-        if card in self.unseen_cards:
-            self.unseen_cards.remove(card)
+        if card in self._unseen_cards:
+            self._unseen_cards.remove(card)
+            self.unseen.remove(card)
 
     def get_unseen_cards(self) -> Set[Card]:
         return self.unseen_cards
@@ -142,6 +184,7 @@ class GameState:
         if self.human_player_awaiting_move_after_question and not current_p.is_ai:
             self.human_player_awaiting_move_after_question = False
 
+        previous_player_index = self.current_player_index
         self.current_player_index = (self.current_player_index + 1) % len(self.players)
         next_p = self.get_current_player()
         debug.log_event("Turn advances to {}.", next_p.name if next_p else "N/A")
@@ -153,10 +196,55 @@ class GameState:
 
         if (next_p and not next_p.is_ai and new_round_started and
             self.turn_count > 0 and self.turn_count % 3 == 0 and
-            (self.current_question_index + 1) < len(self.all_questions)):
-            self.current_question_index += 1
-            self.current_question_data = self.all_questions[self.current_question_index]
-            self.question_popup_active = True
+            self.questions_enabled):
+            scheduler = self.get_question_scheduler()
+            question = scheduler.next_question() if scheduler else None
+            if question is not None:
+                self.current_question_data = question
+                self.question_first_attempt_pending = True
+                self.question_attempts = 0
+                self.question_opened_at = time.monotonic()
+                self.question_popup_active = True
+
+        if RECORDER.enabled:
+            RECORDER.record_turn(previous_player_index, self.current_player_index, self.turn_count, self.question_popup_active)
+
+    def get_question_scheduler(self) -> Optional[QuestionScheduler]:
+        """Builds the scheduler, and with it the question bank, the first time a question is due."""
+        if self.question_scheduler is None and self.questions_enabled:
+            if self.question_scheduler_factory is not None:
+                self.question_scheduler = self.question_scheduler_factory()
+            else:
+                self.question_scheduler = QuestionScheduler(get_question_bank(), seed=self.seed)
+        return self.question_scheduler
+
+    def answer_current_question(self, option_index: int) -> bool:
+        """Checks an option of the open question; only the first attempt per popup is scheduled."""
+        question = self.current_question_data
+        if not self.question_popup_active or not question:
+            return False
+        correct = option_index == question["answer_index"]
+        self.question_attempts += 1
+        if self.question_first_attempt_pending:
+            self.question_first_attempt_pending = False
+            if self.question_scheduler is not None:
+                self.question_scheduler.record_answer(question["id"], correct)
+        return correct
+
+    def is_player_stuck(self, player: Player) -> bool:
+        if not player:
+            return True
+        if player.hand:
+            return False
+        if player.deck:
+            return False
+        can_discard_any_caravan = any(
+            caravan.cards and not self.is_caravan_sold_by_anyone(player, i)
+            for i, caravan in enumerate(player.caravans)
+        )
+        if can_discard_any_caravan:
+            return False
+        return True
 
     def is_setup_phase(self) -> bool:
         return self._setup_phase
@@ -175,10 +263,10 @@ class GameState:
         p1_sales = self.get_sold_caravan_count(player1)
         p2_sales = self.get_sold_caravan_count(player2)
 
-        if p1_sales >= WINNING_CARAVANS_NEEDED:
+        if p1_sales >= self._winning_caravans_needed:
             self.game_over, self.winner = True, player1
             return True
-        if p2_sales >= WINNING_CARAVANS_NEEDED:
+        if p2_sales >= self._winning_caravans_needed:
             self.game_over, self.winner = True, player2
             return True
 
@@ -193,11 +281,11 @@ class GameState:
         return False
 
     def get_sold_caravan_count(self, player: Player) -> int:
-        return sum(1 for i in range(NUM_CARAVANS) if self.is_caravan_sold_by_player(player, i))
+        return sum(1 for i in range(self._num_caravans) if self.is_caravan_sold_by_player(player, i))
 
     def is_caravan_sold_by_player(self, caravan_owner: Player, caravan_index: int) -> bool:
         opponent = self.get_opponent(caravan_owner)
-        if not opponent or not (0 <= caravan_index < NUM_CARAVANS):
+        if not opponent or not (0 <= caravan_index < self._num_caravans):
             return False
 
         owner_caravan = caravan_owner.caravans[caravan_index]
@@ -0,0 +1,119 @@
+# filename: headless.py
+from typing import Any, Dict, Optional, Sequence, Union
+
+from game_state import GameState
+from game_actions import GameActions
+from game_record import GameRecord, decode_action
+from player import Player
+from ai_profile import AIProfile
+from ai_strategies import AIStrategy
+from rules import RulesVariant
+
+class HeadlessGame:
+    """Runs a game through GameState/GameActions without pygame timing,
+    animation or UI, recording every successful action.
+
+    The question popup is treated as answered correctly as soon as a bonus
+    point placement is stepped, matching the only way out of the popup in
+    the UI.
+    """
+
+    def __init__(self, seed: Optional[int] = None, ai_difficulty: int = 0, questions: bool = True,
+                 profiles: Optional[Sequence[Optional[AIProfile]]] = None,
+                 strategies: Optional[Sequence[Union[str, AIStrategy, None]]] = None,
+                 game_state: Optional[GameState] = None, rules: Optional[RulesVariant] = None):
+        """With game_state, continues that (already started) game instead of
+        dealing a new one; the record then only holds the moves from there on.
+        Game records replay under the standard rules, so games under another
+        rules variant leave their record empty."""
+        if game_state is None:
+            game_state = GameState(ai_player_difficulty=ai_difficulty, seed=seed, strategies=strategies,
+                                   questions_enabled=questions, rules=rules)
+            game_state.start_game()
+        self.game_state = game_state
+        for player, profile in zip(self.game_state.players, profiles or ()):
+            if profile is not None:
+                player.ai_profile = profile
+        self.game_actions = GameActions(self.game_state)
+        self.record = GameRecord(self.game_state.seed, ai_difficulty=ai_difficulty, questions=questions)
+        self._recording = self.game_state.rules.is_standard
+
+    @property
+    def game_over(self) -> bool:
+        return self.game_state.game_over
+
+    def acting_player(self) -> Optional[Player]:
+        game_state = self.game_state
+        if game_state.awaiting_bonus_point_placement and game_state.player_awarded_bonus:
+            return game_state.player_awarded_bonus
+        return game_state.get_current_player()
+
+    def decode(self, code: int) -> Dict[str, Any]:
+        player = self.acting_player()
+        return decode_action(code, player, self.game_state.get_opponent(player))
+
+    def step(self, action: Dict[str, Any]) -> bool:
+        game_state = self.game_state
+        if game_state.game_over:
+            return False
+        if action.get("type") == "apply_bonus_point_effect":
+            return self._place_bonus_point(action)
+        if game_state.question_popup_active or game_state.awaiting_bonus_point_placement:
+            return False
+        player = game_state.get_current_player()
+        if not self.game_actions.execute_turn(player, action):
+            return False
+        if self._recording:
+            self.record.append(player, action)
+        return True
+
+    def _place_bonus_point(self, action: Dict[str, Any]) -> bool:
+        game_state = self.game_state
+        if game_state.question_popup_active:
+            game_state.answer_current_question(game_state.current_question_data["answer_index"])
+            game_state.question_answered_correctly_this_popup = True
+            game_state.next_turn()
+        player = game_state.player_awarded_bonus
+        if not game_state.awaiting_bonus_point_placement or player is None:
+            return False
+        if not self.game_actions.execute_turn(player, action):
+            return False
+        if self._recording:
+            self.record.append(player, action)
+        game_state.awaiting_bonus_point_placement = False
+        game_state.player_awarded_bonus = None
+        game_state.human_player_awaiting_move_after_question = True
+        return True
+
+    def choose_ai_action(self) -> Dict[str, Any]:
+        """Asks the acting seat's strategy for a move, including the human seat."""
+        game_state = self.game_state
+        player = self.acting_player()
+        if game_state.question_popup_active or game_state.awaiting_bonus_point_placement:
+            return self._choose_bonus_point_action(player)
+        if game_state.is_player_stuck(player):
+            return {"type": "pass"}
+        if game_state.is_setup_phase():
+            return player.strategy.choose_setup_action(player, game_state)
+        return player.strategy.choose_action(player, game_state)
+
+    def _choose_bonus_point_action(self, player: Player) -> Dict[str, Any]:
+        best_idx, best_total = 0, -1
+        win_min = self.game_state.rules.win_min
+        for i, caravan in enumerate(player.caravans):
+            total = caravan.total()
+            if total < win_min and total > best_total and not self.game_state.is_caravan_sold_by_anyone(player, i):
+                best_idx, best_total = i, total
+        return {"type": "apply_bonus_point_effect", "target_player": player, "target_caravan_index": best_idx}
+
+    def play_ai_turn(self) -> bool:
+        if self.step(self.choose_ai_action()):
+            return True
+        return self.step({"type": "pass"})
+
+    def play_to_end(self, max_actions: int = 1000) -> GameRecord:
+        """Lets each seat's strategy play until the game ends or max_actions is reached."""
+        for _ in range(max_actions):
+            if self.game_state.game_over or not self.play_ai_turn():
+                break
+        return self.record
@@ -0,0 +1,114 @@
+# filename: hit_test.py
+import pygame
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+HIT_CELL_SIZE = 128
+
+LAYER_CARAVANS = 0
+LAYER_HAND = 1000
+LAYER_BUTTONS = 2000
+LAYER_BONUS_POINT = 3000
+LAYER_POPUP = 4000
+LAYER_TUTORIAL = 5000
+
+class HitRegion:
+    __slots__ = ("group", "key", "rect", "z", "data")
+
+    def __init__(self, group: str, key: Hashable, rect: pygame.Rect, z: int, data: Any):
+        self.group = group
+        self.key = key
+        self.rect = pygame.Rect(rect)
+        self.z = z
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"HitRegion(group='{self.group}', key={self.key!r}, rect={self.rect}, z={self.z})"
+
+class HitTestIndex:
+    """Persistent set of clickable regions bucketed into a uniform grid.
+
+    Draw code calls ``place``/``remove`` every frame; a region is only
+    replaced when its rect or payload actually changed, and the grid is
+    rebuilt lazily on the next query after a change. A point query touches
+    one grid cell and returns the region with the highest z.
+    """
+
+    def __init__(self, cell_size: int = HIT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._groups: Dict[str, Dict[Hashable, HitRegion]] = {}
+        self._grid: Dict[Tuple[int, int], List[HitRegion]] = {}
+        self._dirty: bool = False
+
+    def place(self, group: str, key: Hashable, rect: pygame.Rect, z: int = 0, data: Any = None):
+        regions = self._groups.get(group)
+        if regions is None:
+            regions = self._groups[group] = {}
+        region = regions.get(key)
+        if region is not None and region.z == z and region.data is data and region.rect == rect:
+            return
+        regions[key] = HitRegion(group, key, rect, z, data)
+        self._dirty = True
+
+    def remove(self, group: str, key: Hashable):
+        regions = self._groups.get(group)
+        if regions and key in regions:
+            del regions[key]
+            self._dirty = True
+
+    def truncate(self, group: str, count: int):
+        """Drops integer-keyed regions whose key is >= count."""
+        regions = self._groups.get(group)
+        if not regions:
+            return
+        for key in regions:
+            if key >= count:
+                break
+        else:
+            return
+        for key in [k for k in regions if k >= count]:
+            del regions[key]
+        self._dirty = True
+
+    def clear_group(self, group: str):
+        if self._groups.get(group):
+            self._groups[group].clear()
+            self._dirty = True
+
+    def clear(self):
+        self._groups.clear()
+        self._grid.clear()
+        self._dirty = False
+
+    def get(self, group: str, key: Hashable) -> Optional[HitRegion]:
+        regions = self._groups.get(group)
+        return regions.get(key) if regions else None
+
+    def regions(self, group: str) -> Iterable[HitRegion]:
+        return self._groups.get(group, {}).values()
+
+    def _rebuild(self):
+        grid: Dict[Tuple[int, int], List[HitRegion]] = {}
+        size = self.cell_size
+        for regions in self._groups.values():
+            for region in regions.values():
+                r = region.rect
+                if r.width <= 0 or r.height <= 0:
+                    continue
+                for cx in range(r.left // size, (r.right - 1) // size + 1):
+                    for cy in range(r.top // size, (r.bottom - 1) // size + 1):
+                        grid.setdefault((cx, cy), []).append(region)
+        for cell in grid.values():
+            cell.sort(key=lambda region: region.z, reverse=True)
+        self._grid = grid
+        self._dirty = False
+
+    def hit(self, pos: Tuple[int, int], groups: Optional[Tuple[str, ...]] = None) -> Optional[HitRegion]:
+        if self._dirty:
+            self._rebuild()
+        cell = self._grid.get((int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size))
+        if not cell:
+            return None
+        for region in cell:
+            if (groups is None or region.group in groups) and region.rect.collidepoint(pos):
+                return region
+        return None
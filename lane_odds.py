@@ -0,0 +1,127 @@
+# filename: lane_odds.py
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from canonical import permute_mask, pool_suit_map
+from card_set import SUIT_MASKS, VALUE_MASKS
+from eval_cache import KIND_LANE_ODDS, active_eval_cache
+from config import CARAVAN_WIN_MIN, CARAVAN_WIN_MAX, LANE_ODDS_MAX_PLAYS, LANE_ODDS_CACHE_SIZE
+
+if TYPE_CHECKING:
+    from caravan import Caravan
+    from player import Player
+
+_NUMERIC_VALUES = range(2, 11)
+_DIRECTION_CODES = {None: 0, "up": 1, "down": 2}
+
+class LaneOdds:
+    """Chance that a lane's total lands in win_min..win_max (by default
+    CARAVAN_WIN_MIN..CARAVAN_WIN_MAX) within k more numeric plays, each a
+    card drawn at random from a pool (usually the player's hand and deck,
+    as a CardSet mask).
+
+    reach[k][total] is filled by dynamic programming over the pool's value
+    counts, so lookups are O(1); a table is (LANE_ODDS_MAX_PLAYS + 1) *
+    (win_max + 1) doubles. lane_probability() applies the lane's
+    direction, suit and last value to the first play exactly; later plays
+    only respect the bust limit, since a player holding several cards can
+    usually follow the direction.
+    """
+
+    def __init__(self, pool_mask: int, max_plays: int = LANE_ODDS_MAX_PLAYS,
+                 win_min: int = CARAVAN_WIN_MIN, win_max: int = CARAVAN_WIN_MAX):
+        self.pool_mask = pool_mask
+        self.max_plays = max_plays
+        self.win_min = win_min
+        self.win_max = win_max
+        self.value_counts = [(pool_mask & VALUE_MASKS[value]).bit_count() for value in range(11)]
+        self.pool_size = sum(self.value_counts)
+        rows = win_max + 1
+        self._rows = rows
+        reach = array('d', [0.0]) * (rows * (max_plays + 1))
+        for total in range(win_min, rows):
+            reach[total] = 1.0
+        if self.pool_size:
+            odds = [(value, self.value_counts[value] / self.pool_size)
+                    for value in _NUMERIC_VALUES if self.value_counts[value]]
+            for plays in range(1, max_plays + 1):
+                previous, row = (plays - 1) * rows, plays * rows
+                for total in range(rows):
+                    if total >= win_min:
+                        reach[row + total] = 1.0
+                    else:
+                        reach[row + total] = sum(p * reach[previous + total + value]
+                                                 for value, p in odds if total + value < rows)
+        self.reach = reach
+
+    def reach_probability(self, total: int, plays: int) -> float:
+        if total > self.win_max:
+            return 0.0
+        return self.reach[min(max(plays, 0), self.max_plays) * self._rows + max(total, 0)]
+
+    def lane_probability(self, caravan: 'Caravan', plays: int = LANE_ODDS_MAX_PLAYS) -> float:
+        total = caravan.total()
+        if total > self.win_max or self.win_min <= total:
+            return 1.0 if total <= self.win_max else 0.0
+        last_card, _ = caravan.get_last_numeric_card_info()
+        if last_card is None or plays <= 0 or not self.pool_size:
+            return self.reach_probability(total, plays)
+        last, direction = last_card.value, caravan.direction
+        suit_mask = SUIT_MASKS.get(caravan.suit, 0)
+        probability = 0.0
+        playable = 0
+        for value in _NUMERIC_VALUES:
+            if value == last or not self.value_counts[value]:
+                continue
+            if direction is None or (direction == "up" and value > last) or (direction == "down" and value < last):
+                count = self.value_counts[value]
+            else:
+                count = (self.pool_mask & VALUE_MASKS[value] & suit_mask).bit_count()
+            if count:
+                playable += count
+                probability += count * self.reach_probability(total + value, plays - 1)
+        stalled = self.pool_size - playable
+        probability += stalled * self.reach_probability(total, plays - 1)
+        return probability / self.pool_size
+
+_TABLES: 'OrderedDict[tuple, LaneOdds]' = OrderedDict()
+
+def lane_odds_for_pool(pool_mask: int, win_min: int = CARAVAN_WIN_MIN, win_max: int = CARAVAN_WIN_MAX) -> LaneOdds:
+    """Cached LaneOdds for a CardSet mask and winning window; the least
+    recently used table is dropped beyond LANE_ODDS_CACHE_SIZE."""
+    key = (pool_mask, win_min, win_max)
+    table = _TABLES.get(key)
+    if table is None:
+        table = _TABLES[key] = LaneOdds(pool_mask, win_min=win_min, win_max=win_max)
+        if len(_TABLES) > LANE_ODDS_CACHE_SIZE:
+            _TABLES.popitem(last=False)
+    else:
+        _TABLES.move_to_end(key)
+    return table
+
+def player_lane_odds(player: 'Player') -> LaneOdds:
+    return lane_odds_for_pool(player.hand.card_set.mask | player.deck.card_set.mask,
+                              player.rules.win_min, player.rules.win_max)
+
+def cached_lane_probability(pool_mask: int, caravan: 'Caravan', plays: int = LANE_ODDS_MAX_PLAYS,
+                            win_min: int = CARAVAN_WIN_MIN, win_max: int = CARAVAN_WIN_MAX) -> float:
+    """lane_odds_for_pool(...).lane_probability(caravan, plays), looked up in
+    the process's persistent evaluation cache first when one is open. The
+    key relabels suits so the lane's suit comes first, which makes lanes
+    that differ only by a suit permutation share an entry. The window is
+    keyed as its offset from the standard one, so standard keys need no
+    extra bits."""
+    cache = active_eval_cache()
+    if cache is None:
+        return lane_odds_for_pool(pool_mask, win_min, win_max).lane_probability(caravan, plays)
+    last_card, _ = caravan.get_last_numeric_card_info()
+    key_lo = permute_mask(pool_mask, pool_suit_map(pool_mask, caravan.suit))
+    key_hi = (KIND_LANE_ODDS << 56 | ((win_min - CARAVAN_WIN_MIN) & 0xFF) << 40 | ((win_max - CARAVAN_WIN_MAX) & 0xFF) << 32
+              | plays << 24 | caravan.total() << 12 | (last_card.value if last_card else 0) << 6
+              | _DIRECTION_CODES[caravan.direction] << 3 | (1 if caravan.suit else 0))
+    probability = cache.get(key_lo, key_hi)
+    if probability is None:
+        probability = lane_odds_for_pool(pool_mask, win_min, win_max).lane_probability(caravan, plays)
+        cache.put(key_lo, key_hi, probability)
+    return probability
@@ -2,22 +2,26 @@
 import pygame
 import sys
 import os
+import time
 import debug 
 
 try:
     from config import * 
     from game_pygame import GameController
-    from pygame_ui import load_assets, draw_game_state, draw_text, get_card_image, draw_tutorial_overlay 
+    from pygame_ui import load_assets, draw_game_state, draw_text, get_card_image, draw_tutorial_overlay, draw_profiler_overlay, draw_lane_odds_overlay, TUTORIAL_NAV_RECTS
+    from hit_test import HitTestIndex
+    from frame_profiler import FrameProfiler
+    from flight_recorder import RECORDER
     from player import Player
     from card import Card
     from typing import Union, Any, Dict, List, Optional, Tuple
 except ImportError as e:
     print(f"CRITICAL Error importing game modules: {e}")
-    debug.log_error(f"ImportError: {e}", include_traceback=True)
+    debug.log_error("ImportError: {}", e, include_traceback=True)
     sys.exit(1)
 except Exception as e:
     print(f"CRITICAL An unexpected error occurred during imports: {e}")
-    debug.log_error(f"Unexpected import error: {e}", include_traceback=True)
+    debug.log_error("Unexpected import error: {}", e, include_traceback=True)
     sys.exit(1)
 
 tutorial_active = False
@@ -43,7 +47,7 @@ def main():
         debug.log_startup("Pygame initialized successfully.")
     except pygame.error as e:
         print(f"CRITICAL Pygame initialization failed: {e}")
-        debug.log_error(f"Pygame initialization error: {e}", include_traceback=True)
+        debug.log_error("Pygame initialization error: {}", e, include_traceback=True)
         sys.exit(1)
 
     try:
@@ -53,7 +57,7 @@ def main():
         debug.log_startup("Screen and clock setup complete.")
     except pygame.error as e:
         print(f"CRITICAL Failed to set up screen: {e}")
-        debug.log_error(f"Screen setup error: {e}", include_traceback=True)
+        debug.log_error("Screen setup error: {}", e, include_traceback=True)
         pygame.quit()
         sys.exit(1)
 
@@ -78,13 +82,13 @@ def main():
         debug.log_startup("Assets loaded.")
     except Exception as e:
         print(f"CRITICAL Fatal error loading assets: {e}")
-        debug.log_error(f"Asset loading exception: {e}", include_traceback=True)
+        debug.log_error("Asset loading exception: {}", e, include_traceback=True)
         pygame.quit()
         sys.exit(1)
 
     controller = GameController()
     controller.start_new_game(ai_difficulty=AI_DIFFICULTY_LEVEL)
-    debug.log_startup(f"Game started with AI difficulty from config: {AI_DIFFICULTY_LEVEL}")
+    debug.log_startup("Game started with AI difficulty from config: {}", AI_DIFFICULTY_LEVEL)
 
     if not controller.game_state or not controller.game_state.players or not controller.game_state.players[0]:
        
@@ -112,17 +116,21 @@ def main():
         'selected_card_obj': None,
         'message': None,
         'message_timer': 0,
-        'clickable_rects': {"buttons": {}, "tutorial_nav": {}}, 
+        'hit_index': HitTestIndex(),
         'action_pending': None,
         'hand_current_y': HAND_HIDDEN_Y,
         'hand_hovered': False,
         'question_popup_dismiss_pending': False,
         'bonus_point_selected': False,
+        'lane_odds_hint': False,
     }
 
+    profiler = FrameProfiler(history_frames=PROFILER_HISTORY_FRAMES)
+
     running = True
     while running:
         dt_ms = clock.tick(FPS)
+        profiler.begin_frame()
         mouse_pos = pygame.mouse.get_pos()
         clicked_this_frame = False
 
@@ -134,6 +142,38 @@ def main():
                     clicked_this_frame = True
                     debug.log_ui("Left mouse button clicked at {}", mouse_pos)
             if event.type == pygame.KEYDOWN:
+                if event.key == PROFILER_TOGGLE_KEY:
+                    debug.log_ui("Frame profiler {}.", "enabled" if profiler.toggle() else "disabled")
+                if event.key == PROFILER_EXPORT_KEY and profiler.enabled:
+                    csv_path = f"{PROFILER_CSV_FILE_PREFIX}_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+                    try:
+                        rows_written = profiler.export_csv(csv_path)
+                        ui_state['message'] = f"Profile exported: {csv_path} ({rows_written} frames)"
+                    except OSError as e:
+                        debug.log_error("Failed to export frame profile to {}: {}", csv_path, e)
+                        ui_state['message'] = "Profile export failed."
+                    ui_state['message_timer'] = 2500
+                if event.key == FLIGHT_RECORDER_DUMP_KEY:
+                    dump_path = RECORDER.dump("hotkey")
+                    ui_state['message'] = f"Flight recorder saved: {dump_path}" if dump_path else "Flight recorder dump failed."
+                    ui_state['message_timer'] = 2500
+                if event.key == LANE_ODDS_HINT_KEY:
+                    ui_state['lane_odds_hint'] = not ui_state['lane_odds_hint']
+                if event.key == QUICK_SAVE_KEY and not tutorial_active:
+                    ui_state['message'] = "Game saved." if controller.save_game() else "Save failed."
+                    ui_state['message_timer'] = 2000
+                if event.key == QUICK_LOAD_KEY and not tutorial_active:
+                    if controller.load_game():
+                        human_player = controller.game_state.players[0]
+                        ui_state['selected_card_index'] = None
+                        ui_state['selected_card_obj'] = None
+                        ui_state['action_pending'] = None
+                        ui_state['question_popup_dismiss_pending'] = False
+                        ui_state['bonus_point_selected'] = False
+                        ui_state['message'] = "Game loaded."
+                    else:
+                        ui_state['message'] = "No saved game to load."
+                    ui_state['message_timer'] = 2000
                 if event.key == pygame.K_ESCAPE:
                     if tutorial_active: 
                         show_tutorial_screen(False)
@@ -160,6 +200,7 @@ def main():
 
 
         if not running: break
+        profiler.lap("events")
 
         if ui_state['message_timer'] > 0:
            
@@ -228,28 +269,29 @@ def main():
         ui_state['hand_current_y'] += (target_y - ui_state['hand_current_y']) * lerp_factor
         if abs(target_y - ui_state['hand_current_y']) < 1:
             ui_state['hand_current_y'] = target_y
+        profiler.lap("update")
 
 
         animation_active_for_input_block = controller.animation_details and controller.animation_details['is_active']
 
+        hit_index: HitTestIndex = ui_state['hit_index']
+
         if tutorial_active and clicked_this_frame:
-            tutorial_nav_rects = ui_state.get('clickable_rects', {}).get('tutorial_nav', {})
-            prev_rect = tutorial_nav_rects.get('prev')
-            next_rect = tutorial_nav_rects.get('next')
-            close_rect = tutorial_nav_rects.get('close')
+            nav_hit = hit_index.hit(mouse_pos, ("tutorial_nav",))
+            nav_name = nav_hit.key if nav_hit else None
 
             click_handled_by_tutorial = False
-            if prev_rect and prev_rect.collidepoint(mouse_pos):
+            if nav_name == 'prev':
                 if current_tutorial_image_index > 0:
                     current_tutorial_image_index -= 1
                 click_handled_by_tutorial = True
-            elif next_rect and next_rect.collidepoint(mouse_pos):
+            elif nav_name == 'next':
                 if current_tutorial_image_index < len(loaded_tutorial_images) - 1:
                     current_tutorial_image_index += 1
                 else: 
                     show_tutorial_screen(False)
                 click_handled_by_tutorial = True
-            elif close_rect and close_rect.collidepoint(mouse_pos):
+            elif nav_name == 'close':
                 show_tutorial_screen(False)
                 click_handled_by_tutorial = True
 
@@ -271,21 +313,19 @@ def main():
                             ui_state['question_popup_dismiss_pending'] = False
                             popup_interaction_handled = True
                             debug.log_ui("Question popup dismissed.")
-                    elif "question_options" in ui_state.get("clickable_rects", {}):
-                        for option_item in ui_state["clickable_rects"]["question_options"]:
-                            
-                            if option_item["rect"].collidepoint(mouse_pos):
-                                q_data = gs.current_question_data
-                                if q_data:
-                                    if option_item["index"] == q_data["answer_index"]:
-                                        gs.question_feedback = "Correct! Click popup to continue."
-                                        ui_state['question_popup_dismiss_pending'] = True
-                                        debug.log_event("Question answered correctly by human.")
-                                    else:
-                                        gs.question_feedback = "Incorrect. Try Again!"
-                                        debug.log_event("Question answered incorrectly by human.")
-                                popup_interaction_handled = True
-                                break
+                    else:
+                        option_hit = hit_index.hit(mouse_pos, ("question_options",))
+                        if option_hit:
+                            q_data = gs.current_question_data
+                            if q_data:
+                                if controller.answer_question(option_hit.key):
+                                    gs.question_feedback = "Correct! Click popup to continue."
+                                    ui_state['question_popup_dismiss_pending'] = True
+                                    debug.log_event("Question answered correctly by human.")
+                                else:
+                                    gs.question_feedback = "Incorrect. Try Again!"
+                                    debug.log_event("Question answered incorrectly by human.")
+                            popup_interaction_handled = True
                     if popup_interaction_handled:
                         clicked_this_frame = False
 
@@ -294,8 +334,7 @@ def main():
                 
                 if clicked_this_frame:
                     click_handled_for_bonus = False
-                    active_bonus_rect = ui_state.get('clickable_rects', {}).get('active_bonus_point')
-                    if active_bonus_rect and active_bonus_rect.collidepoint(mouse_pos):
+                    if hit_index.hit(mouse_pos, ("active_bonus_point",)):
                         ui_state['bonus_point_selected'] = not ui_state['bonus_point_selected']
                         if ui_state['bonus_point_selected']:
                             ui_state['message'] = "Bonus Point selected. Click a caravan."
@@ -307,19 +346,11 @@ def main():
                     elif ui_state['bonus_point_selected']:
                         target_player_for_bonus: Optional[Player] = None
                         target_caravan_idx_for_bonus = -1
-                        for item in ui_state.get('clickable_rects', {}).get('p_caravans', []):
-                            if item['rect'].collidepoint(mouse_pos):
-                                target_player_for_bonus = human_player
-                                target_caravan_idx_for_bonus = item['index']
-                                click_handled_for_bonus = True; break
-                        if not click_handled_for_bonus and gs.get_opponent(human_player):
-                            opponent = gs.get_opponent(human_player)
-                            if opponent:
-                                for item in ui_state.get('clickable_rects', {}).get('o_caravans', []):
-                                    if item['rect'].collidepoint(mouse_pos):
-                                        target_player_for_bonus = opponent
-                                        target_caravan_idx_for_bonus = item['index']
-                                        click_handled_for_bonus = True; break
+                        caravan_hit = hit_index.hit(mouse_pos, ("p_caravans", "o_caravans"))
+                        if caravan_hit and caravan_hit.data:
+                            target_player_for_bonus = caravan_hit.data
+                            target_caravan_idx_for_bonus = caravan_hit.key
+                            click_handled_for_bonus = True
 
                         if target_player_for_bonus is not None and target_caravan_idx_for_bonus != -1:
                             action_data_bonus = {
@@ -342,101 +373,87 @@ def main():
             elif controller.is_ai_turn() and \
                  not animation_active_for_input_block and \
                  not gs.human_player_awaiting_move_after_question:
+                profiler.lap("input")
                 controller.run_ai_turn()
+                profiler.lap("ai")
             elif controller.is_player_turn(human_player) and \
                  not animation_active_for_input_block:
                 if clicked_this_frame:
                     click_handled_for_action = False
-                    buttons = ui_state.get('clickable_rects', {}).get('buttons', {})
-                    for action_name, rect in buttons.items():
-                        if rect.collidepoint(mouse_pos):
-                            click_handled_for_action = True
-                            action_data: Dict[str, Any] = {'type': action_name}
-                            perform_action_immediately = True
-
-                            if action_name == 'show_tutorial':
-                                show_tutorial_screen(True)
+                    button_hit = hit_index.hit(mouse_pos, ("buttons",))
+                    if button_hit:
+                        action_name = button_hit.key
+                        click_handled_for_action = True
+                        action_data: Dict[str, Any] = {'type': action_name}
+                        perform_action_immediately = True
+
+                        if action_name == 'show_tutorial':
+                            show_tutorial_screen(True)
+                            action_data = {}
+                            perform_action_immediately = False
+                        elif action_name == 'quit': running = False
+                        elif action_name == 'discard_card':
+                            if ui_state['selected_card_index'] is not None:
+                                action_data['card_index'] = ui_state['selected_card_index']
+                            else:
+                                ui_state['message'] = "Select a card from hand to discard."
+                                ui_state['message_timer'] = 1500
                                 action_data = {}
-                                perform_action_immediately = False
-                            elif action_name == 'quit': running = False; break
-                            elif action_name == 'discard_card':
-                                if ui_state['selected_card_index'] is not None:
-                                    action_data['card_index'] = ui_state['selected_card_index']
-                                else:
-                                    ui_state['message'] = "Select a card from hand to discard."
-                                    ui_state['message_timer'] = 1500
-                                    action_data = {}
-                            elif action_name == 'discard_caravan':
-                                ui_state['action_pending'] = 'discard_caravan'
-                                ui_state['message'] = "Click YOUR caravan to discard it."
-                                ui_state['message_timer'] = 3000
+                        elif action_name == 'discard_caravan':
+                            ui_state['action_pending'] = 'discard_caravan'
+                            ui_state['message'] = "Click YOUR caravan to discard it."
+                            ui_state['message_timer'] = 3000
+                            ui_state['selected_card_index'] = None
+                            ui_state['selected_card_obj'] = None
+                            action_data = {}
+                            perform_action_immediately = False
+                        elif action_name == 'pass':
+                            pass
+
+                        if action_data.get('type') and perform_action_immediately:
+                            if controller.execute_validated_action(human_player, action_data):
+                                gs.human_player_awaiting_move_after_question = False
                                 ui_state['selected_card_index'] = None
                                 ui_state['selected_card_obj'] = None
-                                action_data = {}
-                                perform_action_immediately = False
-                            elif action_name == 'pass':
-                                pass
-
-                            if action_data.get('type') and perform_action_immediately:
-                                if controller.execute_validated_action(human_player, action_data):
-                                    gs.human_player_awaiting_move_after_question = False
-                                    ui_state['selected_card_index'] = None
-                                    ui_state['selected_card_obj'] = None
-                                    ui_state['action_pending'] = None
-                            break 
+                                ui_state['action_pending'] = None
 
                     if not click_handled_for_action: 
-                        for item in ui_state.get('clickable_rects', {}).get('hand', []):
-                            if item['rect'].collidepoint(mouse_pos):
-                                click_handled_for_action = True
-                                if ui_state['selected_card_index'] == item['index'] and \
-                                   ui_state['selected_card_obj'] == item['card']:
-                                    ui_state['selected_card_index'] = None
-                                    ui_state['selected_card_obj'] = None
-                                    ui_state['message'] = None; ui_state['message_timer'] = 0
-                                    ui_state['action_pending'] = None
-                                    debug.log_ui("Card deselected from hand: {}", item['card'])
-                                else:
-                                    ui_state['selected_card_index'] = item['index']
-                                    ui_state['selected_card_obj'] = item['card']
-                                    card_name = str(item['card'])
-                                    msg = f"{card_name} selected. Click YOUR EMPTY caravan." if gs.is_setup_phase() \
-                                          else f"{card_name} selected. Click target or action button."
-                                    ui_state['message'] = msg; ui_state['message_timer'] = 3000
-                                    ui_state['action_pending'] = None
-                                    debug.log_ui("Card selected from hand: {} at index {}", card_name, item['index'])
-                                break
+                        hand_hit = hit_index.hit(mouse_pos, ("hand",))
+                        if hand_hit:
+                            click_handled_for_action = True
+                            if ui_state['selected_card_index'] == hand_hit.key and \
+                               ui_state['selected_card_obj'] == hand_hit.data:
+                                ui_state['selected_card_index'] = None
+                                ui_state['selected_card_obj'] = None
+                                ui_state['message'] = None; ui_state['message_timer'] = 0
+                                ui_state['action_pending'] = None
+                                debug.log_ui("Card deselected from hand: {}", hand_hit.data)
+                            else:
+                                ui_state['selected_card_index'] = hand_hit.key
+                                ui_state['selected_card_obj'] = hand_hit.data
+                                card_name = str(hand_hit.data)
+                                msg = f"{card_name} selected. Click YOUR EMPTY caravan." if gs.is_setup_phase() \
+                                      else f"{card_name} selected. Click target or action button."
+                                ui_state['message'] = msg; ui_state['message_timer'] = 3000
+                                ui_state['action_pending'] = None
+                                debug.log_ui("Card selected from hand: {} at index {}", card_name, hand_hit.key)
                     if not click_handled_for_action:
                         target_player_for_action: Optional[Player] = None
                         target_caravan_idx_for_action = -1
                         animation_end_pos_human: Optional[Tuple[int,int]] = None
-                        for item in ui_state.get('clickable_rects', {}).get('p_caravans', []):
-                            if item['rect'].collidepoint(mouse_pos):
-                                target_player_for_action = human_player
-                                target_caravan_idx_for_action = item['index']
-                                caravan_obj = human_player.caravans[target_caravan_idx_for_action]
-                                num_cards_on_target = len(caravan_obj.cards)
-                                end_y_offset = num_cards_on_target * CARAVAN_CARD_Y_OFFSET
-                                animation_end_pos_human = (
-                                    item['rect'].centerx,
-                                    PLAYER_CARAVAN_Y + end_y_offset + SCALED_CARD_HEIGHT // 2
-                                )
-                                click_handled_for_action = True; break
-                        if not click_handled_for_action and gs.get_opponent(human_player):
-                            opponent = gs.get_opponent(human_player)
-                            if opponent:
-                                for item in ui_state.get('clickable_rects', {}).get('o_caravans', []):
-                                    if item['rect'].collidepoint(mouse_pos):
-                                        target_player_for_action = opponent
-                                        target_caravan_idx_for_action = item['index']
-                                        caravan_obj = opponent.caravans[target_caravan_idx_for_action]
-                                        num_cards_on_target = len(caravan_obj.cards)
-                                        end_y_offset = num_cards_on_target * CARAVAN_CARD_Y_OFFSET
-                                        animation_end_pos_human = (
-                                            item['rect'].centerx,
-                                            OPPONENT_CARAVAN_Y + end_y_offset + SCALED_CARD_HEIGHT // 2
-                                        )
-                                        click_handled_for_action = True; break
+                        caravan_hit = hit_index.hit(mouse_pos, ("p_caravans", "o_caravans"))
+                        if caravan_hit and caravan_hit.data:
+                            target_player_for_action = caravan_hit.data
+                            target_caravan_idx_for_action = caravan_hit.key
+                            caravan_obj = target_player_for_action.caravans[target_caravan_idx_for_action]
+                            num_cards_on_target = len(caravan_obj.cards)
+                            end_y_offset = num_cards_on_target * CARAVAN_CARD_Y_OFFSET
+                            caravan_base_y = PLAYER_CARAVAN_Y if caravan_hit.group == "p_caravans" else OPPONENT_CARAVAN_Y
+                            animation_end_pos_human = (
+                                caravan_hit.rect.centerx,
+                                caravan_base_y + end_y_offset + SCALED_CARD_HEIGHT // 2
+                            )
+                            click_handled_for_action = True
                         if target_player_for_action is not None and target_caravan_idx_for_action != -1:
                             action_data_for_caravan_click: Dict[str, Any] = {}
                             card_for_animation: Optional[Card] = None
@@ -475,10 +492,9 @@ def main():
 
                             if action_data_for_caravan_click.get('type'):
                                 if card_for_animation and ui_state['selected_card_index'] is not None:
-                                    hand_rects = ui_state.get('clickable_rects', {}).get('hand', [])
-                                    selected_hand_item = next((hr_item for hr_item in hand_rects if hr_item['index'] == ui_state['selected_card_index']), None)
+                                    selected_hand_item = hit_index.get("hand", ui_state['selected_card_index'])
                                     if selected_hand_item:
-                                        animation_start_pos_human = selected_hand_item['rect'].center
+                                        animation_start_pos_human = selected_hand_item.rect.center
 
                                     if animation_start_pos_human and animation_end_pos_human:
                                         debug.log_ui("Initiating animation for human player action: {}", action_data_for_caravan_click)
@@ -528,9 +544,9 @@ def main():
 
         elif controller.game_state and controller.game_state.game_over and not tutorial_active:
             if clicked_this_frame:
-                buttons = ui_state.get('clickable_rects', {}).get('buttons', {})
+                game_over_hit = hit_index.hit(mouse_pos, ("buttons",))
                
-                if "quit" in buttons and buttons["quit"].collidepoint(mouse_pos): 
+                if game_over_hit and game_over_hit.key == "quit": 
                     
                     debug.log_event("Restarting game from game over screen.")
                     controller.start_new_game(ai_difficulty=AI_DIFFICULTY_LEVEL)
@@ -541,11 +557,14 @@ def main():
                     show_tutorial_screen(False) 
 
 
+        profiler.lap("input")
       
         screen.fill(BLACK) 
         if controller.game_state and human_player:
             
             draw_game_state(screen, controller.game_state, human_player, assets, ui_state, controller)
+            if ui_state['lane_odds_hint'] and not tutorial_active:
+                draw_lane_odds_overlay(screen, human_player)
         else:
            
             try:
@@ -557,21 +576,18 @@ def main():
 
         
         if tutorial_active:
-            tutorial_nav_rects_for_draw = ui_state.get('clickable_rects', {}).get('tutorial_nav', {})
-            if not tutorial_nav_rects_for_draw.get('prev'): 
-                 debug.log_warning("Tutorial nav rects missing in ui_state. Defining defaults for drawing.")
-                 prev_btn_rect_tut = pygame.Rect(0, 0, TUTORIAL_BTN_WIDTH, TUTORIAL_BTN_HEIGHT)
-                 prev_btn_rect_tut.center = (TUTORIAL_PREV_BTN_CENTER_X, TUTORIAL_NAV_Y)
-                 next_btn_rect_tut = pygame.Rect(0, 0, TUTORIAL_BTN_WIDTH, TUTORIAL_BTN_HEIGHT)
-                 next_btn_rect_tut.center = (TUTORIAL_NEXT_BTN_CENTER_X, TUTORIAL_NAV_Y)
-                 close_btn_rect_tut = pygame.Rect(0, 0, TUTORIAL_BTN_WIDTH, TUTORIAL_BTN_HEIGHT)
-                 close_btn_rect_tut.center = (TUTORIAL_CLOSE_BTN_CENTER_X, TUTORIAL_NAV_Y)
-                 tutorial_nav_rects_for_draw = {'prev': prev_btn_rect_tut, 'next': next_btn_rect_tut, 'close': close_btn_rect_tut}
-
-            draw_tutorial_overlay(screen, current_tutorial_image_index, tutorial_nav_rects_for_draw)
+            draw_tutorial_overlay(screen, current_tutorial_image_index, TUTORIAL_NAV_RECTS)
+        profiler.lap("draw")
+
+        if profiler.enabled:
+            draw_profiler_overlay(screen, profiler)
+            profiler.lap("overlay")
 
         pygame.display.flip()
+        profiler.lap("flip")
+        profiler.end_frame()
    
+    controller.shutdown()
     pygame.quit()
     debug.log_event("Pygame quit. Exiting.")
     sys.exit()
@@ -590,6 +606,7 @@ if __name__ == "__main__":
         except EOFError: pass
         sys.exit(1)
 
+    debug.configure_from_env()
     try:
          debug.log_startup("Main script started.")
          debug.print_deck_composition_check()
@@ -600,7 +617,8 @@ if __name__ == "__main__":
          print(f"Error Details: {e}")
          import traceback
          traceback.print_exc() 
-         debug.log_error(f"Unhandled exception in main: {e}", include_traceback=True)
+         debug.log_error("Unhandled exception in main: {}", e, include_traceback=True)
+         RECORDER.dump("crash")
          print("--------------------------------------------------\n")
          pygame.quit()
          try: input("An error occurred. Press Enter to exit...")
@@ -0,0 +1,217 @@
+# filename: opening_book.py
+import argparse
+import math
+import mmap
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import debug
+from card_set import NUMERIC_MASK, SUIT_MASKS, value_range_mask
+from flight_recorder import RECORDER
+from config import (
+    SUITS, STARTING_HAND_SIZE, OPENING_BOOK_FILE, OPENING_BOOK_MIN_GAMES, OPENING_BOOK_MIN_EDGE,
+    OPENING_BOOK_CONFIDENCE_Z,
+)
+
+if TYPE_CHECKING:
+    from card import Card
+    from player import Player
+
+# Order in which the setup phase places opening cards; ids are stored in the
+# book file, so only append to this tuple.
+OPENING_POLICIES = ("highest", "lowest", "middle", "suited")
+DEFAULT_OPENING_POLICY = 0
+NO_ENTRY = 255
+
+BOOK_MAGIC = b"CVOB"
+BOOK_VERSION = 1
+_BOOK_HEADER = struct.Struct("<4sBB")
+
+# A starting hand is abstracted to its numeric cards: how many are low (2-4),
+# mid (5-7) and high (8-10), and how many distinct suits they cover.
+_LOW_MASK, _MID_MASK, _HIGH_MASK = value_range_mask(2, 4), value_range_mask(5, 7), value_range_mask(8, 10)
+_MAX_COUNT = STARTING_HAND_SIZE
+NUM_OPENING_KEYS = (_MAX_COUNT + 1) ** 3 * (len(SUITS) + 1)
+
+def opening_key(player: 'Player') -> int:
+    """Key of player's starting hand. Setup never draws, so the starting hand
+    is the current hand plus the cards already placed on its own caravans."""
+    mask = player.hand.card_set.mask
+    for caravan in player.caravans:
+        for card in caravan.cards:
+            mask |= 1 << card.index
+    mask &= NUMERIC_MASK
+    low, mid, high = (min((mask & bucket).bit_count(), _MAX_COUNT) for bucket in (_LOW_MASK, _MID_MASK, _HIGH_MASK))
+    suits = sum(1 for suit in SUITS if mask & SUIT_MASKS[suit])
+    return ((low * (_MAX_COUNT + 1) + mid) * (_MAX_COUNT + 1) + high) * (len(SUITS) + 1) + suits
+
+def choose_opening_card(hand: Sequence['Card'], policy: int) -> int:
+    """Index of the numeric card policy places next, or -1 if there is none.
+    Ties go to the earliest card in hand."""
+    numeric = [(i, card) for i, card in enumerate(hand) if card.is_numeric()]
+    if not numeric:
+        return -1
+    name = OPENING_POLICIES[policy] if 0 <= policy < len(OPENING_POLICIES) else OPENING_POLICIES[DEFAULT_OPENING_POLICY]
+    if name == "lowest":
+        return min(numeric, key=lambda entry: entry[1].value)[0]
+    if name == "middle":
+        return min(numeric, key=lambda entry: abs(entry[1].value - 6))[0]
+    if name == "suited":
+        suit_counts: Dict[str, int] = {}
+        for _, card in numeric:
+            suit_counts[card.suit] = suit_counts.get(card.suit, 0) + 1
+        return max(numeric, key=lambda entry: (suit_counts[entry[1].suit], entry[1].value))[0]
+    return max(numeric, key=lambda entry: entry[1].value)[0]
+
+class OpeningBook:
+    """Read-only, memory-mapped opening book: a header followed by one policy
+    id byte per opening key (NO_ENTRY where self-play found no clear winner)."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as book_file:
+            self._map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_policies = _BOOK_HEADER.unpack_from(self._map, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION or num_policies > len(OPENING_POLICIES):
+            self._map.close()
+            raise ValueError(f"{path} is not a compatible opening book.")
+        if len(self._map) != _BOOK_HEADER.size + NUM_OPENING_KEYS:
+            self._map.close()
+            raise ValueError(f"{path} has the wrong size for an opening book.")
+
+    def lookup(self, key: int) -> Optional[int]:
+        policy = self._map[_BOOK_HEADER.size + key]
+        return None if policy == NO_ENTRY else policy
+
+    def close(self):
+        self._map.close()
+
+_BOOK: Optional[OpeningBook] = None
+_BOOK_LOADED = False
+
+def get_opening_book(path: str = OPENING_BOOK_FILE) -> Optional[OpeningBook]:
+    """The shared opening book, opened on first use; None if there is none."""
+    global _BOOK, _BOOK_LOADED
+    if not _BOOK_LOADED:
+        _BOOK_LOADED = True
+        if os.path.exists(path):
+            try:
+                _BOOK = OpeningBook(path)
+            except (OSError, ValueError) as e:
+                debug.log_error("Ignoring opening book {}: {}", path, e)
+    return _BOOK
+
+def opening_policy_for(player: 'Player') -> int:
+    book = get_opening_book()
+    policy = book.lookup(opening_key(player)) if book else None
+    return DEFAULT_OPENING_POLICY if policy is None else policy
+
+def _rate_variance(score: float, games: int) -> float:
+    rate = score / games
+    return max(rate * (1.0 - rate), 0.25 / games) / games
+
+def edge_lower_bound(score: float, games: int, default_score: float, default_games: int,
+                     z: float = OPENING_BOOK_CONFIDENCE_Z) -> float:
+    """Lower confidence bound of a policy's win rate minus the default's."""
+    edge = score / games - default_score / default_games
+    return edge - z * math.sqrt(_rate_variance(score, games) + _rate_variance(default_score, default_games))
+
+def encode_book(stats: Dict[int, List[List[float]]], min_games: int = OPENING_BOOK_MIN_GAMES,
+                min_edge: float = OPENING_BOOK_MIN_EDGE, z: float = OPENING_BOOK_CONFIDENCE_Z) -> bytes:
+    """stats maps an opening key to [score, games] per policy. A key gets an
+    entry only when, with at least min_games games for it and the default,
+    some policy's gain over the default has a lower confidence bound (z
+    standard errors) above min_edge; the largest bound wins."""
+    entries = bytearray([NO_ENTRY]) * NUM_OPENING_KEYS
+    for key, per_policy in stats.items():
+        default_score, default_games = per_policy[DEFAULT_OPENING_POLICY]
+        if default_games < min_games:
+            continue
+        best_policy, best_bound = None, min_edge
+        for policy, (score, games) in enumerate(per_policy):
+            if policy == DEFAULT_OPENING_POLICY or games < min_games:
+                continue
+            bound = edge_lower_bound(score, games, default_score, default_games, z)
+            if bound > best_bound:
+                best_policy, best_bound = policy, bound
+        if best_policy is not None:
+            entries[key] = best_policy
+    return _BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(OPENING_POLICIES)) + bytes(entries)
+
+def _init_worker():
+    debug.configure(default_level=debug.ERROR)
+    RECORDER.enabled = False
+
+def _play_openings(seeds: Sequence[int], max_actions: int) -> List[Tuple[int, int, float]]:
+    """Self-play games in which each seat opens with a random policy; returns
+    (opening key, policy, score) per seat and game."""
+    from headless import HeadlessGame
+
+    rows = []
+    for seed in seeds:
+        rng = random.Random(seed)
+        game = HeadlessGame(seed=seed, ai_difficulty=1, questions=False)
+        players = game.game_state.players
+        for player in players:
+            player.opening_policy = rng.randrange(len(OPENING_POLICIES))
+        keys = [opening_key(player) for player in players]
+        game.play_to_end(max_actions)
+        game_state = game.game_state
+        if not game_state.game_over:
+            continue
+        for seat, player in enumerate(players):
+            score = 0.5 if game_state.winner is None else float(game_state.winner is player)
+            rows.append((keys[seat], player.opening_policy, score))
+    return rows
+
+def generate(num_games: int, workers: int, seed: int = 0, max_actions: int = 600,
+             chunk_size: int = 200) -> Dict[int, List[List[float]]]:
+    stats: Dict[int, List[List[float]]] = {}
+    chunks = [range(start, min(start + chunk_size, seed + num_games)) for start in range(seed, seed + num_games, chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for rows in pool.map(_play_openings, chunks, [max_actions] * len(chunks)):
+            for key, policy, score in rows:
+                per_policy = stats.setdefault(key, [[0.0, 0] for _ in OPENING_POLICIES])
+                per_policy[policy][0] += score
+                per_policy[policy][1] += 1
+    return stats
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Build the setup-phase opening book from self-play.")
+    parser.add_argument("--games", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-games", type=int, default=OPENING_BOOK_MIN_GAMES)
+    parser.add_argument("--min-edge", type=float, default=OPENING_BOOK_MIN_EDGE)
+    parser.add_argument("--z", type=float, default=OPENING_BOOK_CONFIDENCE_Z,
+                        help="Standard errors a policy's gain must clear before it is booked.")
+    parser.add_argument("--out", default=OPENING_BOOK_FILE)
+    args = parser.parse_args(argv)
+
+    debug.configure(default_level=debug.WARNING)
+    start = time.perf_counter()
+    stats = generate(args.games, args.workers or os.cpu_count() or 1, args.seed)
+    data = encode_book(stats, args.min_games, args.min_edge, args.z)
+    tmp_path = args.out + ".tmp"
+    with open(tmp_path, "wb") as book_file:
+        book_file.write(data)
+    os.replace(tmp_path, args.out)
+
+    totals = [[0.0, 0] for _ in OPENING_POLICIES]
+    for per_policy in stats.values():
+        for total, (score, games) in zip(totals, per_policy):
+            total[0] += score
+            total[1] += games
+    entries = data[_BOOK_HEADER.size:]
+    print(f"{args.games} games in {time.perf_counter() - start:.0f}s, {len(stats)} opening keys seen, "
+          f"{sum(1 for entry in entries if entry != NO_ENTRY)} book entries written to {args.out}")
+    for name, (score, games), policy in zip(OPENING_POLICIES, totals, range(len(OPENING_POLICIES))):
+        rate = score / games if games else 0.0
+        print(f"  {name:<8} {games:>7} openings  win rate {rate:.3f}  "
+              f"book entries {sum(1 for entry in entries if entry == policy)}")
+
+if __name__ == "__main__":
+    main()
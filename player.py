@@ -1,41 +1,64 @@
 # filename: player.py
 import random
 import debug
+from flight_recorder import RECORDER, seat_of
 import copy
-from config import (
-    NUM_CARAVANS, STARTING_HAND_SIZE, HAND_SIZE_LIMIT, STANDARD_DECK_COMPOSITION,
-    CARAVAN_WIN_MAX, CARAVAN_WIN_MIN,
-    SCORE_WIN_LANE_WITH_KING, SCORE_WIN_LANE, SCORE_BREAK_OPPONENT_WINNING_LANE,
-    SCORE_SETUP_WIN, SCORE_MAJOR_DISRUPTION, SCORE_FLEXIBILITY_BONUS,
-    SCORE_KING_PROGRESS, SCORE_BASIC_PROGRESS, SCORE_QUEEN_SYNERGY_PER_CARD,
-    UTILITY_VALUE_QUEEN, UTILITY_VALUE_JACK, UTILITY_VALUE_KING,
-    CHEAT_PROPHECY_SCORE_BONUS
-)
+from config import CHEAT_PROPHECY_SCORE_BONUS, LANE_ODDS_MAX_PLAYS
+from ai_profile import AIProfile, DEFAULT_AI_PROFILE
 from caravan import Caravan
-from card import Card
+from card import Card, card_from_index
+from card_set import CardList, NUMERIC_MASK, as_card_list
+from lane_odds import cached_lane_probability
+from opening_book import choose_opening_card, opening_policy_for
+from rules import RulesVariant, STANDARD_RULES
 from typing import TYPE_CHECKING, Dict, Any, List, Optional, Set
 
 if TYPE_CHECKING:
     from game_state import GameState
+    from ai_strategies import AIStrategy
 
 class Player:
-    def __init__(self, name: str, is_ai: bool = False, ai_difficulty: int = 0):
+    def __init__(self, name: str, is_ai: bool = False, ai_difficulty: int = 0,
+                 ai_profile: Optional[AIProfile] = None, deck: Optional[List[Card]] = None,
+                 rules: Optional[RulesVariant] = None):
         self.name = name
+        self.rules: RulesVariant = rules or STANDARD_RULES
         self.is_ai = is_ai
         self.ai_difficulty = ai_difficulty
-        self.hand: List[Card] = []
-        self.caravans: List[Caravan] = [Caravan() for _ in range(NUM_CARAVANS)]
-        self.deck: List[Card] = self._create_own_deck()
-        if not self.deck:
+        self.ai_profile: AIProfile = ai_profile or DEFAULT_AI_PROFILE
+        self.strategy: Optional['AIStrategy'] = None
+        self.opening_policy: Optional[int] = None  # forces an opening_book policy; None consults the book
+        self.hand = []
+        self.caravans: List[Caravan] = [Caravan(self.rules) for _ in range(self.rules.num_caravans)]
+        self.deck = deck if deck is not None else self._create_own_deck()
+        if not self.deck and deck is None:
             raise RuntimeError(f"Deck creation failed for player {self.name}")
 
-    def _create_own_deck(self) -> List[Card]:
-        new_deck: List[Card] = [Card(spec['rank'], spec['suit']) for spec in STANDARD_DECK_COMPOSITION]
-        random.shuffle(new_deck)
+    # Hand and deck are CardLists, so their card_set bitsets stay in step with
+    # every mutation; assigning a plain list wraps it.
+    @property
+    def hand(self) -> CardList:
+        return self._hand
+
+    @hand.setter
+    def hand(self, cards: List[Card]):
+        self._hand = as_card_list(cards)
+
+    @property
+    def deck(self) -> CardList:
+        return self._deck
+
+    @deck.setter
+    def deck(self, cards: List[Card]):
+        self._deck = as_card_list(cards)
+
+    def _create_own_deck(self, rng: Optional[random.Random] = None) -> List[Card]:
+        new_deck: List[Card] = [card_from_index(index) for index in self.rules.deck_indices]
+        (rng or random).shuffle(new_deck)
         return new_deck
 
     def draw_card(self) -> bool:
-        if self.deck and len(self.hand) < HAND_SIZE_LIMIT:
+        if self.deck and len(self.hand) < self.rules.hand_size_limit:
             card = self.deck.pop()
             self.hand.append(card)
             return True
@@ -43,7 +66,7 @@ class Player:
 
     def deal_starting_hand(self):
         self.hand = []
-        for _ in range(STARTING_HAND_SIZE):
+        for _ in range(self.rules.starting_hand_size):
             if not self.draw_card():
                 break
 
@@ -54,6 +77,10 @@ class Player:
 
         possible_actions: List[Dict[str, Any]] = []
         unseen_cards = game_state.get_unseen_cards()
+        weights = self.ai_profile
+        rules = self.rules
+        win_min, win_max = rules.win_min, rules.win_max
+        lane_pool = self.hand.card_set.mask | self.deck.card_set.mask
 
         if self.ai_difficulty == 0 and self.deck:
             top_card = self.deck[-1]
@@ -85,6 +112,7 @@ class Player:
 
         for card_index, card in enumerate(self.hand):
             if card.is_numeric():
+                card_pool = lane_pool & ~(1 << card.index)  # the follow-up plays cannot draw this card again
                 for caravan_index, my_caravan in enumerate(self.caravans):
                     if game_state.is_caravan_sold_by_player(self, caravan_index) or not my_caravan.can_add_numeric(card):
                         continue
@@ -92,28 +120,31 @@ class Player:
                     sim_caravan = my_caravan.deep_copy()
                     sim_caravan.add_card(card)
                     new_total = sim_caravan.total()
-                    if new_total > CARAVAN_WIN_MAX: continue
+                    if new_total > win_max: continue
 
                     score = 0
                     opponent_caravan = opponent.caravans[caravan_index]
-                    if CARAVAN_WIN_MIN <= new_total <= CARAVAN_WIN_MAX and new_total > opponent_caravan.total():
-                        score = SCORE_WIN_LANE + new_total
-                    elif CARAVAN_WIN_MIN <= new_total <= CARAVAN_WIN_MAX:
-                        score = SCORE_SETUP_WIN + new_total
+                    if win_min <= new_total <= win_max and new_total > opponent_caravan.total():
+                        score = weights.score_win_lane + new_total
+                    elif win_min <= new_total <= win_max:
+                        score = weights.score_setup_win + new_total
                     else:
-                        score = SCORE_BASIC_PROGRESS + new_total
+                        score = weights.score_basic_progress + new_total
+                        if weights.score_lane_odds:
+                            score += weights.score_lane_odds * cached_lane_probability(card_pool, sim_caravan, LANE_ODDS_MAX_PLAYS,
+                                                                                       win_min, win_max)
 
                     last_num, _ = my_caravan.get_last_numeric_card_info()
                     if last_num and card.suit == my_caravan.suit:
                         is_ascending = my_caravan.direction == "up" and card.value > last_num.value
                         is_descending = my_caravan.direction == "down" and card.value < last_num.value
                         if not (is_ascending or is_descending):
-                            score += SCORE_FLEXIBILITY_BONUS
+                            score += weights.score_flexibility_bonus
 
                     if score > 0:
                         possible_actions.append({"score": score, "action": {"type": "play_card", "card_index": card_index, "target_player": self, "target_caravan_index": caravan_index}})
 
-            elif card.is_face_card():
+            elif card.is_face_card() and card.rank in rules.face_effects:
                 target_map = {
                     "king": [self],
                     "jack": [opponent],
@@ -129,12 +160,12 @@ class Player:
                             last_num, _ = target_caravan.get_last_numeric_card_info()
                             if last_num:
                                 new_total = target_caravan.total() + last_num.value
-                                if new_total > CARAVAN_WIN_MAX: continue
+                                if new_total > win_max: continue
                                 op_caravan = opponent.caravans[caravan_index]
-                                if CARAVAN_WIN_MIN <= new_total <= CARAVAN_WIN_MAX and new_total > op_caravan.total():
-                                    score = SCORE_WIN_LANE_WITH_KING + new_total
+                                if win_min <= new_total <= win_max and new_total > op_caravan.total():
+                                    score = weights.score_win_lane_with_king + new_total
                                 else:
-                                    score = SCORE_KING_PROGRESS + last_num.value
+                                    score = weights.score_king_progress + last_num.value
 
                         elif card.rank == "jack":
                             op_total_before = target_caravan.total()
@@ -143,29 +174,29 @@ class Player:
                             sim_caravan.cards = sim_caravan.cards[:last_num_idx]
                             points_removed = op_total_before - sim_caravan.total()
 
-                            if CARAVAN_WIN_MIN <= op_total_before <= CARAVAN_WIN_MAX:
-                                score = SCORE_BREAK_OPPONENT_WINNING_LANE + points_removed
+                            if win_min <= op_total_before <= win_max:
+                                score = weights.score_break_opponent_winning_lane + points_removed
                             else:
-                                score = SCORE_MAJOR_DISRUPTION + points_removed
+                                score = weights.score_major_disruption + points_removed
 
                         elif card.rank == "queen":
-                            my_synergy_cards = sum(1 for c in self.hand if c.is_numeric() and c.suit == card.suit)
+                            my_synergy_cards = self.hand.card_set.count_suit(card.suit, NUMERIC_MASK)
                             op_denial_count = 0
-                            if self.ai_difficulty <= 1:
-                                op_hand_sim = [c for c in unseen_cards if c.is_numeric()] # Approximation
-                                op_denial_count = sum(1 for c in op_hand_sim if c.suit != card.suit) / len(unseen_cards) * len(opponent.hand)
+                            if self.ai_difficulty <= 1 and unseen_cards:
+                                unseen = game_state.unseen # Approximation of the opponent's hand
+                                op_denial_count = (unseen.count(NUMERIC_MASK) - unseen.count_suit(card.suit, NUMERIC_MASK)) / len(unseen_cards) * len(opponent.hand)
 
-                            score = target_caravan.total() + (my_synergy_cards * SCORE_QUEEN_SYNERGY_PER_CARD) + (op_denial_count * 10)
+                            score = target_caravan.total() + (my_synergy_cards * weights.score_queen_synergy_per_card) + (op_denial_count * weights.score_queen_denial_per_card)
 
                         if score > 0:
                             possible_actions.append({"score": score, "action": {"type": "play_card", "card_index": card_index, "target_player": target_player, "target_caravan_index": caravan_index}})
 
         if not any(a['action']['type'] == 'discard_caravan' for a in possible_actions):
             for i, caravan in enumerate(self.caravans):
-                if caravan.cards and caravan.total() > CARAVAN_WIN_MAX and not game_state.is_caravan_sold_by_anyone(self, i):
-                    possible_actions.append({'score': 15, 'action': {'type': 'discard_caravan', 'caravan_index': i}})
+                if caravan.cards and caravan.total() > win_max and not game_state.is_caravan_sold_by_anyone(self, i):
+                    possible_actions.append({'score': weights.score_discard_busted_caravan, 'action': {'type': 'discard_caravan', 'caravan_index': i}})
 
-        if len(self.hand) >= HAND_SIZE_LIMIT or not possible_actions:
+        if len(self.hand) >= rules.hand_size_limit or not possible_actions:
             card_to_discard_idx, lowest_potential = -1, 9999
             my_caravan_suits = {c.suit for c in self.caravans if c.suit}
 
@@ -173,17 +204,17 @@ class Player:
                 potential = 0
                 if card.is_numeric():
                     potential = card.value
-                    if card.suit in my_caravan_suits: potential += 20
-                elif card.rank == "king": potential = UTILITY_VALUE_KING
-                elif card.rank == "queen": potential = UTILITY_VALUE_QUEEN
-                elif card.rank == "jack": potential = UTILITY_VALUE_JACK
+                    if card.suit in my_caravan_suits: potential += weights.utility_suit_match_bonus
+                elif card.rank == "king": potential = weights.utility_value_king
+                elif card.rank == "queen": potential = weights.utility_value_queen
+                elif card.rank == "jack": potential = weights.utility_value_jack
 
                 if potential < lowest_potential:
                     lowest_potential = potential
                     card_to_discard_idx = idx
 
             if card_to_discard_idx != -1:
-                score = 5 if not possible_actions else 25
+                score = weights.score_discard_card_no_other_move if not possible_actions else weights.score_discard_card
                 possible_actions.append({"score": score, "action": {"type": "discard_card", "card_index": card_to_discard_idx}})
 
         if not possible_actions:
@@ -199,16 +230,24 @@ class Player:
         chosen_index = max(0, chosen_index)
 
         selected_action_info = possible_actions[chosen_index]
-        debug.log_ai(f"AI ({self.name}) Chose action (Score: {selected_action_info['score']:.1f}): {selected_action_info['action']}")
+        debug.log_ai("AI ({}) Chose action (Score: {:.1f}): {}", self.name, selected_action_info['score'], selected_action_info['action'])
+        if RECORDER.enabled:
+            chosen = selected_action_info["action"]
+            RECORDER.record_ai_decision(seat_of(game_state.players, self), chosen,
+                                        seat_of(game_state.players, chosen.get("target_player", self)),
+                                        selected_action_info["score"], len(possible_actions))
         return selected_action_info["action"]
 
+    def get_ai_setup_action(self) -> Dict[str, Any]:
+        card_idx = self.get_ai_initial_card()
+        empty_caravan_idx = next((i for i, c in enumerate(self.caravans) if not c.cards), -1)
+        if card_idx == -1 or empty_caravan_idx == -1:
+            return {"type": "pass"}
+        return {"type": "place_initial_card", "card_index": card_idx, "caravan_index": empty_caravan_idx}
+
     def get_ai_initial_card(self) -> int:
-        best_idx, highest_val = -1, -1
-        for i, card in enumerate(self.hand):
-            if card.is_numeric() and card.value > highest_val:
-                highest_val = card.value
-                best_idx = i
-        return best_idx
+        policy = self.opening_policy if self.opening_policy is not None else opening_policy_for(self)
+        return choose_opening_card(self.hand, policy)
 
     def __repr__(self) -> str:
         return f"Player(Name='{self.name}', AI={self.is_ai}, Hand:{len(self.hand)}, Deck:{len(self.deck)})"
\ No newline at end of file
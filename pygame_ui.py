@@ -12,6 +12,12 @@ from game_pygame import *
 import fnmatch
 from os import walk
 import keyboard
+from lane_odds import player_lane_odds
+from text_layout import TextLayout, layout_text, fit_text, clear_layout_cache
+from hit_test import (
+    HitTestIndex, LAYER_CARAVANS, LAYER_HAND, LAYER_BUTTONS, LAYER_BONUS_POINT,
+    LAYER_POPUP, LAYER_TUTORIAL
+)
 global_rankein=0
 
 from typing import TYPE_CHECKING, Union, Tuple, List, Dict, Any, Optional
@@ -20,6 +26,7 @@ if TYPE_CHECKING:
     from player import Player
     from caravan import Caravan
     from game_pygame import GameController
+    from frame_profiler import FrameProfiler
 
 try:
     pygame.font.init()
@@ -46,6 +53,21 @@ CARD_BACK_IMAGE: Optional[pygame.Surface] = None
 BACKGROUND_IMAGE: Optional[pygame.Surface] = None
 BONUS_POINT_SURFACE: Optional[pygame.Surface] = None
 TUTORIAL_IMAGES: List[pygame.Surface] = []
+CARAVAN_SURFACE_CACHE: Dict[Tuple[int, int], Tuple[Any, ...]] = {}
+DIM_OVERLAY_CACHE: Dict[Tuple[Tuple[int, int], int], pygame.Surface] = {}
+QUESTION_POPUP_CACHE: Dict[Any, Tuple[pygame.Surface, List[Dict[str, Any]]]] = {}
+
+def _tutorial_nav_rect(center_x: int) -> pygame.Rect:
+    nav_rect = pygame.Rect(0, 0, TUTORIAL_BTN_WIDTH, TUTORIAL_BTN_HEIGHT)
+    nav_rect.center = (center_x, TUTORIAL_NAV_Y)
+    return nav_rect
+
+TUTORIAL_NAV_RECTS: Dict[str, pygame.Rect] = {
+    'prev': _tutorial_nav_rect(TUTORIAL_PREV_BTN_CENTER_X),
+    'next': _tutorial_nav_rect(TUTORIAL_NEXT_BTN_CENTER_X),
+    'close': _tutorial_nav_rect(TUTORIAL_CLOSE_BTN_CENTER_X),
+}
+BUTTON_RECTS: Dict[str, pygame.Rect] = {}
 
 def get_card_filename(card: 'Card') -> str:
     rank_str = card.rank.lower()
@@ -79,6 +101,9 @@ def find_files(filename_pattern, search_path):
 
 def load_assets() -> Tuple[Optional[pygame.Surface], Dict[str, pygame.Surface], Optional[pygame.Surface], List[pygame.Surface]]:
     global CARD_IMAGES, CARD_BACK_IMAGE, BACKGROUND_IMAGE, BONUS_POINT_SURFACE, TUTORIAL_IMAGES
+    CARAVAN_SURFACE_CACHE.clear()
+    QUESTION_POPUP_CACHE.clear()
+    clear_layout_cache()
     CARD_IMAGES = {}
     CARD_BACK_IMAGE = None
     BACKGROUND_IMAGE = None
@@ -208,6 +233,24 @@ def draw_text(surface: pygame.Surface, text: str, font: pygame.font.Font, color:
     except Exception as e:
         debug.log_warning("Error rendering text '{}...': {}", text[:30], e)
 
+def draw_text_layout(surface: pygame.Surface, layout: TextLayout, font: pygame.font.Font, color: pygame.Color,
+                     position: tuple[int, int], center_aligned=True, shadow=False,
+                     shadow_color=BLACK, shadow_offset=(1,1)):
+    x, y = position
+    for i, text_line in enumerate(layout.lines):
+        if text_line:
+            draw_text(surface, text_line, font, color, (x, y + i * layout.line_height),
+                      center_aligned=center_aligned, shadow=shadow,
+                      shadow_color=shadow_color, shadow_offset=shadow_offset)
+
+def draw_wrapped_text(surface: pygame.Surface, text: str, font: pygame.font.Font, color: pygame.Color,
+                      rect: pygame.Rect, shadow=False, shadow_color=BLACK) -> TextLayout:
+    layout = fit_text(text, font, max(1, rect.width), max(font.get_linesize(), rect.height))
+    first_line_center_y = rect.centery - layout.height // 2 + layout.line_height // 2
+    draw_text_layout(surface, layout, font, color, (rect.centerx, first_line_center_y),
+                     center_aligned=True, shadow=shadow, shadow_color=shadow_color)
+    return layout
+
 def get_card_image(card: Optional['Card']) -> Optional[pygame.Surface]:
     global CARD_IMAGES, CARD_BACK_IMAGE, BONUS_POINT_SURFACE
     if card is None:
@@ -223,6 +266,12 @@ def get_card_image(card: Optional['Card']) -> Optional[pygame.Surface]:
 def create_button_rect(position: tuple[int, int], width=BUTTON_WIDTH, height=BUTTON_HEIGHT) -> pygame.Rect:
     return pygame.Rect(position[0], position[1], width, height)
 
+def _get_button_rect(name: str, position: tuple[int, int]) -> pygame.Rect:
+    button_rect = BUTTON_RECTS.get(name)
+    if button_rect is None:
+        button_rect = BUTTON_RECTS[name] = create_button_rect(position)
+    return button_rect
+
 def draw_button(surface: pygame.Surface, rect: pygame.Rect, text: str, font: pygame.font.Font,
                 base_color=LIGHT_GRAY, text_color=BLACK, border_color=BLACK, enabled=True,
                 disabled_color=DARK_GRAY, disabled_text_color=pygame.Color(160,160,160)):
@@ -231,56 +280,65 @@ def draw_button(surface: pygame.Surface, rect: pygame.Rect, text: str, font: pyg
     try:
         pygame.draw.rect(surface, current_base_color, rect, border_radius=5)
         pygame.draw.rect(surface, border_color, rect, 2, border_radius=5)
-        draw_text(surface, text, font, current_text_color, rect.center, center_aligned=True)
+        draw_wrapped_text(surface, text, font, current_text_color, rect.inflate(-12, -4))
     except Exception as e:
         debug.log_warning("Error drawing button '{}': {}", text, e)
 
-def draw_question_popup(surface: pygame.Surface, game_state: 'GameState', ui_state: dict):
-    if not game_state.question_popup_active or not game_state.current_question_data:
-        return
-    overlay_surface = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
-    overlay_surface.fill((0, 0, 0, 190))
-    surface.blit(overlay_surface, (0, 0))
-    pygame.draw.rect(surface, DARK_GRAY, QUESTION_POPUP_RECT, border_radius=10)
-    pygame.draw.rect(surface, WHITE, QUESTION_POPUP_RECT, 3, border_radius=10)
-    q_data = game_state.current_question_data
+def get_dim_overlay(size: Tuple[int, int], alpha: int) -> pygame.Surface:
+    key = (tuple(size), alpha)
+    overlay = DIM_OVERLAY_CACHE.get(key)
+    if overlay is None:
+        overlay = pygame.Surface(key[0], pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, alpha))
+        DIM_OVERLAY_CACHE[key] = overlay
+    return overlay
+
+def _compose_question_popup(q_data: Dict[str, Any]) -> Tuple[pygame.Surface, List[Dict[str, Any]]]:
+    popup_surface = pygame.Surface(QUESTION_POPUP_RECT.size, pygame.SRCALPHA)
+    local_rect = popup_surface.get_rect()
+    pygame.draw.rect(popup_surface, DARK_GRAY, local_rect, border_radius=10)
+    pygame.draw.rect(popup_surface, WHITE, local_rect, 3, border_radius=10)
     question_render_area = pygame.Rect(
-        QUESTION_POPUP_RECT.x + 25, QUESTION_POPUP_RECT.y + 25,
+        25, 25,
         QUESTION_POPUP_RECT.width - 50,
         QUESTION_POPUP_RECT.height * QUESTION_TEXT_AREA_HEIGHT_RATIO - 20
     )
-    words = q_data["question"].split(' ')
-    lines_of_text = []
-    current_line_text = ""
     line_spacing = FONT_MEDIUM.get_linesize()
-    for word in words:
-        test_line = current_line_text + word + " "
-        if FONT_MEDIUM.size(test_line)[0] < question_render_area.width:
-            current_line_text = test_line
-        else:
-            lines_of_text.append(current_line_text.strip())
-            current_line_text = word + " "
-    lines_of_text.append(current_line_text.strip())
-    current_line_y_pos = question_render_area.y + 10
-    for text_line in lines_of_text:
-        if text_line:
-            draw_text(surface, text_line, FONT_MEDIUM, WHITE,
-                      (question_render_area.centerx, current_line_y_pos + FONT_MEDIUM.get_height() // 2),
-                      center_aligned=True, shadow=True)
-            current_line_y_pos += line_spacing
-            if current_line_y_pos > question_render_area.bottom - line_spacing:
-                break
-    ui_state["clickable_rects"]["question_options"] = []
+    max_question_lines = max(1, int(question_render_area.height - 10) // line_spacing)
+    question_layout = layout_text(q_data["question"], FONT_MEDIUM, question_render_area.width, max_question_lines)
+    draw_text_layout(popup_surface, question_layout, FONT_MEDIUM, WHITE,
+                     (question_render_area.centerx, question_render_area.y + 10 + FONT_MEDIUM.get_height() // 2),
+                     center_aligned=True, shadow=True)
+    option_items: List[Dict[str, Any]] = []
     options_area_start_y = question_render_area.bottom + 20
     option_button_width = QUESTION_POPUP_RECT.width * 0.80
     for i, option_text_full in enumerate(q_data["options"]):
-        option_rect = pygame.Rect(
-            QUESTION_POPUP_RECT.centerx - option_button_width // 2,
+        local_option_rect = pygame.Rect(
+            local_rect.centerx - option_button_width // 2,
             options_area_start_y + i * (QUESTION_OPTION_HEIGHT + QUESTION_OPTION_MARGIN),
             option_button_width, QUESTION_OPTION_HEIGHT
         )
-        ui_state["clickable_rects"]["question_options"].append({"index": i, "rect": option_rect, "text": option_text_full})
-        draw_button(surface, option_rect, option_text_full, FONT_SMALL, enabled=True)
+        draw_button(popup_surface, local_option_rect, option_text_full, FONT_SMALL, enabled=True)
+        option_items.append({"index": i, "rect": local_option_rect.move(QUESTION_POPUP_RECT.topleft), "text": option_text_full})
+    return popup_surface, option_items
+
+def draw_question_popup(surface: pygame.Surface, game_state: 'GameState', ui_state: dict):
+    if not game_state.question_popup_active or not game_state.current_question_data:
+        return
+    q_data = game_state.current_question_data
+    cache_key = q_data.get("id", q_data["question"])
+    cached = QUESTION_POPUP_CACHE.get(cache_key)
+    if cached is None:
+        cached = _compose_question_popup(q_data)
+        QUESTION_POPUP_CACHE[cache_key] = cached
+    popup_surface, option_items = cached
+    surface.blit(get_dim_overlay(surface.get_size(), 190), (0, 0))
+    surface.blit(popup_surface, QUESTION_POPUP_RECT.topleft)
+    hit_index: HitTestIndex = ui_state["hit_index"]
+    for option_item in option_items:
+        hit_index.place("question_options", option_item["index"], option_item["rect"],
+                        LAYER_POPUP + option_item["index"], option_item)
+    hit_index.truncate("question_options", len(option_items))
     if game_state.question_feedback:
         feedback_area_y = QUESTION_POPUP_RECT.bottom - QUESTION_FEEDBACK_AREA_HEIGHT - 15
         feedback_rect = pygame.Rect(
@@ -295,9 +353,7 @@ def draw_tutorial_overlay(surface: pygame.Surface, current_image_index: int,
                           tutorial_nav_rects: Dict[str, pygame.Rect]):
     global TUTORIAL_IMAGES
 
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200))
-    surface.blit(overlay, (0, 0))
+    surface.blit(get_dim_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), 200), (0, 0))
 
     if TUTORIAL_IMAGES and 0 <= current_image_index < len(TUTORIAL_IMAGES):
         current_img_surface = TUTORIAL_IMAGES[current_image_index]
@@ -319,6 +375,41 @@ def draw_tutorial_overlay(surface: pygame.Surface, current_image_index: int,
         draw_text(surface, "Tutorial Image Error!", FONT_LARGE, RED,
                   (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), shadow=True)
 
+def draw_profiler_overlay(surface: pygame.Surface, profiler: 'FrameProfiler'):
+    stats = profiler.summary()
+    lines = [
+        f"FPS {stats['fps']:.1f}  ({int(stats['frames'])} frames)",
+        f"frame p50/p95/p99 {stats['frame_p50']:.1f}/{stats['frame_p95']:.1f}/{stats['frame_p99']:.1f} ms",
+        f"work  p50/p95/p99 {stats['work_p50']:.1f}/{stats['work_p95']:.1f}/{stats['work_p99']:.1f} ms",
+    ]
+    lines.extend(f"{phase:<8} mean {stats[phase + '_mean']:.2f}  p99 {stats[phase + '_p99']:.2f} ms"
+                 for phase in profiler.phases)
+    line_height = FONT_SMALL.get_linesize()
+    box_rect = pygame.Rect(PROFILER_OVERLAY_POS, (PROFILER_OVERLAY_WIDTH, line_height * len(lines) + 12))
+    surface.blit(get_dim_overlay(box_rect.size, 170), box_rect)
+    for i, text_line in enumerate(lines):
+        draw_text(surface, text_line, FONT_SMALL, WHITE, (box_rect.x + 8, box_rect.y + 6 + i * line_height),
+                  center_aligned=False)
+
+def draw_lane_odds_overlay(surface: pygame.Surface, player: 'Player'):
+    """Under each of player's caravans, the chance of reaching the win range
+    within LANE_ODDS_MAX_PLAYS more cards from the player's hand and deck."""
+    odds = player_lane_odds(player)
+    for i, caravan in enumerate(player.caravans):
+        total = caravan.total()
+        if CARAVAN_WIN_MIN <= total <= CARAVAN_WIN_MAX:
+            text_line = "In range"
+        elif total > CARAVAN_WIN_MAX:
+            text_line = "Bust"
+        else:
+            text_line = f"{CARAVAN_WIN_MIN}-{CARAVAN_WIN_MAX} in {LANE_ODDS_MAX_PLAYS}: " \
+                        f"{odds.lane_probability(caravan, LANE_ODDS_MAX_PLAYS):.0%}"
+        text_w, text_h = FONT_SMALL.size(text_line)
+        box_rect = pygame.Rect(0, 0, text_w + 12, text_h + 6)
+        box_rect.midtop = (CARAVAN_START_X + i * CARAVAN_SPACING + SCALED_CARD_WIDTH // 2, LANE_ODDS_HINT_Y)
+        surface.blit(get_dim_overlay(box_rect.size, 170), box_rect)
+        draw_text(surface, text_line, FONT_SMALL, WHITE, box_rect.center)
+
 def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspective_player: 'Player',
                     assets: dict, ui_state: dict, controller: 'GameController'):
     global CARD_IMAGES, CARD_BACK_IMAGE, BACKGROUND_IMAGE, BONUS_POINT_SURFACE, TUTORIAL_IMAGES
@@ -330,11 +421,7 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
     if BONUS_POINT_SURFACE is None:
         BONUS_POINT_SURFACE = get_card_image(Card('bonus_point', ''))
 
-    ui_state["clickable_rects"] = {
-        "hand": [], "p_caravans": [], "o_caravans": [],
-        "buttons": {}, "question_options": [], "active_bonus_point": None,
-        "tutorial_nav": {}
-    }
+    hit_index: HitTestIndex = ui_state["hit_index"]
     if BACKGROUND_IMAGE:
         surface.blit(BACKGROUND_IMAGE, (0, 0))
     else:
@@ -363,40 +450,23 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
             draw_text(surface, f"{len(opponent.deck)}", FONT_SMALL, WHITE, (o_deck_rect.centerx, o_deck_rect.top - 10), shadow=True)
             draw_text(surface, f"{opponent_name} Deck", FONT_SMALL, WHITE, (o_deck_rect.centerx, o_deck_rect.bottom + 12), shadow=True)
 
-    p_caravans_click_map: List[Dict[str, Any]] = []
-    o_caravans_click_map: List[Dict[str, Any]] = []
     for i in range(NUM_CARAVANS):
         caravan_x_pos = CARAVAN_START_X + i * CARAVAN_SPACING
         if i < len(perspective_player.caravans):
             p_caravan_obj = perspective_player.caravans[i]
-            p_clickable_rect = draw_caravan(surface, p_caravan_obj, (caravan_x_pos, PLAYER_CARAVAN_Y))
-            p_caravans_click_map.append({"index": i, "rect": p_clickable_rect, "owner": perspective_player})
-            p_total_val = p_caravan_obj.total()
-            val_text_y = PLAYER_CARAVAN_Y - 20
-            info_text_y = val_text_y - 18
-            suit_disp = p_caravan_obj.suit.title() if p_caravan_obj.suit else "---"
-            dir_disp = p_caravan_obj.direction.title() if p_caravan_obj.direction else "---"
-            draw_text(surface, f"S:{suit_disp} D:{dir_disp}", FONT_SMALL, WHITE, (p_clickable_rect.centerx, info_text_y), shadow=True)
-            draw_text(surface, f"Value: {p_total_val}", FONT_SMALL, WHITE, (p_clickable_rect.centerx, val_text_y), shadow=True)
-            if game_state.is_caravan_sold_by_player(perspective_player, i): pygame.draw.rect(surface, GOLD, p_clickable_rect.inflate(8,8), 3, border_radius=4)
-            elif p_caravan_obj.is_winning(): pygame.draw.rect(surface, GREEN, p_clickable_rect.inflate(8,8), 3, border_radius=4)
+            p_highlight = None
+            if game_state.is_caravan_sold_by_player(perspective_player, i): p_highlight = GOLD
+            elif p_caravan_obj.is_winning(): p_highlight = GREEN
+            p_clickable_rect = draw_caravan(surface, p_caravan_obj, (caravan_x_pos, PLAYER_CARAVAN_Y), p_highlight, labels_above=True)
+            hit_index.place("p_caravans", i, p_clickable_rect, LAYER_CARAVANS + i, perspective_player)
         if opponent and i < len(opponent.caravans):
             o_caravan_obj = opponent.caravans[i]
-            o_clickable_rect = draw_caravan(surface, o_caravan_obj, (caravan_x_pos, OPPONENT_CARAVAN_Y))
-            o_caravans_click_map.append({"index": i, "rect": o_clickable_rect, "owner": opponent})
-            o_total_val = o_caravan_obj.total()
-            base_text_y = o_clickable_rect.bottom + 12
-            info_text_y_op = base_text_y + 18
-            suit_disp_op = o_caravan_obj.suit.title() if o_caravan_obj.suit else "---"
-            dir_disp_op = o_caravan_obj.direction.title() if o_caravan_obj.direction else "---"
-            draw_text(surface, f"Value: {o_total_val}", FONT_SMALL, WHITE, (o_clickable_rect.centerx, base_text_y), shadow=True)
-            draw_text(surface, f"S:{suit_disp_op} D:{dir_disp_op}", FONT_SMALL, WHITE, (o_clickable_rect.centerx, info_text_y_op), shadow=True)
-            if game_state.is_caravan_sold_by_player(opponent, i): pygame.draw.rect(surface, GOLD, o_clickable_rect.inflate(8,8), 3, border_radius=4)
-            elif o_caravan_obj.is_winning(): pygame.draw.rect(surface, GREEN, o_clickable_rect.inflate(8,8), 3, border_radius=4)
-    ui_state["clickable_rects"]["p_caravans"] = p_caravans_click_map
-    ui_state["clickable_rects"]["o_caravans"] = o_caravans_click_map
-
-    hand_cards_ui_data: List[Dict[str, Any]] = []
+            o_highlight = None
+            if game_state.is_caravan_sold_by_player(opponent, i): o_highlight = GOLD
+            elif o_caravan_obj.is_winning(): o_highlight = GREEN
+            o_clickable_rect = draw_caravan(surface, o_caravan_obj, (caravan_x_pos, OPPONENT_CARAVAN_Y), o_highlight, labels_above=False)
+            hit_index.place("o_caravans", i, o_clickable_rect, LAYER_CARAVANS + i, opponent)
+
     card_being_animated = controller.animation_details['card_to_animate'] if controller.animation_details and controller.animation_details['is_active'] else None
     if perspective_player.hand:
         num_hand_cards = len(perspective_player.hand)
@@ -410,6 +480,7 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
         for i, card_in_hand in enumerate(perspective_player.hand):
             if card_being_animated and card_in_hand == card_being_animated and \
                controller.animation_details and controller.animation_details.get('player_who_initiated_action') == perspective_player:
+                hit_index.remove("hand", i)
                 continue
             card_img_surf = get_card_image(card_in_hand)
             if card_img_surf:
@@ -418,10 +489,12 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
                 is_this_card_selected = (ui_state.get("selected_card_index") == i and ui_state.get("selected_card_obj") == card_in_hand)
                 if is_this_card_selected: card_y -= 20
                 card_display_rect = card_img_surf.get_rect(topleft=(card_x, card_y))
-                hand_cards_ui_data.append({"index": i, "rect": card_display_rect, "card": card_in_hand})
+                hit_index.place("hand", i, card_display_rect, LAYER_HAND + i, card_in_hand)
                 if is_this_card_selected: pygame.draw.rect(surface, HIGHLIGHT_COLOR, card_display_rect.inflate(6,6), 3, border_radius=4)
                 surface.blit(card_img_surf, card_display_rect.topleft)
-    ui_state["clickable_rects"]["hand"] = hand_cards_ui_data
+            else:
+                hit_index.remove("hand", i)
+    hit_index.truncate("hand", len(perspective_player.hand))
 
     if controller.animation_details and controller.animation_details['is_active']:
         anim = controller.animation_details
@@ -435,9 +508,11 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
     if game_state.awaiting_bonus_point_placement and BONUS_POINT_SURFACE:
         bp_rect = BONUS_POINT_SURFACE.get_rect(center=BONUS_POINT_ACTIVE_POS)
         surface.blit(BONUS_POINT_SURFACE, bp_rect)
-        ui_state['clickable_rects']['active_bonus_point'] = bp_rect
+        hit_index.place("active_bonus_point", 0, bp_rect, LAYER_BONUS_POINT)
         if ui_state.get('bonus_point_selected'):
             pygame.draw.rect(surface, HIGHLIGHT_COLOR, bp_rect.inflate(6,6), 3, border_radius=4)
+    else:
+        hit_index.remove("active_bonus_point", 0)
 
     round_info_text = f"Round {game_state.turn_count + 1}"
     if game_state.is_setup_phase(): round_info_text = "Setup Phase"
@@ -450,7 +525,8 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
         status_text_to_show = f"{round_info_text} | {active_display_message}"
     if not (game_state.question_popup_active and current_player_on_turn == perspective_player and not perspective_player.is_ai) :
         if status_text_to_show:
-             draw_text(surface, status_text_to_show, FONT_MEDIUM, WHITE, TURN_INFO_POS, center_aligned=True, shadow=True)
+             status_layout = layout_text(status_text_to_show, FONT_MEDIUM, MESSAGE_TEXT_MAX_WIDTH, MESSAGE_TEXT_MAX_LINES)
+             draw_text_layout(surface, status_layout, FONT_MEDIUM, WHITE, TURN_INFO_POS, center_aligned=True, shadow=True)
 
     if opponent:
         p1_sold = game_state.get_sold_caravan_count(perspective_player)
@@ -462,7 +538,6 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
         p2_sold_pos_x = SCREEN_WIDTH - INFO_MARGIN - p2_text_width
         draw_text(surface, p2_sold_text, FONT_MEDIUM, WHITE, (p2_sold_pos_x, SOLD_COUNT_POS_P2[1]), center_aligned=False, shadow=True)
 
-    buttons_to_draw_this_frame: Dict[str, pygame.Rect] = {}
     buttons_generally_active = (is_human_player_turn and
                                not game_state.game_over and
                                not (game_state.question_popup_active and current_player_on_turn == perspective_player) and
@@ -470,21 +545,21 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
                                not game_state.awaiting_bonus_point_placement)
     can_discard_sel_card = buttons_generally_active and ui_state.get("selected_card_index") is not None and not game_state.is_setup_phase()
 
-    tut_btn_rect = create_button_rect(TUTORIAL_BUTTON_POS)
+    tut_btn_rect = _get_button_rect("show_tutorial", TUTORIAL_BUTTON_POS)
     draw_button(surface, tut_btn_rect, "Tutorial", FONT_SMALL, enabled=True)
-    buttons_to_draw_this_frame["show_tutorial"] = tut_btn_rect
+    hit_index.place("buttons", "show_tutorial", tut_btn_rect, LAYER_BUTTONS)
 
-    disc_card_btn_rect = create_button_rect(DISCARD_BUTTON_POS)
+    disc_card_btn_rect = _get_button_rect("discard_card", DISCARD_BUTTON_POS)
     draw_button(surface, disc_card_btn_rect, "Discard Card", FONT_SMALL, enabled=can_discard_sel_card)
-    buttons_to_draw_this_frame["discard_card"] = disc_card_btn_rect
+    hit_index.place("buttons", "discard_card", disc_card_btn_rect, LAYER_BUTTONS)
 
     can_player_discard_any_caravan = False
     if buttons_generally_active and not game_state.is_setup_phase():
         can_player_discard_any_caravan = any(c_obj.cards and not game_state.is_caravan_sold_by_player(perspective_player, idx)
                                              for idx, c_obj in enumerate(perspective_player.caravans))
-    disc_car_btn_rect = create_button_rect(DISCARD_CARAVAN_BUTTON_POS)
+    disc_car_btn_rect = _get_button_rect("discard_caravan", DISCARD_CARAVAN_BUTTON_POS)
     draw_button(surface, disc_car_btn_rect, "Discard Caravan", FONT_SMALL, enabled=can_player_discard_any_caravan)
-    buttons_to_draw_this_frame["discard_caravan"] = disc_car_btn_rect
+    hit_index.place("buttons", "discard_caravan", disc_car_btn_rect, LAYER_BUTTONS)
 
     pass_btn_active = buttons_generally_active
     if game_state.is_setup_phase() and buttons_generally_active:
@@ -493,28 +568,27 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
         if needs_to_place_on_empty and not has_numeric_to_play: pass_btn_active = True
         elif not needs_to_place_on_empty: pass_btn_active = True
         else: pass_btn_active = False
-    pass_btn_rect = create_button_rect(PASS_BUTTON_POS)
+    pass_btn_rect = _get_button_rect("pass", PASS_BUTTON_POS)
     draw_button(surface, pass_btn_rect, "Pass Turn", FONT_SMALL, enabled=pass_btn_active)
-    buttons_to_draw_this_frame["pass"] = pass_btn_rect
-
-    ui_state["clickable_rects"]["buttons"] = buttons_to_draw_this_frame
+    hit_index.place("buttons", "pass", pass_btn_rect, LAYER_BUTTONS)
 
     if game_state.game_over and not game_state.question_popup_active:
-        overlay_surf = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
-        overlay_surf.fill((0, 0, 0, 190))
-        surface.blit(overlay_surf, (0,0))
-        draw_text(surface, "GAME OVER", FONT_LARGE, GOLD, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60), shadow=True)
+        surface.blit(get_dim_overlay(surface.get_size(), 190), (0,0))
+        game_over_layout = layout_text("GAME OVER", FONT_LARGE, GAME_OVER_TEXT_MAX_WIDTH, 1)
+        draw_text_layout(surface, game_over_layout, FONT_LARGE, GOLD, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60), shadow=True)
         winner_text = "It's a Draw!"
         win_text_color = WHITE
         if game_state.winner:
             winner_text = f"{game_state.winner.name} Wins!"
             win_text_color = GOLD if game_state.winner == perspective_player else RED
-        draw_text(surface, winner_text, FONT_MEDIUM, win_text_color, WINNER_POS, shadow=True)
+        winner_layout = layout_text(winner_text, FONT_MEDIUM, GAME_OVER_TEXT_MAX_WIDTH, 2)
+        draw_text_layout(surface, winner_layout, FONT_MEDIUM, win_text_color, WINNER_POS, shadow=True)
 
-        restart_btn_rect_game_over = create_button_rect((SCREEN_WIDTH // .5 - BUTTON_WIDTH // 2, WINNER_POS[1] + 70))
+        restart_btn_rect_game_over = _get_button_rect("restart_game_over", (SCREEN_WIDTH // .5 - BUTTON_WIDTH // 2, WINNER_POS[1] + 70))
         draw_button(surface, restart_btn_rect_game_over, "Press space to restart.", FONT_MEDIUM, enabled=True)
-        if "buttons" not in ui_state["clickable_rects"]: ui_state["clickable_rects"]["buttons"] = {}
-        ui_state["clickable_rects"]["buttons"]["restart_game_over"] = restart_btn_rect_game_over
+        hit_index.place("buttons", "restart_game_over", restart_btn_rect_game_over, LAYER_BUTTONS)
+    else:
+        hit_index.remove("buttons", "restart_game_over")
 	#aaaaa
     global global_rankein
     if game_state.winner:
@@ -562,51 +636,70 @@ def draw_game_state(surface: pygame.Surface, game_state: 'GameState', perspectiv
         global_rankein = 1
     if game_state.question_popup_active and current_player_on_turn == perspective_player and not perspective_player.is_ai:
         draw_question_popup(surface, game_state, ui_state)
+    else:
+        hit_index.clear_group("question_options")
 
-    prev_btn_rect_tut = pygame.Rect(0, 0, TUTORIAL_BTN_WIDTH, TUTORIAL_BTN_HEIGHT)
-    prev_btn_rect_tut.center = (TUTORIAL_PREV_BTN_CENTER_X, TUTORIAL_NAV_Y)
-
-    next_btn_rect_tut = pygame.Rect(0, 0, TUTORIAL_BTN_WIDTH, TUTORIAL_BTN_HEIGHT)
-    next_btn_rect_tut.center = (TUTORIAL_NEXT_BTN_CENTER_X, TUTORIAL_NAV_Y)
-
-    close_btn_rect_tut = pygame.Rect(0, 0, TUTORIAL_BTN_WIDTH, TUTORIAL_BTN_HEIGHT)
-    close_btn_rect_tut.center = (TUTORIAL_CLOSE_BTN_CENTER_X, TUTORIAL_NAV_Y)
-
-    ui_state["clickable_rects"]["tutorial_nav"] = {
-        'prev': prev_btn_rect_tut,
-        'next': next_btn_rect_tut,
-        'close': close_btn_rect_tut
-    }
+    for nav_name, nav_rect in TUTORIAL_NAV_RECTS.items():
+        hit_index.place("tutorial_nav", nav_name, nav_rect, LAYER_TUTORIAL)
 
-def draw_caravan(surface: pygame.Surface, caravan: 'Caravan', position: tuple[int, int]) -> pygame.Rect:
-    x_start, y_start = position
+def _compose_caravan_surface(caravan: 'Caravan', highlight_color: Optional[pygame.Color],
+                             labels_above: bool) -> Tuple[pygame.Surface, Tuple[int, int], pygame.Rect]:
     placeholder_img = get_card_image(None)
-    base_rect = pygame.Rect(x_start, y_start, SCALED_CARD_WIDTH, SCALED_CARD_HEIGHT)
-    if placeholder_img:
-        base_rect = placeholder_img.get_rect(topleft=(x_start, y_start))
+    card_w = placeholder_img.get_width() if placeholder_img else SCALED_CARD_WIDTH
+    card_h = placeholder_img.get_height() if placeholder_img else SCALED_CARD_HEIGHT
+    stack_h = card_h + max(0, len(caravan.cards) - 1) * CARAVAN_CARD_Y_OFFSET
+
+    suit_disp = caravan.suit.title() if caravan.suit else "---"
+    dir_disp = caravan.direction.title() if caravan.direction else "---"
+    info_text = f"S:{suit_disp} D:{dir_disp}"
+    value_text = f"Value: {caravan.total()}"
+    label_w = max(FONT_SMALL.size(info_text)[0], FONT_SMALL.size(value_text)[0]) + 2
+    label_half_h = FONT_SMALL.get_height() // 2 + 2
+
+    pad_x = max(6, (label_w - card_w) // 2 + 1)
+    pad_top = 38 + label_half_h if labels_above else 6
+    pad_bottom = 6 if labels_above else 30 + label_half_h
+    lane_surface = pygame.Surface((card_w + 2 * pad_x, pad_top + stack_h + pad_bottom), pygame.SRCALPHA)
+    stack_rect = pygame.Rect(pad_x, pad_top, card_w, stack_h)
 
     if not caravan.cards:
-        placeholder_surface = pygame.Surface((SCALED_CARD_WIDTH, SCALED_CARD_HEIGHT), pygame.SRCALPHA)
-        placeholder_surface.fill((100,100,100, 120))
-        surface.blit(placeholder_surface, base_rect.topleft)
-        pygame.draw.rect(surface, LIGHT_GRAY, base_rect, 1, border_radius=4)
-        draw_text(surface, "[Empty]", FONT_SMALL, LIGHT_GRAY, base_rect.center)
-        return base_rect
-
-    topmost_card_rect = base_rect
-    for i, card_obj in enumerate(caravan.cards):
-        card_img_to_draw = get_card_image(card_obj)
-        current_card_y_pos = y_start + i * CARAVAN_CARD_Y_OFFSET
-        if card_img_to_draw:
-             current_card_rect = card_img_to_draw.get_rect(topleft=(x_start, current_card_y_pos))
-             surface.blit(card_img_to_draw, current_card_rect)
-             topmost_card_rect = current_card_rect
-        else:
-             error_card_rect = pygame.Rect(x_start, current_card_y_pos, SCALED_CARD_WIDTH, SCALED_CARD_HEIGHT)
-             pygame.draw.rect(surface, RED, error_card_rect, border_radius=3)
-             draw_text(surface, "IMG?", FONT_SMALL, WHITE, error_card_rect.center)
-             topmost_card_rect = error_card_rect
-
-    full_stack_height = topmost_card_rect.bottom - base_rect.top
-    effective_height = max(SCALED_CARD_HEIGHT, full_stack_height)
-    return pygame.Rect(base_rect.left, base_rect.top, base_rect.width, effective_height)
\ No newline at end of file
+        lane_surface.fill((100, 100, 100, 120), stack_rect)
+        pygame.draw.rect(lane_surface, LIGHT_GRAY, stack_rect, 1, border_radius=4)
+        draw_text(lane_surface, "[Empty]", FONT_SMALL, LIGHT_GRAY, stack_rect.center)
+    else:
+        for i, card_obj in enumerate(caravan.cards):
+            card_img_to_draw = get_card_image(card_obj)
+            card_pos = (pad_x, pad_top + i * CARAVAN_CARD_Y_OFFSET)
+            if card_img_to_draw:
+                lane_surface.blit(card_img_to_draw, card_pos)
+            else:
+                error_card_rect = pygame.Rect(card_pos, (card_w, card_h))
+                pygame.draw.rect(lane_surface, RED, error_card_rect, border_radius=3)
+                draw_text(lane_surface, "IMG?", FONT_SMALL, WHITE, error_card_rect.center)
+
+    if labels_above:
+        value_y = pad_top - 20
+        info_y = value_y - 18
+    else:
+        value_y = stack_rect.bottom + 12
+        info_y = value_y + 18
+    draw_text(lane_surface, info_text, FONT_SMALL, WHITE, (stack_rect.centerx, info_y), shadow=True)
+    draw_text(lane_surface, value_text, FONT_SMALL, WHITE, (stack_rect.centerx, value_y), shadow=True)
+
+    if highlight_color is not None:
+        pygame.draw.rect(lane_surface, highlight_color, stack_rect.inflate(8, 8), 3, border_radius=4)
+
+    clickable_rect = pygame.Rect(0, 0, card_w, max(SCALED_CARD_HEIGHT, stack_h))
+    return lane_surface, (pad_x, pad_top), clickable_rect
+
+def draw_caravan(surface: pygame.Surface, caravan: 'Caravan', position: tuple[int, int],
+                 highlight_color: Optional[pygame.Color] = None, labels_above: bool = True) -> pygame.Rect:
+    signature = (caravan.version, highlight_color, labels_above)
+    cached = CARAVAN_SURFACE_CACHE.get(position)
+    if cached is None or cached[0] is not caravan or cached[1] != signature:
+        lane_surface, stack_offset, clickable_rect = _compose_caravan_surface(caravan, highlight_color, labels_above)
+        clickable_rect.topleft = position
+        cached = (caravan, signature, lane_surface, (position[0] - stack_offset[0], position[1] - stack_offset[1]), clickable_rect)
+        CARAVAN_SURFACE_CACHE[position] = cached
+    surface.blit(cached[2], cached[3])
+    return cached[4]
@@ -0,0 +1,183 @@
+# filename: question_bank.py
+import heapq
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import debug
+from question_packs import load_question_packs
+from config import QUESTION_REVIEW_INTERVALS, QUESTION_TOPIC_MISS_WEIGHT, QUESTION_TOPIC_MISS_CAP
+
+class QuestionBank:
+    """Questions indexed by id and by source_blurb_topic."""
+
+    def __init__(self, questions: Sequence[Dict[str, Any]]):
+        self.by_id: Dict[int, Dict[str, Any]] = {}
+        self.by_topic: Dict[str, List[int]] = {}
+        for question in questions:
+            question_id = question["id"]
+            if question_id in self.by_id:
+                raise ValueError(f"Duplicate question id {question_id}")
+            self.by_id[question_id] = question
+            self.by_topic.setdefault(question.get("source_blurb_topic", ""), []).append(question_id)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, question_id: int) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(question_id)
+
+    def topic_of(self, question_id: int) -> str:
+        return self.by_id[question_id].get("source_blurb_topic", "")
+
+    @property
+    def topics(self) -> List[str]:
+        return list(self.by_topic)
+
+class QuestionScheduler:
+    """Leitner-style spaced repetition over a QuestionBank for one player.
+
+    Time is counted in questions served ("steps"). Unseen questions become
+    due one per step in a shuffled order. A correct first answer
+    moves a question up a box and pushes its due step out by
+    QUESTION_REVIEW_INTERVALS; a wrong one resets it to box 0 and makes it
+    due on the next step. Each outstanding miss against a topic (up to
+    QUESTION_TOPIC_MISS_CAP) pulls every question of that topic
+    QUESTION_TOPIC_MISS_WEIGHT steps earlier.
+    Selection pops a heap keyed by effective due step, with stale entries
+    skipped lazily, so picking the next question is O(log n).
+    """
+
+    def __init__(self, bank: QuestionBank, state: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                 store: Optional['QuestionProgressStore'] = None, player_key: str = ""):
+        self.bank = bank
+        self.store = store
+        self.player_key = player_key
+        rng = random.Random(seed)
+        state = state or {}
+        self.step: int = int(state.get("step", 0))
+        saved_questions = state.get("questions", {})
+        self.topic_misses: Dict[str, int] = {topic: int(misses) for topic, misses in state.get("topics", {}).items()}
+        # question id -> [box, due step, times right, times wrong]
+        self.progress: Dict[int, List[int]] = {}
+        self._order: Dict[int, float] = {}
+        self._entry_version: Dict[int, int] = {}
+        self._heap: List[Tuple[float, float, int, int]] = []
+        unseen: List[int] = []
+        for question_id in bank.by_id:
+            saved = saved_questions.get(str(question_id))
+            self._order[question_id] = rng.random()
+            if saved:
+                self.progress[question_id] = [int(v) for v in saved]
+            else:
+                unseen.append(question_id)
+        # New questions are introduced one step apart, in random order, so reviews can interleave.
+        unseen.sort(key=self._order.__getitem__)
+        for rank, question_id in enumerate(unseen):
+            self.progress[question_id] = [0, self.step + rank, 0, 0]
+        for question_id in bank.by_id:
+            self._push(question_id)
+
+    def _priority(self, question_id: int) -> float:
+        topic = self.bank.topic_of(question_id)
+        return self.progress[question_id][1] - QUESTION_TOPIC_MISS_WEIGHT * self.topic_misses.get(topic, 0)
+
+    def _push(self, question_id: int):
+        version = self._entry_version.get(question_id, 0) + 1
+        self._entry_version[question_id] = version
+        heapq.heappush(self._heap, (self._priority(question_id), self._order[question_id], question_id, version))
+        if len(self._heap) > 4 * len(self.progress) + 64:
+            self._compact()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._entry_version.get(entry[2]) == entry[3]]
+        heapq.heapify(self._heap)
+
+    def _peek(self) -> Optional[int]:
+        while self._heap:
+            _, _, question_id, version = self._heap[0]
+            if self._entry_version.get(question_id) == version:
+                return question_id
+            heapq.heappop(self._heap)
+        return None
+
+    def next_question(self) -> Optional[Dict[str, Any]]:
+        """Returns the most overdue question. It stays scheduled until an answer is recorded."""
+        question_id = self._peek()
+        if question_id is None:
+            return None
+        self.step += 1
+        return self.bank.get(question_id)
+
+    def record_answer(self, question_id: int, correct: bool):
+        progress = self.progress.get(question_id)
+        if progress is None:
+            return
+        topic = self.bank.topic_of(question_id)
+        if correct:
+            progress[0] = min(progress[0] + 1, len(QUESTION_REVIEW_INTERVALS) - 1)
+            progress[2] += 1
+            if self.topic_misses.get(topic, 0) > 0:
+                self.topic_misses[topic] -= 1
+        else:
+            progress[0] = 0
+            progress[3] += 1
+            self.topic_misses[topic] = min(self.topic_misses.get(topic, 0) + 1, QUESTION_TOPIC_MISS_CAP)
+        progress[1] = self.step + QUESTION_REVIEW_INTERVALS[progress[0]]
+        for topic_question_id in self.bank.by_topic.get(topic, ()):
+            self._push(topic_question_id)
+        if self.store is not None:
+            self.store.save(self.player_key, self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "step": self.step,
+            "questions": {str(question_id): progress for question_id, progress in self.progress.items()
+                          if progress[2] or progress[3]},
+            "topics": {topic: misses for topic, misses in self.topic_misses.items() if misses},
+        }
+
+class QuestionProgressStore:
+    """Scheduler state for every player in one small JSON file, rewritten atomically."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._players: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as store_file:
+                    self._players = json.load(store_file).get("players", {})
+            except (OSError, ValueError) as e:
+                debug.log_error("Ignoring unreadable question progress file {}: {}", path, e)
+
+    def load(self, player_key: str) -> Optional[Dict[str, Any]]:
+        return self._players.get(player_key)
+
+    def save(self, player_key: str, state: Dict[str, Any]):
+        self._players[player_key] = state
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as store_file:
+                json.dump({"players": self._players}, store_file)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            debug.log_error("Failed to save question progress to {}: {}", self.path, e)
+
+    def scheduler_for(self, bank: QuestionBank, player_key: str, seed: Optional[int] = None) -> QuestionScheduler:
+        return QuestionScheduler(bank, self.load(player_key), seed, store=self, player_key=player_key)
+
+_QUESTION_BANK: Optional[QuestionBank] = None
+
+def get_question_bank() -> QuestionBank:
+    """The bank of every installed question pack, loaded on first use."""
+    global _QUESTION_BANK
+    if _QUESTION_BANK is None:
+        questions = load_question_packs()
+        try:
+            _QUESTION_BANK = QuestionBank(questions)
+        except ValueError as e:
+            debug.log_error("Question packs disagree ({}); questions disabled.", e)
+            _QUESTION_BANK = QuestionBank([])
+        debug.log_event("Loaded {} questions from packs.", len(_QUESTION_BANK))
+    return _QUESTION_BANK
@@ -0,0 +1,175 @@
+# filename: question_packs.py
+import argparse
+import json
+import marshal
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+import debug
+from config import QUESTION_PACK_DIR, QUESTION_PACK_MIN_OPTIONS, QUESTION_PACK_MAX_OPTIONS
+
+QUESTION_PACK_FORMAT = 1
+PACK_EXTENSIONS = (".json", ".sqlite", ".db")
+CACHE_DIR_NAME = "__pycache__"
+CACHE_SUFFIX = ".qpack"
+CACHE_MAGIC = "caravan-qpack"
+
+class QuestionPackError(ValueError):
+    pass
+
+def _validate_question(raw: Any, source: str) -> Dict[str, Any]:
+    if not isinstance(raw, dict):
+        raise QuestionPackError(f"{source}: question entries must be objects")
+    question_id = raw.get("id")
+    if not isinstance(question_id, int) or isinstance(question_id, bool) or question_id < 0:
+        raise QuestionPackError(f"{source}: 'id' must be a non-negative integer, got {question_id!r}")
+    where = f"{source} question {question_id}"
+    for key in ("source_blurb_topic", "question"):
+        if not isinstance(raw.get(key), str) or not raw[key].strip():
+            raise QuestionPackError(f"{where}: '{key}' must be a non-empty string")
+    options = raw.get("options")
+    if (not isinstance(options, list) or not QUESTION_PACK_MIN_OPTIONS <= len(options) <= QUESTION_PACK_MAX_OPTIONS
+            or not all(isinstance(option, str) and option.strip() for option in options)):
+        raise QuestionPackError(f"{where}: 'options' must be {QUESTION_PACK_MIN_OPTIONS}-{QUESTION_PACK_MAX_OPTIONS} non-empty strings")
+    answer_index = raw.get("answer_index")
+    if not isinstance(answer_index, int) or isinstance(answer_index, bool) or not 0 <= answer_index < len(options):
+        raise QuestionPackError(f"{where}: 'answer_index' must index into 'options', got {answer_index!r}")
+    unknown = set(raw) - {"id", "source_blurb_topic", "question", "options", "answer_index"}
+    if unknown:
+        raise QuestionPackError(f"{where}: unknown fields {sorted(unknown)}")
+    return {"id": question_id, "source_blurb_topic": raw["source_blurb_topic"], "question": raw["question"],
+            "options": list(options), "answer_index": answer_index}
+
+def _read_json_pack(path: str) -> List[Any]:
+    with open(path, "r", encoding="utf-8") as pack_file:
+        try:
+            data = json.load(pack_file)
+        except ValueError as e:
+            raise QuestionPackError(f"{path}: invalid JSON: {e}") from e
+    if not isinstance(data, dict) or data.get("format") != QUESTION_PACK_FORMAT:
+        raise QuestionPackError(f"{path}: expected an object with \"format\": {QUESTION_PACK_FORMAT}")
+    questions = data.get("questions")
+    if not isinstance(questions, list):
+        raise QuestionPackError(f"{path}: 'questions' must be a list")
+    return questions
+
+def _read_sqlite_pack(path: str) -> List[Any]:
+    """Reads a table questions(id, source_blurb_topic, question, options, answer_index),
+    with options stored as a JSON array."""
+    import sqlite3  # only needed when a SQLite pack is installed
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = connection.execute(
+            "SELECT id, source_blurb_topic, question, options, answer_index FROM questions ORDER BY id").fetchall()
+    except sqlite3.Error as e:
+        raise QuestionPackError(f"{path}: {e}") from e
+    finally:
+        connection.close()
+    questions = []
+    for question_id, topic, text, options_json, answer_index in rows:
+        try:
+            options = json.loads(options_json)
+        except (TypeError, ValueError) as e:
+            raise QuestionPackError(f"{path} question {question_id}: 'options' is not a JSON array") from e
+        questions.append({"id": question_id, "source_blurb_topic": topic, "question": text,
+                          "options": options, "answer_index": answer_index})
+    return questions
+
+def compile_pack(path: str) -> List[Dict[str, Any]]:
+    """Reads and validates one pack, ignoring any cache."""
+    reader = _read_json_pack if path.endswith(".json") else _read_sqlite_pack
+    questions = [_validate_question(raw, path) for raw in reader(path)]
+    seen = set()
+    for question in questions:
+        if question["id"] in seen:
+            raise QuestionPackError(f"{path}: duplicate question id {question['id']}")
+        seen.add(question["id"])
+    return questions
+
+def _cache_path(path: str) -> str:
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR_NAME, filename + CACHE_SUFFIX)
+
+def load_pack(path: str) -> List[Dict[str, Any]]:
+    """Validated questions of one pack. The validated form is cached as
+    marshal data keyed on the pack's size and mtime, so unchanged packs skip
+    parsing and validation."""
+    stat = os.stat(path)
+    key = (CACHE_MAGIC, QUESTION_PACK_FORMAT, stat.st_mtime_ns, stat.st_size)
+    cache_path = _cache_path(path)
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cached = marshal.loads(cache_file.read())  # one read; marshal.load on a file is far slower
+        if isinstance(cached, tuple) and len(cached) == 2 and cached[0] == key:
+            return cached[1]
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    questions = compile_pack(path)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            cache_file.write(marshal.dumps((key, questions)))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        debug.log_warning("Could not write question pack cache {}: {}", cache_path, e)
+    return questions
+
+def pack_paths(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+            if filename.endswith(PACK_EXTENSIONS)]
+
+def resolve_pack_dir(directory: Optional[str] = None) -> str:
+    directory = directory or QUESTION_PACK_DIR
+    if os.path.isabs(directory):
+        return directory
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), directory)
+
+def load_question_packs(directory: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Questions from every pack in directory, in file name order. A pack that
+    fails validation, or reuses a question id of an earlier pack, is skipped
+    with an error logged rather than stopping the game."""
+    questions: List[Dict[str, Any]] = []
+    seen_ids: Dict[int, str] = {}
+    for path in pack_paths(resolve_pack_dir(directory)):
+        try:
+            pack = load_pack(path)
+        except (OSError, QuestionPackError) as e:
+            debug.log_error("Skipping question pack {}: {}", path, e)
+            continue
+        clash = next((question["id"] for question in pack if question["id"] in seen_ids), None)
+        if clash is not None:
+            debug.log_error("Skipping question pack {}: question id {} already used in {}", path, clash, seen_ids[clash])
+            continue
+        seen_ids.update((question["id"], path) for question in pack)
+        questions.extend(pack)
+    return questions
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Validate question packs and refresh their compiled caches.")
+    parser.add_argument("directory", nargs="?", default=None)
+    args = parser.parse_args(argv)
+
+    failed = False
+    seen_ids: Dict[int, str] = {}
+    for path in pack_paths(resolve_pack_dir(args.directory)):
+        try:
+            questions = compile_pack(path)
+        except (OSError, QuestionPackError) as e:
+            print(f"FAIL {e}")
+            failed = True
+            continue
+        for question in questions:
+            if question["id"] in seen_ids:
+                print(f"FAIL {path}: question id {question['id']} already used in {seen_ids[question['id']]}")
+                failed = True
+            seen_ids[question["id"]] = path
+        load_pack(path)
+        print(f"ok   {path}: {len(questions)} questions")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
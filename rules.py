@@ -0,0 +1,120 @@
+# filename: rules.py
+from typing import Dict, Optional, Sequence, Tuple
+
+from card import CARD_INDEX_BY_KEY
+from config import (
+    NUM_CARAVANS, STARTING_HAND_SIZE, HAND_SIZE_LIMIT, CARAVAN_WIN_MIN, CARAVAN_WIN_MAX,
+    WINNING_CARAVANS_NEEDED, STANDARD_DECK_COMPOSITION, JOKER_RANK,
+)
+
+# Face card effects a variant can pick per rank; None leaves the rank
+# unplayable (it can still be discarded). The flag says whether the effect
+# needs a numeric card on the target caravan.
+FACE_EFFECTS: Dict[str, Dict[str, bool]] = {
+    "jack": {"remove_last": True},
+    "queen": {"reverse": False, "suit": False},
+    "king": {"double": True, "add": True},
+    JOKER_RANK: {"remove_value": True},
+}
+_MAX_KINGS_PER_CARD = 16
+
+class RulesVariant:
+    """Rule parameters for one game, compiled into plain attributes and
+    lookup tables when the variant is created, so the rules code reads a
+    field or indexes a table where it used to read a config constant:
+
+    * king_factors[n] multiplies a numeric card carrying n kings: 2**n when
+      kings double ("double", the standard rule), 1+n when each adds the
+      card's value once more ("add").
+    * face_effects maps each playable face rank to its effect name and
+      face_needs_numeric says whether it needs a numeric card to land on;
+      GameActions turns face_effects into its handler table.
+    * deck_indices lists the Card.index of every card in one player's deck,
+      including num_jokers jokers. A joker ("remove_value", from the
+      original Caravan rules; this deck has no aces) attaches to the last
+      numeric card of a caravan and removes every other numeric card of the
+      same value from the table, with the face cards attached to them.
+
+    Instances are immutable and shared: copying returns the same object.
+    """
+
+    def __init__(self, name: str = "standard", num_caravans: int = NUM_CARAVANS,
+                 win_min: int = CARAVAN_WIN_MIN, win_max: int = CARAVAN_WIN_MAX,
+                 hand_size_limit: int = HAND_SIZE_LIMIT, starting_hand_size: Optional[int] = None,
+                 winning_caravans_needed: Optional[int] = None,
+                 deck_composition: Sequence[Tuple[str, str]] = tuple((spec['rank'], spec['suit']) for spec in STANDARD_DECK_COMPOSITION),
+                 num_jokers: int = 0, jack: Optional[str] = "remove_last", queen: Optional[str] = "reverse",
+                 king: Optional[str] = "double"):
+        if num_caravans < 1 or not 0 < win_min <= win_max:
+            raise ValueError("A variant needs at least one caravan and a non-empty win range.")
+        effects = {"jack": jack, "queen": queen, "king": king, JOKER_RANK: "remove_value" if num_jokers > 0 else None}
+        for rank, effect in effects.items():
+            if effect is not None and effect not in FACE_EFFECTS[rank]:
+                raise ValueError(f"Unknown {rank} effect '{effect}'. Known: {', '.join(FACE_EFFECTS[rank])}")
+        try:
+            deck_indices = tuple(CARD_INDEX_BY_KEY[key] for key in deck_composition)
+        except KeyError as e:
+            raise ValueError(f"Unknown card {e.args[0]} in deck composition.") from None
+        deck_indices += (CARD_INDEX_BY_KEY[(JOKER_RANK, '')],) * max(num_jokers, 0)
+
+        self.name = name
+        self.num_caravans = num_caravans
+        self.win_min = win_min
+        self.win_max = win_max
+        self.hand_size_limit = hand_size_limit
+        self.starting_hand_size = starting_hand_size if starting_hand_size is not None else \
+            num_caravans + STARTING_HAND_SIZE - NUM_CARAVANS
+        self.winning_caravans_needed = winning_caravans_needed if winning_caravans_needed is not None else \
+            num_caravans - (NUM_CARAVANS - WINNING_CARAVANS_NEEDED)
+        self.deck_composition = tuple(deck_composition)
+        self.num_jokers = max(num_jokers, 0)
+        self.deck_indices = deck_indices
+        self.face_effects: Dict[str, str] = {rank: effect for rank, effect in effects.items() if effect is not None}
+        self.face_needs_numeric: Dict[str, bool] = {rank: FACE_EFFECTS[rank][effect]
+                                                    for rank, effect in self.face_effects.items()}
+        self.king_factors: Tuple[int, ...] = tuple((1 + kings) if king == "add" else 2 ** kings
+                                                   for kings in range(_MAX_KINGS_PER_CARD + 1))
+
+    def _params(self) -> tuple:
+        return (self.num_caravans, self.win_min, self.win_max, self.hand_size_limit, self.starting_hand_size,
+                self.winning_caravans_needed, self.deck_indices, tuple(sorted(self.face_effects.items())))
+
+    @property
+    def is_standard(self) -> bool:
+        """Whether these are the config.py rules, whatever the variant's name."""
+        return self is STANDARD_RULES or self._params() == STANDARD_RULES._params()
+
+    def __copy__(self) -> 'RulesVariant':
+        return self
+
+    def __deepcopy__(self, memo) -> 'RulesVariant':
+        return self
+
+    def __reduce__(self):
+        if RULES_VARIANTS.get(self.name) is self:
+            return get_rules, (self.name,)
+        return RulesVariant, (self.name, self.num_caravans, self.win_min, self.win_max, self.hand_size_limit,
+                              self.starting_hand_size, self.winning_caravans_needed, self.deck_composition,
+                              self.num_jokers, self.face_effects.get("jack"), self.face_effects.get("queen"),
+                              self.face_effects.get("king"))
+
+    def __repr__(self) -> str:
+        return f"RulesVariant('{self.name}')"
+
+STANDARD_RULES = RulesVariant()
+
+RULES_VARIANTS: Dict[str, RulesVariant] = {
+    rules.name: rules for rules in (
+        STANDARD_RULES,
+        RulesVariant("five_lanes", num_caravans=5),
+        RulesVariant("wide_window", win_min=19, win_max=28),
+        RulesVariant("jokers", num_jokers=2),
+        RulesVariant("additive_kings", king="add"),
+    )
+}
+
+def get_rules(name: str) -> RulesVariant:
+    rules = RULES_VARIANTS.get(name)
+    if rules is None:
+        raise ValueError(f"Unknown rules variant '{name}'. Known: {', '.join(sorted(RULES_VARIANTS))}")
+    return rules
@@ -0,0 +1,157 @@
+# filename: selfplay_dataset.py
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+import debug
+from features import STATE_FEATURE_NAMES, NUM_STATE_FEATURES, state_features
+from flight_recorder import RECORDER
+from game_record import encode_action
+from headless import HeadlessGame
+
+DEFAULT_SHARD_SIZE = 65536
+MANIFEST_FILE = "manifest.json"
+
+class Decision(NamedTuple):
+    game_id: int
+    seat: int
+    features: List[float]
+    action_code: int
+    outcome: int  # +1 win, 0 draw, -1 loss, from the deciding seat's view
+
+def iter_decisions(num_games: int, base_seed: int = 0, ai_difficulties: Sequence[int] = (0, 1, 2),
+                   questions: bool = False, max_actions: int = 1000) -> Iterator[Decision]:
+    """Plays headless self-play games and yields one Decision per move.
+
+    Only the current game's decisions are held in memory; they are released
+    as soon as its outcome is known. Games that do not finish within
+    max_actions are skipped.
+    """
+    for game_id in range(num_games):
+        game = HeadlessGame(seed=base_seed + game_id, ai_difficulty=ai_difficulties[game_id % len(ai_difficulties)],
+                            questions=questions)
+        game_state = game.game_state
+        pending: List[tuple] = []
+        for _ in range(max_actions):
+            if game_state.game_over:
+                break
+            player = game.acting_player()
+            action = game.choose_ai_action()
+            features = state_features(game_state, player)
+            if not game.step(action):
+                action = {"type": "pass"}
+                if not game.step(action):
+                    break
+            code = encode_action(player, action)
+            if code is not None:
+                pending.append((game_state.players.index(player), features, code))
+        if not game_state.game_over:
+            debug.log_warning("Self-play game {} did not finish in {} actions; skipping its decisions.", game_id, max_actions)
+            continue
+        winner_seat = game_state.players.index(game_state.winner) if game_state.winner else -1
+        for seat, features, code in pending:
+            outcome = 0 if winner_seat == -1 else (1 if seat == winner_seat else -1)
+            yield Decision(game_id, seat, features, code, outcome)
+
+def _npy_header(descr: str, shape: tuple) -> bytes:
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': {shape!r}, }}"
+    padding = 64 - (10 + len(header) + 1) % 64
+    header = header + " " * padding + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+def write_npy(path: str, column: array, descr: str, shape: tuple):
+    """Writes an array buffer as a .npy file readable by numpy.load, without needing numpy."""
+    if sys.byteorder == "big" and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    with open(path, "wb") as npy_file:
+        npy_file.write(_npy_header(descr, shape))
+        column.tofile(npy_file)
+
+class ShardWriter:
+    """Accumulates decisions into fixed-size columnar buffers and flushes each
+    full buffer as a set of .npy files (features, action, outcome, seat, game)."""
+
+    def __init__(self, directory: str, shard_size: int = DEFAULT_SHARD_SIZE):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.shards: List[dict] = []
+        self.total_rows: int = 0
+        os.makedirs(directory, exist_ok=True)
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._features = array('f')
+        self._actions = array('B')
+        self._outcomes = array('b')
+        self._seats = array('B')
+        self._games = array('i')
+
+    def add(self, decision: Decision):
+        self._features.extend(decision.features)
+        self._actions.append(decision.action_code)
+        self._outcomes.append(decision.outcome)
+        self._seats.append(decision.seat)
+        self._games.append(decision.game_id)
+        if len(self._actions) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        rows = len(self._actions)
+        if not rows:
+            return
+        prefix = os.path.join(self.directory, f"shard_{len(self.shards):05d}")
+        write_npy(f"{prefix}_features.npy", self._features, "<f4", (rows, NUM_STATE_FEATURES))
+        write_npy(f"{prefix}_action.npy", self._actions, "|u1", (rows,))
+        write_npy(f"{prefix}_outcome.npy", self._outcomes, "|i1", (rows,))
+        write_npy(f"{prefix}_seat.npy", self._seats, "|u1", (rows,))
+        write_npy(f"{prefix}_game.npy", self._games, "<i4", (rows,))
+        self.shards.append({"prefix": os.path.basename(prefix), "rows": rows})
+        self.total_rows += rows
+        self._reset_buffers()
+
+    def close(self, metadata: Optional[dict] = None):
+        self.flush()
+        manifest = {
+            "feature_names": STATE_FEATURE_NAMES,
+            "columns": ["features", "action", "outcome", "seat", "game"],
+            "rows": self.total_rows,
+            "shards": self.shards,
+        }
+        manifest.update(metadata or {})
+        with open(os.path.join(self.directory, MANIFEST_FILE), "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+def export_dataset(directory: str, num_games: int, base_seed: int = 0, shard_size: int = DEFAULT_SHARD_SIZE,
+                   ai_difficulties: Sequence[int] = (0, 1, 2), questions: bool = False) -> int:
+    writer = ShardWriter(directory, shard_size)
+    for decision in iter_decisions(num_games, base_seed, ai_difficulties, questions):
+        writer.add(decision)
+    writer.close({"games": num_games, "base_seed": base_seed, "ai_difficulties": list(ai_difficulties),
+                  "questions": questions})
+    return writer.total_rows
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Export self-play (features, action, outcome) samples as .npy shards.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--out", default="selfplay_data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--difficulties", default="0,1,2", help="Comma-separated AI difficulties to cycle through.")
+    parser.add_argument("--questions", action="store_true", help="Keep the question/bonus point flow enabled.")
+    args = parser.parse_args(argv)
+
+    debug.configure(default_level=debug.WARNING)
+    RECORDER.enabled = False
+    start = time.perf_counter()
+    rows = export_dataset(args.out, args.games, args.seed, args.shard_size,
+                          [int(d) for d in args.difficulties.split(",")], args.questions)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {rows} decisions from {args.games} games to {args.out} in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
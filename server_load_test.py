@@ -0,0 +1,105 @@
+# filename: server_load_test.py
+import argparse
+import asyncio
+import random
+import time
+from array import array
+from typing import Dict, Optional, Sequence
+
+import debug
+from flight_recorder import RECORDER
+from frame_profiler import percentile
+from game_client import GameClient, play_random_game
+from game_server import GameServer
+from config import SERVER_HOST
+
+async def run_load_test(host: str, port: int, clients: int, games_per_client: int, tables_per_client: int,
+                        ai_difficulty: int, questions: bool, seed: int) -> Dict[str, float]:
+    """Each client connection plays tables_per_client games at a time until it
+    has finished games_per_client games; every request is timed."""
+    latencies: Dict[str, array] = {}
+    outcomes = {"finished": 0, "aborted": 0, "errors": 0}
+
+    def on_reply(op: str, seconds: float):
+        latencies.setdefault(op, array('d')).append(seconds * 1000.0)
+
+    async def run_client(client_idx: int):
+        client = await GameClient.connect(host, port)
+        rng = random.Random(seed * 100_003 + client_idx)
+        remaining = iter(range(games_per_client))
+
+        async def table():
+            for _ in remaining:
+                state = await play_random_game(client, rng, ai_difficulty, questions=questions, on_reply=on_reply)
+                if state.get("op") == "error":
+                    outcomes["errors"] += 1
+                elif state.get("aborted"):
+                    outcomes["aborted"] += 1
+                elif state.get("game_over"):
+                    outcomes["finished"] += 1
+
+        try:
+            await asyncio.gather(*(table() for _ in range(tables_per_client)))
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    act = sorted(latencies.get("act", ()))
+    requests = sum(len(values) for values in latencies.values())
+    return {
+        "elapsed_s": elapsed,
+        "games_finished": float(outcomes["finished"]),
+        "games_aborted": float(outcomes["aborted"]),
+        "errors": float(outcomes["errors"]),
+        "games_per_s": outcomes["finished"] / elapsed if elapsed else 0.0,
+        "requests_per_s": requests / elapsed if elapsed else 0.0,
+        "act_requests": float(len(act)),
+        "act_p50_ms": percentile(act, 0.50),
+        "act_p99_ms": percentile(act, 0.99),
+    }
+
+async def _run(args) -> Dict[str, float]:
+    game_server: Optional[GameServer] = None
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        game_server = GameServer(ai_workers=args.ai_workers)
+        server = await game_server.start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        return await run_load_test(host, port, args.clients, args.games, args.tables, args.ai_difficulty,
+                                   not args.no_questions, args.seed)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        if game_server is not None:
+            await game_server.shutdown()
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test game_server with concurrent random-move clients.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=None,
+                        help="Port of a running server; without it a server is started in this process.")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--tables", type=int, default=4, help="Concurrent games per client connection.")
+    parser.add_argument("--games", type=int, default=8, help="Games per client connection.")
+    parser.add_argument("--ai-workers", type=int, default=None)
+    parser.add_argument("--ai-difficulty", type=int, default=0)
+    parser.add_argument("--no-questions", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    debug.configure(default_level=debug.WARNING)
+    RECORDER.enabled = False
+    stats = asyncio.run(_run(args))
+    print(f"{int(stats['games_finished'])} games finished in {stats['elapsed_s']:.1f}s "
+          f"({int(stats['games_aborted'])} aborted, {int(stats['errors'])} errors)")
+    print(f"games/s {stats['games_per_s']:.1f}   requests/s {stats['requests_per_s']:.0f}")
+    print(f"act latency over {int(stats['act_requests'])} moves: "
+          f"p50 {stats['act_p50_ms']:.2f} ms   p99 {stats['act_p99_ms']:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# filename: shared_state.py
+import struct
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from game_snapshot import (
+    CARAVAN_SUITS, DIRECTIONS, SnapshotError, cards_from_indices, restore_game_state, snapshot_header_fields,
+)
+from config import (
+    NUM_CARAVANS, SHARED_STATE_HAND_CAPACITY, SHARED_STATE_DECK_CAPACITY, SHARED_STATE_CARAVAN_CAPACITY,
+)
+
+if TYPE_CHECKING:
+    from game_state import GameState
+
+# Slot layout, little-endian: sequence (I), then the game_snapshot header
+# fields: flags (H), seed (I), current player (B), round (H), winner seat (B),
+# bonus seat (B), question id (i), question attempts (B), unseen mask (Q).
+# Two seats follow, each: name length (B) + 31 name bytes, is_ai (B), AI
+# difficulty (B), then fixed-capacity piles: hand, deck and NUM_CARAVANS
+# caravans. A pile is a count byte plus capacity bytes of Card.index; a
+# caravan pile is preceded by its direction and suit bytes.
+_SEQUENCE = struct.Struct("<I")
+_HEADER = struct.Struct("<HIBHBBiBQ")
+_NAME_BYTES = 31
+_NUM_SEATS = 2
+_PILE_CAPACITIES = [SHARED_STATE_HAND_CAPACITY, SHARED_STATE_DECK_CAPACITY] + \
+                   [SHARED_STATE_CARAVAN_CAPACITY] * NUM_CARAVANS
+
+def _seat_layout() -> Tuple[List[int], int]:
+    offsets = []
+    offset = 1 + _NAME_BYTES + 2
+    for pile, capacity in enumerate(_PILE_CAPACITIES):
+        if pile >= 2:
+            offset += 2  # direction, suit
+        offsets.append(offset)
+        offset += 1 + capacity
+    return offsets, offset
+
+_PILE_OFFSETS, _SEAT_SIZE = _seat_layout()
+_HEADER_OFFSET = _SEQUENCE.size
+_SEATS_OFFSET = _HEADER_OFFSET + _HEADER.size
+SLOT_SIZE = _SEATS_OFFSET + _NUM_SEATS * _SEAT_SIZE
+
+class SharedStateError(ValueError):
+    pass
+
+class SharedStateBuffer:
+    """Mirror of many games' rules state in one multiprocessing.shared_memory
+    block, one fixed-size slot per game.
+
+    The owning process writes a slot with write() after each action; only the
+    header and the piles whose cards changed since the previous write are
+    copied in. Worker processes attach() by name and read a slot straight
+    from the shared buffer, so dispatching a job means sending the block name
+    and a slot number. A sequence counter, odd while a write is in progress,
+    lets readers detect and retry torn reads. The RNG state is not mirrored:
+    a rebuilt GameState is seeded from the deal seed.
+    """
+
+    def __init__(self, slots: int = 0, name: Optional[str] = None):
+        """Creates a block of slots, or attaches to the block called name."""
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, slots) * SLOT_SIZE)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.slots = self.shm.size // SLOT_SIZE
+        self.buf = self.shm.buf
+        self._free_slots = list(range(self.slots - 1, -1, -1)) if self.owner else []
+        self._written: Dict[int, List[Optional[tuple]]] = {}
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def acquire(self) -> Optional[int]:
+        """Reserves a free slot, or returns None when all are taken."""
+        if not self._free_slots:
+            return None
+        slot = self._free_slots.pop()
+        self._written[slot] = [None] * (_NUM_SEATS * len(_PILE_CAPACITIES))
+        return slot
+
+    def release(self, slot: int):
+        if self._written.pop(slot, None) is not None:
+            self._free_slots.append(slot)
+
+    def write(self, slot: int, game_state: 'GameState') -> int:
+        """Updates a slot from game_state and returns the number of piles
+        rewritten. Raises SharedStateError when a pile exceeds its capacity
+        or the game is not under the standard rules; the slot then keeps its
+        previous contents."""
+        written = self._written.get(slot)
+        if written is None:
+            raise SharedStateError(f"Slot {slot} is not acquired.")
+        if len(game_state.players) != _NUM_SEATS:
+            raise SharedStateError("Shared state slots hold exactly two seats.")
+        if not game_state.rules.is_standard:
+            raise SharedStateError(f"Shared state slots hold standard rules only, not {game_state.rules!r}.")
+        changes = []
+        for seat, player in enumerate(game_state.players):
+            if len(player.caravans) != NUM_CARAVANS:
+                raise SharedStateError("Unexpected number of caravans.")
+            piles = [(player.hand, None), (player.deck, None)] + [(caravan.cards, caravan) for caravan in player.caravans]
+            for pile, ((cards, caravan), capacity) in enumerate(zip(piles, _PILE_CAPACITIES)):
+                key = seat * len(_PILE_CAPACITIES) + pile
+                previous = written[key]
+                # Unchanged piles hold the same Card objects, so this list
+                # comparison is an identity check per card.
+                if previous is not None and previous[0] == cards and (
+                        caravan is None or previous[1:] == (caravan.direction, caravan.suit)):
+                    continue
+                if len(cards) > capacity:
+                    raise SharedStateError(f"{len(cards)} cards exceed the shared pile capacity of {capacity}.")
+                data = bytes([len(cards)] + [card.index for card in cards])
+                if caravan is not None:
+                    data = bytes((DIRECTIONS.index(caravan.direction), CARAVAN_SUITS.index(caravan.suit))) + data
+                    changes.append((key, seat, pile, data, (list(cards), caravan.direction, caravan.suit)))
+                else:
+                    changes.append((key, seat, pile, data, (list(cards),)))
+        first_write = written[0] is None
+        names = [player.name.encode("utf-8")[:_NAME_BYTES] for player in game_state.players] if first_write else []
+
+        base = slot * SLOT_SIZE
+        buf = self.buf
+        sequence = _SEQUENCE.unpack_from(buf, base)[0]
+        _SEQUENCE.pack_into(buf, base, (sequence + 1) & 0xFFFFFFFF)
+        _HEADER.pack_into(buf, base + _HEADER_OFFSET, *snapshot_header_fields(game_state, include_rng=False))
+        for seat, player in enumerate(game_state.players):
+            seat_base = base + _SEATS_OFFSET + seat * _SEAT_SIZE
+            if first_write:
+                buf[seat_base] = len(names[seat])
+                buf[seat_base + 1:seat_base + 1 + len(names[seat])] = names[seat]
+            buf[seat_base + 1 + _NAME_BYTES] = 1 if player.is_ai else 0
+            buf[seat_base + 2 + _NAME_BYTES] = player.ai_difficulty & 0xFF
+        for key, seat, pile, data, cached in changes:
+            start = base + _SEATS_OFFSET + seat * _SEAT_SIZE + _PILE_OFFSETS[pile] - (2 if pile >= 2 else 0)
+            buf[start:start + len(data)] = data
+            written[key] = cached
+        _SEQUENCE.pack_into(buf, base, (sequence + 2) & 0xFFFFFFFF)
+        return len(changes)
+
+    def read(self, slot: int, retries: int = 100, **game_state_kwargs: Any) -> 'GameState':
+        """Rebuilds the GameState held in a slot. Keyword arguments go to the
+        GameState constructor, as for GameState.from_bytes()."""
+        if not 0 <= slot < self.slots:
+            raise SharedStateError(f"No slot {slot}.")
+        base = slot * SLOT_SIZE
+        buf = self.buf
+        for _ in range(retries):
+            sequence = _SEQUENCE.unpack_from(buf, base)[0]
+            if sequence & 1:
+                continue
+            header_fields = _HEADER.unpack_from(buf, base + _HEADER_OFFSET)
+            players_data = []
+            for seat in range(_NUM_SEATS):
+                seat_base = base + _SEATS_OFFSET + seat * _SEAT_SIZE
+                name = bytes(buf[seat_base + 1:seat_base + 1 + buf[seat_base]]).decode("utf-8", "replace")
+                piles = []
+                caravans = []
+                for pile, offset in enumerate(_PILE_OFFSETS):
+                    start = seat_base + offset
+                    indices = buf[start + 1:start + 1 + buf[start]]
+                    if pile < 2:
+                        piles.append(indices)
+                    else:
+                        caravans.append((buf[start - 2], buf[start - 1], indices))
+                players_data.append((name, bool(buf[seat_base + 1 + _NAME_BYTES]), buf[seat_base + 2 + _NAME_BYTES],
+                                     piles[0], piles[1], caravans))
+            if _SEQUENCE.unpack_from(buf, base)[0] != sequence:
+                continue
+            if sequence == 0:
+                raise SharedStateError(f"Slot {slot} has never been written.")
+            try:
+                players_data = [(name, is_ai, ai_difficulty, cards_from_indices(hand), cards_from_indices(deck),
+                                 [(direction, suit, cards_from_indices(cards)) for direction, suit, cards in caravans])
+                                for name, is_ai, ai_difficulty, hand, deck, caravans in players_data]
+            except SnapshotError:
+                continue  # overwritten while copying the cards out; read again
+            if _SEQUENCE.unpack_from(buf, base)[0] != sequence:
+                continue
+            return restore_game_state(header_fields, players_data, **game_state_kwargs)
+        raise SharedStateError(f"Slot {slot} kept changing while being read.")
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+_ATTACHED: Dict[str, SharedStateBuffer] = {}
+
+def attach(name: str) -> SharedStateBuffer:
+    """Opens a SharedStateBuffer created by another process, once per process."""
+    buffer = _ATTACHED.get(name)
+    if buffer is None:
+        buffer = _ATTACHED[name] = SharedStateBuffer(name=name)
+    return buffer
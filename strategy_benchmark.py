@@ -0,0 +1,95 @@
+# filename: strategy_benchmark.py
+import argparse
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+import debug
+from ai_strategies import STRATEGY_FACTORIES, create_strategy
+from eval_cache import open_eval_cache
+from flight_recorder import RECORDER
+from frame_profiler import percentile
+from headless import HeadlessGame
+
+MAX_ACTIONS_PER_GAME = 1000
+
+def benchmark_strategy(name: str, baseline: str, num_games: int, base_seed: int = 0,
+                       ai_difficulty: int = 1) -> Dict[str, float]:
+    """Plays name against baseline with seats alternating per game and times
+    every decision made by name. Setup placements are timed separately so the
+    main latency figures reflect in-game moves."""
+    latencies_ms = array('d')
+    setup_latencies_ms = array('d')
+    wins = draws = finished = 0
+    for game_idx in range(num_games):
+        seat = game_idx % 2
+        strategy = create_strategy(name)
+        opponent = create_strategy(baseline)
+        strategies = [strategy, opponent] if seat == 0 else [opponent, strategy]
+        game = HeadlessGame(seed=base_seed + game_idx // 2, ai_difficulty=ai_difficulty,
+                            questions=False, strategies=strategies)
+        game_state = game.game_state
+        measured_player = game_state.players[seat]
+        for _ in range(MAX_ACTIONS_PER_GAME):
+            if game_state.game_over:
+                break
+            acting = game.acting_player()
+            in_setup = game_state.is_setup_phase()
+            start = time.perf_counter()
+            action = game.choose_ai_action()
+            if acting is measured_player:
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                (setup_latencies_ms if in_setup else latencies_ms).append(elapsed_ms)
+            if not game.step(action) and not game.step({"type": "pass"}):
+                break
+        if not game_state.game_over:
+            continue
+        finished += 1
+        if game_state.winner is None:
+            draws += 1
+        elif game_state.winner is measured_player:
+            wins += 1
+
+    ordered = sorted(latencies_ms)
+    ordered_setup = sorted(setup_latencies_ms)
+    return {
+        "games": float(finished),
+        "win_rate": (wins + 0.5 * draws) / finished if finished else 0.0,
+        "draws": float(draws),
+        "decisions": float(len(ordered)),
+        "latency_p50_ms": percentile(ordered, 0.50),
+        "latency_p99_ms": percentile(ordered, 0.99),
+        "setup_latency_p50_ms": percentile(ordered_setup, 0.50),
+    }
+
+def run(strategies: Sequence[str], baseline: str, num_games: int, base_seed: int = 0) -> List[Dict[str, float]]:
+    results = []
+    for name in strategies:
+        stats = benchmark_strategy(name, baseline, num_games, base_seed)
+        stats["strategy"] = name
+        results.append(stats)
+    return results
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Decision latency and win rate of each AI strategy against a baseline.")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--baseline", default="random")
+    parser.add_argument("--strategies", default=",".join(STRATEGY_FACTORIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--eval-cache", default=None, help="Evaluation cache file, kept between runs.")
+    args = parser.parse_args(argv)
+
+    debug.configure(default_level=debug.WARNING)
+    RECORDER.enabled = False
+    cache = open_eval_cache(args.eval_cache)
+    results = run([name.strip() for name in args.strategies.split(",") if name.strip()],
+                  args.baseline, args.games, args.seed)
+    print(f"{'strategy':<12} {'games':>6} {'win rate':>9} {'decisions':>10} {'p50 ms':>8} {'p99 ms':>8} {'setup p50':>10}   vs {args.baseline}")
+    for stats in results:
+        print(f"{stats['strategy']:<12} {int(stats['games']):>6} {stats['win_rate']:>9.3f} {int(stats['decisions']):>10} "
+              f"{stats['latency_p50_ms']:>8.3f} {stats['latency_p99_ms']:>8.3f} {stats['setup_latency_p50_ms']:>10.3f}")
+    if cache is not None:
+        print(f"evaluation cache {cache.path}: {cache.hits} hits, {cache.misses} misses, {cache.stores} stored")
+
+if __name__ == "__main__":
+    main()
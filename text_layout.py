@@ -0,0 +1,94 @@
+# filename: text_layout.py
+import functools
+import pygame
+from typing import List, NamedTuple, Optional, Tuple
+
+ELLIPSIS = "..."
+
+class TextLayout(NamedTuple):
+    lines: Tuple[str, ...]
+    line_widths: Tuple[int, ...]
+    line_height: int
+    width: int
+    height: int
+    truncated: bool
+
+def _split_long_word(word: str, font: pygame.font.Font, max_width: int) -> List[str]:
+    pieces: List[str] = []
+    while word:
+        lo, hi = 1, len(word)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if font.size(word[:mid])[0] <= max_width:
+                lo = mid
+            else:
+                hi = mid - 1
+        pieces.append(word[:lo])
+        word = word[lo:]
+    return pieces
+
+def _ellipsize(line: str, font: pygame.font.Font, max_width: int) -> str:
+    if font.size(line + ELLIPSIS)[0] <= max_width:
+        return line + ELLIPSIS
+    lo, hi = 0, len(line)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if font.size(line[:mid].rstrip() + ELLIPSIS)[0] <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return line[:lo].rstrip() + ELLIPSIS
+
+@functools.lru_cache(maxsize=1024)
+def layout_text(text: str, font: pygame.font.Font, max_width: int,
+                max_lines: Optional[int] = None) -> TextLayout:
+    """Greedy word wrap of text into lines no wider than max_width.
+
+    Each word is measured once; words wider than max_width are split across
+    lines. When max_lines is given, the last kept line is ellipsized and the
+    layout is flagged as truncated. Results are memoized per (text, font,
+    max_width, max_lines).
+    """
+    space_width = font.size(" ")[0]
+    lines: List[str] = []
+    current_words: List[str] = []
+    current_width = 0
+    for paragraph in text.split("\n"):
+        for word in paragraph.split():
+            word_width = font.size(word)[0]
+            pieces = [word] if word_width <= max_width else _split_long_word(word, font, max_width)
+            for piece in pieces:
+                piece_width = word_width if len(pieces) == 1 else font.size(piece)[0]
+                needed = piece_width if not current_words else current_width + space_width + piece_width
+                if current_words and needed > max_width:
+                    lines.append(" ".join(current_words))
+                    current_words, current_width = [piece], piece_width
+                else:
+                    current_words.append(piece)
+                    current_width = needed
+        lines.append(" ".join(current_words))
+        current_words, current_width = [], 0
+
+    truncated = False
+    if max_lines is not None and len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = _ellipsize(lines[-1], font, max_width)
+        truncated = True
+
+    line_widths = tuple(font.size(line)[0] for line in lines)
+    line_height = font.get_linesize()
+    return TextLayout(
+        lines=tuple(lines),
+        line_widths=line_widths,
+        line_height=line_height,
+        width=max(line_widths) if line_widths else 0,
+        height=line_height * len(lines),
+        truncated=truncated,
+    )
+
+def fit_text(text: str, font: pygame.font.Font, max_width: int, max_height: int) -> TextLayout:
+    max_lines = max(1, max_height // font.get_linesize())
+    return layout_text(text, font, max_width, max_lines)
+
+def clear_layout_cache():
+    layout_text.cache_clear()
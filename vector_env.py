@@ -0,0 +1,447 @@
+# filename: vector_env.py
+from typing import Any, Optional, Sequence, Tuple
+
+from card import CARD_INDEX_KEYS
+from config import (
+    CARD_VALUES, SUITS, NUMERIC_RANKS, NUM_CARAVANS, HAND_SIZE_LIMIT, CARAVAN_WIN_MIN, CARAVAN_WIN_MAX,
+    VECTOR_ENV_MAX_STEPS,
+)
+from features import NUM_STATE_FEATURES
+from game_record import ACTION_TABLE, ACTION_CODES
+from rules import STANDARD_RULES
+
+try:
+    import numpy
+except ImportError:  # VectorEnv() raises; importing the module stays safe
+    numpy = None
+
+NUM_ACTIONS = len(ACTION_TABLE)
+PASS_ACTION = ACTION_CODES[("pass", -1, 0, -1)]
+LEARNER_SEAT = 0
+VECTOR_ENV_OPPONENTS = ("random", "self")
+
+_LANE_FEATURES = 11  # per lane, in features.state_features() order
+assert NUM_STATE_FEATURES == NUM_CARAVANS * _LANE_FEATURES + 13, "vector_env.py no longer mirrors features.py."
+
+# Per-card lookup tables indexed by Card.index; _NO_CARD pads empty hand
+# slots and reads as a card with no value, suit or rank.
+_NO_CARD = 255
+_CARD_VALUE = [0] * 256
+_CARD_SUIT = [-1] * 256
+_CARD_RANK = [""] * 256
+for _index, (_rank, _suit) in enumerate(CARD_INDEX_KEYS):
+    _CARD_VALUE[_index] = CARD_VALUES.get(_rank, 0)
+    _CARD_SUIT[_index] = SUITS.index(_suit) if _suit in SUITS else -1
+    _CARD_RANK[_index] = _rank
+_DECK = STANDARD_RULES.deck_indices
+_STACK_DEPTH = sum(1 for index in _DECK if _CARD_RANK[index] in NUMERIC_RANKS)  # numeric cards one lane can hold
+
+# Action codes split into kind, hand slot, relative target seat and lane,
+# plus the block of codes each kind of move occupies in the masks.
+_PLACE, _PLAY, _DISCARD, _DISCARD_CARAVAN, _PASS, _UNSUPPORTED = range(6)
+_KIND_BY_TYPE = {"place_initial_card": _PLACE, "play_card": _PLAY, "discard_card": _DISCARD,
+                 "discard_caravan": _DISCARD_CARAVAN, "pass": _PASS}
+_ACTION_KIND = [_KIND_BY_TYPE.get(action_type, _UNSUPPORTED) for action_type, _, _, _ in ACTION_TABLE]
+_ACTION_HAND = [max(hand_idx, 0) for _, hand_idx, _, _ in ACTION_TABLE]
+_ACTION_TARGET = [target for _, _, target, _ in ACTION_TABLE]
+_ACTION_LANE = [max(lane, 0) for _, _, _, lane in ACTION_TABLE]
+
+def _code_span(codes: Sequence[int]) -> slice:
+    """The codes as one slice; the masks are written a block at a time."""
+    assert list(codes) == list(range(codes[0], codes[0] + len(codes))), "Action codes are not contiguous."
+    return slice(codes[0], codes[0] + len(codes))
+
+_PLACE_SPAN = _code_span([ACTION_CODES[("place_initial_card", h, 0, lane)]
+                          for h in range(HAND_SIZE_LIMIT) for lane in range(NUM_CARAVANS)])
+_PLAY_SPAN = _code_span([ACTION_CODES[("play_card", h, target, lane)]
+                         for h in range(HAND_SIZE_LIMIT) for target in (0, 1) for lane in range(NUM_CARAVANS)])
+_DISCARD_SPAN = _code_span([ACTION_CODES[("discard_card", h, 0, -1)] for h in range(HAND_SIZE_LIMIT)])
+_DISCARD_CARAVAN_SPAN = _code_span([ACTION_CODES[("discard_caravan", -1, 0, lane)] for lane in range(NUM_CARAVANS)])
+assert 2 * NUM_CARAVANS <= 8, "A hand slot's play targets no longer pack into one byte."
+assert max(span.stop for span in (_PLACE_SPAN, _PLAY_SPAN, _DISCARD_SPAN, _DISCARD_CARAVAN_SPAN)) <= PASS_ACTION, \
+    "Random replies assume every move other than a pass has a code below PASS_ACTION."
+
+class VectorEnv:
+    """N independent games under the standard rules, advanced in lockstep
+    one decision per game.
+
+    Every game's state lives in contiguous NumPy arrays (decks, hands,
+    lanes as stacks of numeric cards with their king counts, totals,
+    suits, directions and turn flags), and reset() and step() apply the
+    rules to all games at once, so a step costs a fixed number of array
+    operations rather than a walk over GameState objects. The rules are
+    those of GameActions.execute_turn with questions disabled; the engine
+    itself is not used, so neither is the flight recorder.
+
+    Actions are game_record action codes and observations are the
+    features.state_features() vector. With opponent="random" the learner
+    plays seat 0 and seat 1 replies with a uniformly random legal move
+    (as RandomStrategy does) inside the same step. With opponent="self"
+    the caller plays both seats: each game's observation, mask and next
+    action belong to the seat in seats, and its reward to the seat that
+    just moved. Strategies such as the heuristic walk Player objects and
+    are only available through HeadlessGame.
+
+    Observations, legal-action masks, rewards, done flags and seats are
+    preallocated arrays rewritten in place on every step; copy them to
+    keep a step's results. An illegal code is played as a pass. A
+    finished game reports its reward (+1 win, -1 loss, 0 otherwise) and
+    done flag and is dealt again in the same step, so its observation is
+    already the new game's first. A game still running after max_steps
+    decisions ends as a draw.
+    """
+
+    def __init__(self, opponent: str = "random", max_steps: int = VECTOR_ENV_MAX_STEPS):
+        if numpy is None:
+            raise ImportError("VectorEnv needs numpy.")
+        if opponent not in VECTOR_ENV_OPPONENTS:
+            raise ValueError(f"Unknown opponent '{opponent}'. Known: {', '.join(VECTOR_ENV_OPPONENTS)}")
+        self.opponent = opponent
+        self.max_steps = max_steps
+        self.num_games = 0
+        self.rng = numpy.random.default_rng()
+        self.observations = self.legal_masks = self.rewards = self.dones = self.seats = None
+
+        self._value = numpy.array(_CARD_VALUE, dtype=numpy.int32)
+        self._card_suit = numpy.array(_CARD_SUIT, dtype=numpy.int8)
+        ranks = numpy.array(_CARD_RANK)
+        self._numeric = numpy.isin(ranks, NUMERIC_RANKS)
+        self._numeric_value = numpy.where(self._numeric, self._value, 0)
+        self._jack, self._queen, self._king = ranks == "jack", ranks == "queen", ranks == "king"
+        self._face = self._jack | self._queen | self._king
+        self._deck_cards = numpy.array(_DECK, dtype=numpy.uint8)
+        # Caravan.can_add_numeric() by card and lane state, where the state
+        # packs the last numeric value (0 for an empty lane), direction and
+        # suit as (value * 3 + direction + 1) * 5 + suit + 1; one more state
+        # stands for a lane its owner has sold, which takes no cards.
+        value = self._value[:, None, None, None]
+        suit = self._card_suit[:, None, None, None]
+        last_value = numpy.arange(11)[None, :, None, None]
+        direction = numpy.arange(-1, 2)[None, None, :, None]
+        lane_suit = numpy.arange(-1, len(SUITS))[None, None, None, :]
+        can_add = (last_value == 0) | ((value != last_value) & (
+            (suit == lane_suit) | (direction == 0) | ((direction == 1) & (value > last_value)) |
+            ((direction == -1) & (value < last_value))))
+        can_add = (can_add & self._numeric[:, None, None, None]).reshape(256, -1)
+        self._sold_lane_state = can_add.shape[1]
+        self._lane_states = can_add.shape[1] + 1
+        self._can_add = numpy.concatenate((can_add, numpy.zeros((256, 1), dtype=bool)), axis=1).astype(numpy.uint8).ravel()
+        self._lane_bits = (1 << numpy.arange(NUM_CARAVANS)).astype(numpy.uint8)
+        self._byte_bits = numpy.unpackbits(numpy.arange(256, dtype=numpy.uint8)[:, None], axis=1, bitorder="little") > 0
+        # Hand feature counts of one card packed into 4-bit fields (numeric,
+        # jack, queen, king) below its numeric value, so a hand sums in one go.
+        self._hand_summary = (self._numeric | self._jack << 4 | self._queen << 8 | self._king << 12 |
+                              self._numeric_value << 16).astype(numpy.int32)
+        self._kind = numpy.array(_ACTION_KIND, dtype=numpy.int8)
+        self._action_hand = numpy.array(_ACTION_HAND, dtype=numpy.intp)
+        self._action_target = numpy.array(_ACTION_TARGET, dtype=numpy.intp)
+        self._action_lane = numpy.array(_ACTION_LANE, dtype=numpy.intp)
+        self._slots = numpy.arange(HAND_SIZE_LIMIT)
+        self._lanes = numpy.arange(NUM_CARAVANS)
+
+    def _allocate(self, num_games: int):
+        self.num_games = num_games
+        self._games = numpy.arange(num_games)
+        self._learner_seats = numpy.full(num_games, LEARNER_SEAT, dtype=numpy.intp)
+        lanes = (num_games, 2, NUM_CARAVANS)
+        self._deck = numpy.zeros((num_games, 2, len(_DECK)), dtype=numpy.uint8)
+        self._deck_len = numpy.zeros((num_games, 2), dtype=numpy.int16)
+        self._hand = numpy.full((num_games, 2, HAND_SIZE_LIMIT), _NO_CARD, dtype=numpy.uint8)
+        self._hand_len = numpy.zeros((num_games, 2), dtype=numpy.int16)
+        self._stack = numpy.zeros(lanes + (_STACK_DEPTH,), dtype=numpy.uint8)
+        self._kings = numpy.zeros(lanes + (_STACK_DEPTH,), dtype=numpy.uint8)
+        self._count = numpy.zeros(lanes, dtype=numpy.int16)  # numeric cards on the lane
+        self._length = numpy.zeros(lanes, dtype=numpy.int16)  # all cards on the lane, kings included
+        self._total = numpy.zeros(lanes, dtype=numpy.int32)
+        self._last_value = numpy.zeros(lanes, dtype=numpy.int16)  # of the last numeric card, 0 when empty
+        self._sold_flags = numpy.zeros(lanes, dtype=bool)  # is_caravan_sold_by_player, as of the last move
+        self._suit = numpy.full(lanes, -1, dtype=numpy.int8)
+        self._direction = numpy.zeros(lanes, dtype=numpy.int8)  # 1 up, -1 down, 0 none
+        self._current = numpy.zeros(num_games, dtype=numpy.intp)
+        self._turn = numpy.zeros(num_games, dtype=numpy.int32)
+        self._setup = numpy.zeros(num_games, dtype=bool)
+        self._over = numpy.zeros(num_games, dtype=bool)
+        self._winner = numpy.zeros(num_games, dtype=numpy.int8)  # seat, or -1 for a draw
+        self._steps = numpy.zeros(num_games, dtype=numpy.int32)
+        self.observations = numpy.zeros((num_games, NUM_STATE_FEATURES), dtype=numpy.float32)
+        self.legal_masks = numpy.zeros((num_games, NUM_ACTIONS), dtype=bool)
+        self.rewards = numpy.zeros(num_games, dtype=numpy.float32)
+        self.dones = numpy.zeros(num_games, dtype=bool)
+        self.seats = numpy.zeros(num_games, dtype=numpy.uint8)
+
+    def reset(self, num_games: int, seed: Optional[int] = None) -> Tuple[Any, Any]:
+        """Deals num_games new games; seed seeds the generator used for every
+        deal and random reply from here on. Returns (observations,
+        legal_masks)."""
+        if num_games != self.num_games or self.observations is None:
+            self._allocate(num_games)
+        self.rng = numpy.random.default_rng(seed)
+        self._deal(self._games)
+        self.rewards[:] = 0.0
+        self.dones[:] = False
+        self._observe()
+        return self.observations, self.legal_masks
+
+    def step(self, actions: Sequence[int]) -> Tuple[Any, Any, Any, Any]:
+        """Applies actions[i] (an action code) to game i. Returns
+        (observations, legal_masks, rewards, dones)."""
+        codes = numpy.asarray(actions, dtype=numpy.intp).reshape(-1)
+        if len(codes) != self.num_games:
+            raise ValueError(f"Expected {self.num_games} actions, got {len(codes)}.")
+        games = self._games
+        in_range = (codes >= 0) & (codes < NUM_ACTIONS)
+        legal = in_range & self.legal_masks[games, numpy.where(in_range, codes, PASS_ACTION)]
+        seats = self._current.copy()
+        self._apply(games, seats, numpy.where(legal, codes, PASS_ACTION))
+        self._steps += 1
+        if self.opponent != "self":
+            seats[:] = LEARNER_SEAT
+            self._play_opponent(games)
+
+        won = self._over & (self._winner == seats)
+        lost = self._over & (self._winner >= 0) & (self._winner != seats)
+        self.rewards[:] = won.astype(numpy.float32) - lost
+        self.dones[:] = self._over | (self._steps >= self.max_steps)
+        finished = numpy.flatnonzero(self.dones)
+        if finished.size:
+            self._deal(finished)
+            if self.opponent != "self":
+                self._play_opponent(finished)
+        self._observe()
+        return self.observations, self.legal_masks, self.rewards, self.dones
+
+    def _deal(self, games: Any):
+        hand_size = STANDARD_RULES.starting_hand_size
+        order = self.rng.random((len(games), 2, len(_DECK))).argsort(axis=2)
+        decks = self._deck_cards[order]
+        self._deck[games] = decks
+        self._deck_len[games] = len(_DECK) - hand_size
+        self._hand[games] = _NO_CARD
+        self._hand[games, :, :hand_size] = decks[:, :, :-hand_size - 1:-1]  # drawn from the end, as Player does
+        self._hand_len[games] = hand_size
+        for lane_array, empty in ((self._count, 0), (self._length, 0), (self._total, 0), (self._suit, -1),
+                                  (self._direction, 0), (self._last_value, 0),
+                                  (self._sold_flags, False)):
+            lane_array[games] = empty
+        self._current[games] = 0
+        self._turn[games] = 0
+        self._setup[games] = True
+        self._over[games] = False
+        self._winner[games] = -1
+        self._steps[games] = 0
+
+    def _observe(self):
+        seats = self._current if self.opponent == "self" else self._learner_seats
+        self.seats[:] = seats
+        self._legal_masks(self._games, seats, self.legal_masks)
+        self._features(self._games, seats, self.observations)
+
+    def _play_opponent(self, games: Any):
+        """Random replies for seat 1 until every game is back with the learner."""
+        for _ in range(self.max_steps):
+            waiting = games[~self._over[games] & (self._current[games] != LEARNER_SEAT)]
+            if not waiting.size:
+                return
+            seats = self._current[waiting]
+            moves = self._legal_masks(waiting, seats)[:, :PASS_ACTION]
+            running = moves.cumsum(axis=1, dtype=numpy.uint8)  # at most 94 moves
+            counts = running[:, -1]
+            picks = (self.rng.random(len(waiting)) * counts).astype(numpy.uint8)
+            codes = (running > picks[:, None]).argmax(axis=1)
+            codes[counts == 0] = PASS_ACTION
+            self._apply(waiting, seats, codes)
+
+    def _sold(self, games: Any) -> Any:
+        """[game, seat, lane] flags of GameState.is_caravan_sold_by_player."""
+        total = self._total[games]
+        in_range = (total >= CARAVAN_WIN_MIN) & (total <= CARAVAN_WIN_MAX)
+        return in_range & (~in_range[:, ::-1] | (total > total[:, ::-1]))
+
+    def _legal_masks(self, games: Any, seats: Any, masks: Optional[Any] = None) -> Any:
+        """GameActions.get_legal_actions() for each game's seat, as masks over
+        action codes. The targets of each hand slot are worked out as a byte,
+        own lanes in the low bits and the opponent's above them, which is the
+        order of the play_card codes. Fills masks when given."""
+        rows = numpy.arange(len(games))
+        if masks is None:
+            masks = numpy.zeros((len(games), NUM_ACTIONS), dtype=bool)
+        else:
+            masks[:] = False
+        masks[:, PASS_ACTION] = True
+        hand = self._hand[games, seats]
+        count = self._count[games]
+        own_count = count[rows, seats]
+        setup = self._setup[games]
+        placing = numpy.flatnonzero(setup)
+        if placing.size:
+            empty = ((own_count[placing] == 0) * self._lane_bits).sum(axis=1, dtype=numpy.uint8)
+            words = numpy.where(self._numeric[hand[placing]], empty[:, None], 0)
+            masks[placing, _PLACE_SPAN] = self._byte_bits[words][:, :, :NUM_CARAVANS].reshape(placing.size, -1)
+        playing = ~setup
+        if not playing.any():
+            return masks
+
+        sold = self._sold_flags[games]
+        own_sold = sold[rows, seats]
+        open_lanes = ((count > 0) & ~sold) * self._lane_bits
+        open_lanes = open_lanes.sum(axis=2, dtype=numpy.uint8)
+        targets = open_lanes[rows, seats] | (open_lanes[rows, 1 - seats] << NUM_CARAVANS)
+        words = numpy.where(self._face[hand] & playing[:, None], targets[:, None], 0).astype(numpy.uint8)
+        lane_state = (self._last_value[games, seats] * 3 + self._direction[games, seats] + 1) * 5 + \
+            self._suit[games, seats] + 1
+        lane_state = numpy.where(own_sold | setup[:, None], self._sold_lane_state, lane_state)
+        rows_of_hand = hand.astype(numpy.intp) * self._lane_states
+        for lane in range(NUM_CARAVANS):
+            words |= self._can_add.take(rows_of_hand + lane_state[:, lane, None]) << lane
+        masks[:, _PLAY_SPAN] = self._byte_bits[words].reshape(len(games), -1)
+        present = self._slots < self._hand_len[games, seats][:, None]
+        masks[:, _DISCARD_SPAN] = present & playing[:, None]
+        masks[:, _DISCARD_CARAVAN_SPAN] = (own_count > 0) & ~own_sold & playing[:, None]
+        return masks
+
+    def _apply(self, games: Any, seats: Any, codes: Any):
+        """GameActions.execute_turn() of one legal action per game."""
+        kind = self._kind[codes]
+        hand_slot = self._action_hand[codes]
+        lane = self._action_lane[codes]
+        owner = seats ^ self._action_target[codes]
+        card = self._hand[games, seats, hand_slot]
+        playing = kind == _PLAY
+
+        pushes = numpy.flatnonzero((kind == _PLACE) | (playing & self._numeric[card]))
+        self._push(games[pushes], seats[pushes], lane[pushes], card[pushes])
+        for face_cards, handler in ((self._jack, self._remove_last), (self._queen, self._reverse),
+                                    (self._king, self._add_king)):
+            chosen = numpy.flatnonzero(playing & face_cards[card])
+            if chosen.size:
+                handler(games[chosen], owner[chosen], lane[chosen], card[chosen])
+        cleared = numpy.flatnonzero(kind == _DISCARD_CARAVAN)
+        g, s, l = games[cleared], seats[cleared], lane[cleared]
+        self._count[g, s, l] = self._length[g, s, l] = self._total[g, s, l] = self._direction[g, s, l] = 0
+        self._last_value[g, s, l] = 0
+        self._suit[g, s, l] = -1
+
+        used = numpy.flatnonzero((kind == _PLACE) | playing | (kind == _DISCARD))
+        self._remove_from_hand(games[used], seats[used], hand_slot[used])
+        draws = numpy.flatnonzero(playing | (kind == _DISCARD) | (kind == _DISCARD_CARAVAN))
+        self._draw(games[draws], seats[draws])
+        self._end_turn(games)
+
+    def _push(self, g: Any, s: Any, l: Any, card: Any):
+        depth = self._count[g, s, l]
+        self._stack[g, s, l, depth] = card
+        self._kings[g, s, l, depth] = 0
+        self._count[g, s, l] = depth + 1
+        self._length[g, s, l] += 1
+        self._total[g, s, l] += self._value[card]
+        self._last_value[g, s, l] = self._value[card]
+        first = depth == 0
+        self._suit[g[first], s[first], l[first]] = self._card_suit[card[first]]
+        later = (depth >= 1) & (self._direction[g, s, l] == 0)
+        self._set_direction(g[later], s[later], l[later])
+
+    def _set_direction(self, g: Any, s: Any, l: Any):
+        """Direction from the first two numeric cards, as Caravan does."""
+        first, second = self._value[self._stack[g, s, l, 0]], self._value[self._stack[g, s, l, 1]]
+        self._direction[g, s, l] = numpy.sign(second - first)
+
+    def _remove_last(self, g: Any, s: Any, l: Any, card: Any):
+        depth = self._count[g, s, l] - 1
+        kings = self._kings[g, s, l, depth]
+        self._total[g, s, l] -= self._value[self._stack[g, s, l, depth]] << kings
+        self._count[g, s, l] = depth
+        self._last_value[g, s, l] = numpy.where(depth > 0, self._value[self._stack[g, s, l, depth - 1]], 0)
+        self._length[g, s, l] -= 1 + kings
+        self._suit[g, s, l] = numpy.where(depth > 0, self._card_suit[self._stack[g, s, l, 0]], -1)
+        self._direction[g, s, l] = 0
+        pair = depth >= 2
+        self._set_direction(g[pair], s[pair], l[pair])
+
+    def _reverse(self, g: Any, s: Any, l: Any, card: Any):
+        self._suit[g, s, l] = self._card_suit[card]
+        self._direction[g, s, l] = -self._direction[g, s, l]
+
+    def _add_king(self, g: Any, s: Any, l: Any, card: Any):
+        depth = self._count[g, s, l] - 1
+        kings = self._kings[g, s, l, depth]
+        self._total[g, s, l] += self._value[self._stack[g, s, l, depth]] << kings
+        self._kings[g, s, l, depth] = kings + 1
+        self._length[g, s, l] += 1
+
+    def _remove_from_hand(self, g: Any, s: Any, slot: Any):
+        sources = numpy.minimum(self._slots + (self._slots >= slot[:, None]), HAND_SIZE_LIMIT - 1)
+        hand = numpy.take_along_axis(self._hand[g, s], sources, axis=1)
+        hand_len = self._hand_len[g, s] - 1
+        hand[self._slots >= hand_len[:, None]] = _NO_CARD
+        self._hand[g, s] = hand
+        self._hand_len[g, s] = hand_len
+
+    def _draw(self, g: Any, s: Any):
+        can_draw = (self._deck_len[g, s] > 0) & (self._hand_len[g, s] < HAND_SIZE_LIMIT)
+        g, s = g[can_draw], s[can_draw]
+        top = self._deck_len[g, s] - 1
+        self._hand[g, s, self._hand_len[g, s]] = self._deck[g, s, top]
+        self._hand_len[g, s] += 1
+        self._deck_len[g, s] = top
+
+    def _end_turn(self, games: Any):
+        """Game over check, end of the setup phase, next turn and the
+        auto-pass for a player left without moves."""
+        sold = self._sold(games)
+        self._sold_flags[games] = sold
+        sales = sold.sum(axis=2)
+        wins = sales >= STANDARD_RULES.winning_caravans_needed
+        exhausted = ((self._hand_len[games] == 0) & (self._deck_len[games] == 0)).all(axis=1)
+        winner = numpy.where(wins[:, 0], 0, numpy.where(wins[:, 1], 1, -1))
+        by_sales = numpy.sign(sales[:, 1] - sales[:, 0])  # -1 seat 0 ahead, 1 seat 1 ahead
+        winner = numpy.where((winner < 0) & exhausted, numpy.where(by_sales < 0, 0, numpy.where(by_sales > 0, 1, -1)),
+                             winner)
+        over = wins.any(axis=1) | exhausted
+        self._over[games] = over
+        self._winner[games] = winner
+
+        live = games[~over]
+        started = self._setup[live] & (self._count[live] > 0).all(axis=(1, 2))
+        done = live[started]
+        self._setup[done] = False
+        self._current[done] = 0
+        self._turn[done] = 0
+        moving = live[~started]
+        self._next_turn(moving)
+        self._next_turn(moving[self._stuck(moving)])
+
+    def _next_turn(self, games: Any):
+        current = self._current[games] ^ 1
+        self._current[games] = current
+        self._turn[games] += ~self._setup[games] & (current == 0)
+
+    def _stuck(self, games: Any) -> Any:
+        rows, seats = numpy.arange(len(games)), self._current[games]
+        sold = self._sold_flags[games]
+        sold_by_anyone = sold[rows, seats] | sold[rows, 1 - seats]
+        can_discard = ((self._count[games, seats] > 0) & ~sold_by_anyone).any(axis=1)
+        return (self._hand_len[games, seats] == 0) & (self._deck_len[games, seats] == 0) & ~can_discard
+
+    def _features(self, games: Any, seats: Any, out: Any):
+        """features.state_features() of each game's seat, written into out."""
+        rows, others = numpy.arange(len(games)), 1 - seats
+        total = self._total[games]
+        own, opp = total[rows, seats], total[rows, others]
+        sold = self._sold_flags[games]
+        own_sold, opp_sold = sold[rows, seats], sold[rows, others]
+        length = self._length[games]
+        direction = self._direction[games, seats]
+        lanes = out[:, :NUM_CARAVANS * _LANE_FEATURES].reshape(len(games), NUM_CARAVANS, _LANE_FEATURES)
+        for feature, column in enumerate((
+                own / CARAVAN_WIN_MAX, opp / CARAVAN_WIN_MAX, length[rows, seats], length[rows, others],
+                (own >= CARAVAN_WIN_MIN) & (own <= CARAVAN_WIN_MAX), (opp >= CARAVAN_WIN_MIN) & (opp <= CARAVAN_WIN_MAX),
+                own_sold, opp_sold, (CARAVAN_WIN_MIN - own) / CARAVAN_WIN_MAX, direction == 1, direction == -1)):
+            lanes[:, :, feature] = column
+        summary = self._hand_summary[self._hand[games, seats]].sum(axis=1)
+        hand_len, deck_len = self._hand_len[games], self._deck_len[games]
+        for feature, column in enumerate((
+                hand_len[rows, seats] / HAND_SIZE_LIMIT, summary & 15, summary >> 4 & 15, summary >> 8 & 15,
+                summary >> 12 & 15, (summary >> 16) / CARAVAN_WIN_MAX, deck_len[rows, seats],
+                hand_len[rows, others] / HAND_SIZE_LIMIT, deck_len[rows, others], own_sold.sum(axis=1),
+                opp_sold.sum(axis=1), self._turn[games], self._setup[games]), NUM_CARAVANS * _LANE_FEATURES):
+            out[:, feature] = column
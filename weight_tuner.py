@@ -0,0 +1,207 @@
+# filename: weight_tuner.py
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import debug
+from ai_profile import AIProfile, AI_WEIGHT_NAMES, DEFAULT_AI_PROFILE
+from eval_cache import open_eval_cache
+from flight_recorder import RECORDER
+from headless import HeadlessGame
+
+TUNER_AI_DIFFICULTY = 1  # always play the best-scored move
+MAX_ACTIONS_PER_GAME = 600
+
+class MatchResult(NamedTuple):
+    score: float  # wins + half the draws, for the first profile
+    games: int
+    stopped_early: bool = False
+
+    @property
+    def rate(self) -> float:
+        return self.score / self.games if self.games else 0.5
+
+def _init_worker(eval_cache_path: Optional[str] = None):
+    debug.configure(default_level=debug.ERROR)
+    RECORDER.enabled = False
+    open_eval_cache(eval_cache_path)
+
+def _play_pair(weights_a: Dict[str, float], weights_b: Dict[str, float], seeds: Sequence[int]) -> Tuple[float, int]:
+    """Plays every seed twice with seats swapped; returns (score for a, games played)."""
+    profile_a = AIProfile(weights_a, "a")
+    profile_b = AIProfile(weights_b, "b")
+    score, games = 0.0, 0
+    for seed in seeds:
+        for a_seat in (0, 1):
+            profiles = (profile_a, profile_b) if a_seat == 0 else (profile_b, profile_a)
+            game = HeadlessGame(seed=seed, ai_difficulty=TUNER_AI_DIFFICULTY, questions=False, profiles=profiles)
+            game.play_to_end(MAX_ACTIONS_PER_GAME)
+            game_state = game.game_state
+            if not game_state.game_over:
+                continue
+            games += 1
+            if game_state.winner is None:
+                score += 0.5
+            elif game_state.players.index(game_state.winner) == a_seat:
+                score += 1.0
+    return score, games
+
+def _margin(rate: float, games: int, z: float) -> float:
+    return z * math.sqrt(max(rate * (1.0 - rate), 0.25 / games) / games)
+
+def _upper_bound(result_score: float, games: int, z: float = 2.0) -> float:
+    if games == 0:
+        return 1.0
+    rate = result_score / games
+    return rate + _margin(rate, games, z)
+
+def _lower_bound(result_score: float, games: int, z: float = 2.0) -> float:
+    if games == 0:
+        return 0.0
+    rate = result_score / games
+    return rate - _margin(rate, games, z)
+
+class WeightTuner:
+    """SPSA over the AI scoring weights using paired self-play matches.
+
+    Each iteration plays theta+ against theta- and steps theta along the
+    estimated gradient of the win rate. Every ``eval_every`` iterations the
+    current theta is raced against the baseline profile; the race stops as
+    soon as the candidate cannot beat the best result so far. A candidate
+    becomes the new best only if it beats the best rate and the lower
+    confidence bound of its score is above 0.5, so noise around an even
+    match is not taken for an improvement. Tuning stops after ``patience``
+    evaluations without improvement.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor, workers: int, baseline: AIProfile = DEFAULT_AI_PROFILE,
+                 games_per_iteration: int = 32, eval_games: int = 256, eval_batch_games: int = 64,
+                 eval_every: int = 5, patience: int = 4, a: float = 0.2, c: float = 0.2,
+                 seed: int = 0):
+        self.pool = pool
+        self.workers = max(1, workers)
+        self.baseline = baseline
+        self.scale = [abs(value) or 1.0 for value in baseline.vector()]
+        self.theta = [1.0] * len(self.scale)  # weights as multiples of the baseline
+        self.games_per_iteration = games_per_iteration
+        self.eval_games = eval_games
+        self.eval_batch_games = eval_batch_games
+        self.eval_every = eval_every
+        self.patience = patience
+        self.a, self.c = a, c
+        self.rng = random.Random(seed)
+        self._next_seed = seed * 1_000_003
+        self.best_profile = baseline
+        self.best_rate = 0.5
+
+    def _profile(self, theta: Sequence[float], name: str) -> AIProfile:
+        return AIProfile.from_vector([max(0.0, t) * s for t, s in zip(theta, self.scale)], name)
+
+    def _seeds(self, count: int) -> List[int]:
+        seeds = list(range(self._next_seed, self._next_seed + count))
+        self._next_seed += count
+        return seeds
+
+    def match(self, profile_a: AIProfile, profile_b: AIProfile, num_games: int,
+              stop_below: Optional[float] = None) -> MatchResult:
+        """Plays about num_games games in parallel batches, stopping once the
+        upper confidence bound of profile_a's score drops below stop_below."""
+        weights_a, weights_b = profile_a.to_dict(), profile_b.to_dict()
+        batch_games = self.eval_batch_games if stop_below is not None else num_games
+        score, games = 0.0, 0
+        while games < num_games:
+            seeds = self._seeds(max(1, min(batch_games, num_games - games) // 2))
+            chunk = max(1, math.ceil(len(seeds) / self.workers))
+            futures = [self.pool.submit(_play_pair, weights_a, weights_b, seeds[i:i + chunk])
+                       for i in range(0, len(seeds), chunk)]
+            played_before = games
+            for future in futures:
+                chunk_score, chunk_games = future.result()
+                score += chunk_score
+                games += chunk_games
+            if games == played_before:
+                break
+            if stop_below is not None and games < num_games and _upper_bound(score, games) < stop_below:
+                return MatchResult(score, games, True)
+        return MatchResult(score, games)
+
+    def step(self, k: int) -> float:
+        a_k = self.a / (k + 1) ** 0.602
+        c_k = self.c / (k + 1) ** 0.101
+        delta = [self.rng.choice((-1.0, 1.0)) for _ in self.theta]
+        plus = [t + c_k * d for t, d in zip(self.theta, delta)]
+        minus = [t - c_k * d for t, d in zip(self.theta, delta)]
+        result = self.match(self._profile(plus, "plus"), self._profile(minus, "minus"), self.games_per_iteration)
+        # A 100% win for theta+ means the objective difference is +1.
+        difference = 2.0 * result.rate - 1.0
+        self.theta = [max(0.0, t + a_k * difference / (2.0 * c_k * d)) for t, d in zip(self.theta, delta)]
+        return result.rate
+
+    def run(self, iterations: int) -> AIProfile:
+        evaluations_without_improvement = 0
+        for k in range(iterations):
+            plus_rate = self.step(k)
+            debug.log_warning("SPSA iteration {}: theta+ scored {:.3f}", k + 1, plus_rate)
+            if (k + 1) % self.eval_every:
+                continue
+            candidate = self._profile(self.theta, f"tuned_iter{k + 1}")
+            result = self.match(candidate, self.baseline, self.eval_games, stop_below=self.best_rate)
+            significant = _lower_bound(result.score, result.games) > 0.5
+            if not result.stopped_early and result.rate > self.best_rate and significant:
+                self.best_profile, self.best_rate = candidate, result.rate
+                evaluations_without_improvement = 0
+                debug.log_warning("New best: {:.3f} vs baseline over {} games", result.rate, result.games)
+            else:
+                evaluations_without_improvement += 1
+                if result.stopped_early:
+                    outcome = "stopped early"
+                elif result.rate > self.best_rate:
+                    outcome = "was not significantly above the baseline"
+                else:
+                    outcome = "did not improve"
+                debug.log_warning("Candidate {} {} at {:.3f} over {} games", candidate.name, outcome,
+                                  result.rate, result.games)
+                if evaluations_without_improvement >= self.patience:
+                    debug.log_warning("No improvement in {} evaluations; stopping.", self.patience)
+                    break
+        return self.best_profile
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Tune the heuristic AI weights with SPSA self-play.")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--games-per-iteration", type=int, default=32)
+    parser.add_argument("--eval-games", type=int, default=256)
+    parser.add_argument("--eval-every", type=int, default=5)
+    parser.add_argument("--patience", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=None, help="Profile JSON to tune against (config defaults if omitted).")
+    parser.add_argument("--out", default="ai_profile.json")
+    parser.add_argument("--eval-cache", default=None, help="Evaluation cache file shared by the workers and kept between runs.")
+    args = parser.parse_args(argv)
+
+    debug.configure(default_level=debug.WARNING)
+    baseline = AIProfile.load(args.baseline) if args.baseline else DEFAULT_AI_PROFILE
+    start = time.perf_counter()
+    workers = args.workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(args.eval_cache,)) as pool:
+        tuner = WeightTuner(pool, workers, baseline, games_per_iteration=args.games_per_iteration,
+                            eval_games=args.eval_games, eval_every=args.eval_every,
+                            patience=args.patience, seed=args.seed)
+        best = tuner.run(args.iterations)
+    if best is baseline:
+        print("No candidate beat the baseline; nothing written.")
+        return
+    best.name = f"spsa_seed{args.seed}"
+    best.save(args.out, {"win_rate_vs_baseline": round(tuner.best_rate, 4),
+                         "baseline": baseline.name, "elapsed_s": round(time.perf_counter() - start, 1)})
+    print(f"Best profile ({tuner.best_rate:.3f} vs baseline) written to {args.out}")
+    for weight_name, value in zip(AI_WEIGHT_NAMES, best.vector()):
+        print(f"  {weight_name} = {value:.1f}")
+
+if __name__ == "__main__":
+    main()